@@ -15,7 +15,8 @@ import pytest
 from typing import Dict, Any
 from pathlib import Path
 
-from acktest.resources import load_resource_file
+from e2e import templates
+
 
 SERVICE_NAME = "cloudfront"
 CRD_GROUP = "cloudfront.services.k8s.aws"
@@ -29,6 +30,7 @@ resource_directory = Path(__file__).parent / "resources"
 
 def load_resource(resource_name: str, additional_replacements: Dict[str, Any] = {}):
     """ Overrides the default `load_resource_file` to access the specific resources
-    directory for the current service.
+    directory for the current service. Each file is parsed only once, see
+    `e2e.templates`.
     """
-    return load_resource_file(resource_directory, resource_name, additional_replacements=additional_replacements)
+    return templates.get_template(resource_directory, resource_name).render(additional_replacements)
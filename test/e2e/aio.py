@@ -0,0 +1,270 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""asyncio variants of the resource helpers, for tracking many resources
+from a single event loop.
+
+The helper modules (`e2e.distribution`, `e2e.cache_policy`, ...) block the
+calling thread, so following N resources at once takes N threads. Here,
+`get`, `get_tags` and the `wait_until_*` waiters of every kind are
+coroutines sharing one pooled aiobotocore client, and at most
+`max_concurrency` requests are in flight at a time, however many resources
+are awaited. Records, defaults and failures are the same as in the
+synchronous helpers.
+
+Requests take their tokens from the limiter of `e2e.rate_limit`, if it is
+installed, and go through the non-blocking client hooks of `e2e.clients`,
+such as the API profiler and the propagation tracker. Recording or
+replaying API calls (see `e2e.vcr`) is not supported.
+
+Usage:
+    from e2e import aio
+
+    async def wait_for_all(distribution_ids):
+        async with aio.CloudFront(max_concurrency=100) as cf:
+            await asyncio.gather(*(
+                cf.wait_until_deleted("Distribution", i) for i in distribution_ids
+            ))
+"""
+
+import asyncio
+
+from types import ModuleType
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import pytest
+from aiobotocore.session import get_session
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from e2e import (
+    cache_policy, connection_group, distribution, function, origin_access_control,
+    origin_request_policy, rate_limit, response_headers_policy, vcr, vpc_origin, waiter,
+)
+from e2e.clients import CLIENT_CONFIG, apply_async_client_hooks
+
+DEFAULT_MAX_CONCURRENCY = 50
+
+
+class Kind(NamedTuple):
+    # Client method that gets a resource
+    operation: str
+    # Parameter of the get call that identifies the resource
+    identifier: str
+    # Key of the resource in the response
+    key: str
+    # Error code returned when no such resource exists
+    not_found: str
+    # Synchronous helper module, whose waiter defaults apply
+    helper: ModuleType
+
+
+KINDS: Dict[str, Kind] = {
+    "Distribution": Kind(
+        "get_distribution", "Id", "Distribution", "NoSuchDistribution", distribution,
+    ),
+    "ConnectionGroup": Kind(
+        "get_connection_group", "Identifier", "ConnectionGroup", "EntityNotFound", connection_group,
+    ),
+    "VpcOrigin": Kind(
+        "get_vpc_origin", "Id", "VpcOrigin", "EntityNotFound", vpc_origin,
+    ),
+    "CachePolicy": Kind(
+        "get_cache_policy", "Id", "CachePolicy", "NoSuchCachePolicy", cache_policy,
+    ),
+    "OriginRequestPolicy": Kind(
+        "get_origin_request_policy", "Id", "OriginRequestPolicy", "NoSuchOriginRequestPolicy",
+        origin_request_policy,
+    ),
+    "ResponseHeadersPolicy": Kind(
+        "get_response_headers_policy", "Id", "ResponseHeadersPolicy", "NoSuchResponseHeadersPolicy",
+        response_headers_policy,
+    ),
+    "OriginAccessControl": Kind(
+        "get_origin_access_control", "Id", "OriginAccessControl", "NoSuchOriginAccessControl",
+        origin_access_control,
+    ),
+    "Function": Kind(
+        "describe_function", "Name", "FunctionSummary", "NoSuchFunctionExists", function,
+    ),
+}
+
+
+def _error_code(ex: ClientError) -> str:
+    return ex.response.get("Error", {}).get("Code", "")
+
+
+class CloudFront:
+    """A pooled async CloudFront client, used as an async context manager.
+
+    Args:
+        max_concurrency: the most requests in flight at a time, which is
+            also the size of the connection pool
+        limiter: every request first waits for one of its tokens; defaults
+            to the limiter installed by `e2e.rate_limit`, if any
+
+    Raises:
+        RuntimeError: on entry, if API calls are recorded or replayed
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        limiter: Optional[rate_limit.RateLimiter] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.limiter = limiter if limiter is not None else rate_limit.installed()
+        self._client_context = None
+        self._client = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "CloudFront":
+        if vcr.installed() is not None:
+            raise RuntimeError("e2e.aio cannot record or replay API calls")
+        self._client_context = get_session().create_client(
+            "cloudfront",
+            config=CLIENT_CONFIG.merge(Config(max_pool_connections=self.max_concurrency)),
+        )
+        self._client = await self._client_context.__aenter__()
+        apply_async_client_hooks(self._client)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._client_context.__aexit__(*exc)
+        self._client = None
+
+    async def call(self, operation: str, **params) -> dict:
+        """Calls a client method, e.g. "get_distribution", within the
+        concurrency limit."""
+        if self.limiter is not None:
+            api_name = self._client.meta.method_to_api_mapping[operation]
+            await self.limiter.acquire_async(f"cloudfront.{api_name}")
+        async with self._semaphore:
+            return await getattr(self._client, operation)(**params)
+
+    async def get(self, kind: str, identifier: str, **params) -> Optional[dict]:
+        """Returns a dict containing the record of a resource, with the ETag
+        of the returned version, like the `get` of the kind's helper module.
+
+        If no such resource exists, returns None.
+        """
+        k = KINDS[kind]
+        try:
+            resp = await self.call(k.operation, **{k.identifier: identifier}, **params)
+        except ClientError as ex:
+            if _error_code(ex) == k.not_found:
+                return None
+            raise
+        record = resp[k.key]
+        record["ETag"] = resp["ETag"]
+        if kind == "Function":
+            record["LastModifiedTime"] = record["FunctionMetadata"]["LastModifiedTime"]
+        return record
+
+    async def get_tags(self, arn: str) -> Optional[List[dict]]:
+        """Returns the tags of a resource as a list of {"Key", "Value"} dicts.
+
+        If no such resource exists, returns None.
+        """
+        try:
+            resp = await self.call("list_tags_for_resource", Resource=arn)
+        except ClientError as ex:
+            if _error_code(ex) == "NoSuchResource":
+                return None
+            raise
+        return resp["Tags"]["Items"]
+
+    async def get_tags_many(self, arns: Iterable[str]) -> Dict[str, Optional[List[dict]]]:
+        """Returns the tags of each resource, keyed by ARN. Resources that do
+        not exist map to None."""
+        arns = list(dict.fromkeys(arns))
+        return dict(zip(arns, await asyncio.gather(*(self.get_tags(arn) for arn in arns))))
+
+    async def _wait(self, kind, identifier, condition, description, timeout_seconds, interval_seconds):
+        try:
+            return await waiter.wait_for_async(
+                lambda: self.get(kind, identifier),
+                condition,
+                f"{kind} {identifier} {description}",
+                timeout_seconds=timeout_seconds,
+                max_interval_seconds=interval_seconds,
+            )
+        except waiter.WaitTimeoutError as ex:
+            pytest.fail(str(ex))
+
+    async def wait_until_exists(
+        self,
+        kind: str,
+        identifier: str,
+        timeout_seconds: Optional[float] = None,
+        interval_seconds: Optional[float] = None,
+    ) -> waiter.WaitResult:
+        """Waits until a resource is returned from the CloudFront API.
+
+        Raises:
+            pytest.fail upon timeout
+        """
+        helper = KINDS[kind].helper
+        return await self._wait(
+            kind, identifier,
+            lambda latest: latest is not None,
+            "to exist in CloudFront API",
+            timeout_seconds or helper.DEFAULT_WAIT_UNTIL_EXISTS_TIMEOUT_SECONDS,
+            interval_seconds or helper.DEFAULT_WAIT_UNTIL_EXISTS_INTERVAL_SECONDS,
+        )
+
+    async def wait_until_deleted(
+        self,
+        kind: str,
+        identifier: str,
+        timeout_seconds: Optional[float] = None,
+        interval_seconds: Optional[float] = None,
+    ) -> waiter.WaitResult:
+        """Waits until a resource is no longer returned from the CloudFront
+        API.
+
+        Raises:
+            pytest.fail upon timeout
+        """
+        helper = KINDS[kind].helper
+        return await self._wait(
+            kind, identifier,
+            lambda latest: latest is None,
+            "to be deleted in CloudFront API",
+            timeout_seconds or helper.DEFAULT_WAIT_UNTIL_DELETED_TIMEOUT_SECONDS,
+            interval_seconds or helper.DEFAULT_WAIT_UNTIL_DELETED_INTERVAL_SECONDS,
+        )
+
+    async def wait_until_changed(
+        self,
+        kind: str,
+        identifier: str,
+        since_etag: str,
+        timeout_seconds: Optional[float] = None,
+        interval_seconds: Optional[float] = None,
+    ) -> waiter.WaitResult:
+        """Waits until the CloudFront API returns a version of a resource
+        other than `since_etag`.
+
+        Raises:
+            pytest.fail upon timeout
+        """
+        helper = KINDS[kind].helper
+        return await self._wait(
+            kind, identifier,
+            lambda latest: latest is not None and latest.get("ETag") != since_etag,
+            f"to change from version {since_etag} in CloudFront API",
+            timeout_seconds or helper.DEFAULT_WAIT_UNTIL_CHANGED_TIMEOUT_SECONDS,
+            interval_seconds or helper.DEFAULT_WAIT_UNTIL_CHANGED_INTERVAL_SECONDS,
+        )
@@ -0,0 +1,309 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""pytest plugin that profiles the AWS API calls made by the e2e harness.
+
+Enabled with `--api-profile=PATH`. Every client created through
+`e2e.clients` is instrumented through botocore's event system, and each call
+is attributed to the fixture being set up or the test phase running when it
+was made:
+
+    {"test_cache_policy.py::TestCachePolicy::test_crud": {
+        "fixture:simple_cache_policy": {
+            "cloudfront.GetCachePolicy": {"calls": 3, "errors": 0,
+                                          "retries": 0, "throttled": 0,
+                                          "p50_ms": 12.1, ...}}}}
+
+The full report is written as JSON to PATH at the end of the session, with
+a "by_operation" summary across all tests. Each test also gets JUnit
+properties with its call, retry and throttle counts. Under pytest-xdist the
+workers hand their profiles to the controller through the test reports,
+and their remaining calls when they shut down.
+
+Calls made by the prefetch, reaper and leak check threads, which run
+alongside whatever test is current, are reported under "background"
+instead of being charged to that test. Other threads, e.g. the pools a
+test uses to make its own calls concurrently, count towards the current
+test.
+"""
+
+import functools
+import json
+import logging
+import threading
+import time
+
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from e2e import clients
+
+PROFILE_PROPERTY = "api_profile"
+
+THROTTLING_ERROR_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "SlowDown",
+}
+
+# Scope of the calls made outside of any test, e.g. during collection
+SESSION_SCOPE = "session"
+# Scope of the calls made by the threads wrapped with `background`
+BACKGROUND_SCOPE = "background"
+# Key of the leftover calls a worker hands to the controller
+WORKER_OUTPUT_KEY = "api_profile"
+
+# Scope of the current thread, if it was set with `background`
+_thread_scope = threading.local()
+
+
+def background(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wraps a function run in a background thread, e.g. by
+    `e2e.prefetch` or `e2e.reaper`, so that its calls are not charged to
+    the test running meanwhile."""
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        _thread_scope.scope = BACKGROUND_SCOPE
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _thread_scope.scope = None
+
+    return wrapper
+
+
+def in_current_scope(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wraps a function that another thread runs on behalf of the current
+    one, so that its calls are charged to the current thread's scope."""
+    scope = getattr(_thread_scope, "scope", None)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        _thread_scope.scope = scope
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _thread_scope.scope = None
+
+    return wrapper
+
+
+def _new_stats() -> dict:
+    return {"calls": 0, "errors": 0, "retries": 0, "throttled": 0, "latencies_ms": []}
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(stats: dict) -> dict:
+    """Replaces the latency samples of an operation's stats with
+    percentiles."""
+    latencies = sorted(stats["latencies_ms"])
+    summary = {k: v for k, v in stats.items() if k != "latencies_ms"}
+    summary.update({
+        "p50_ms": round(_percentile(latencies, 50), 1),
+        "p90_ms": round(_percentile(latencies, 90), 1),
+        "p99_ms": round(_percentile(latencies, 99), 1),
+        "max_ms": round(latencies[-1], 1) if latencies else 0.0,
+    })
+    return summary
+
+
+def _merge(into: dict, stats: dict):
+    for key in ("calls", "errors", "retries", "throttled"):
+        into[key] += stats[key]
+    into["latencies_ms"].extend(stats["latencies_ms"])
+
+
+def _merge_profile(into: dict, profile: dict):
+    for scope, ops in profile.items():
+        for op, stats in ops.items():
+            _merge(into.setdefault(scope, {}).setdefault(op, _new_stats()), stats)
+
+
+class ApiProfiler:
+    def __init__(self, report_path: str):
+        self.report_path = report_path
+        self._lock = threading.Lock()
+        # Scope of the pytest thread, which the hooks run in
+        self._scope = SESSION_SCOPE
+        # Calls of the running test: scope -> operation -> stats
+        self._current: Dict[str, Dict[str, dict]] = defaultdict(lambda: defaultdict(_new_stats))
+        # Calls of the background threads: operation -> stats
+        self._background: Dict[str, dict] = defaultdict(_new_stats)
+        # Profiles of the finished tests, keyed by node ID, and the leftover
+        # calls of the session and the background threads
+        self._profiles: Dict[str, Dict[str, Dict[str, dict]]] = {}
+
+    def attach(self, client):
+        """Instruments a botocore client. Registered as a client hook."""
+        events = client.meta.events
+        events.register("before-call", self._before_call)
+        events.register("after-call", self._after_call)
+        events.register("after-call-error", self._after_call_error)
+        events.register("response-received", self._response_received)
+
+    def _before_call(self, model, context, **kwargs):
+        context["api_profiler_operation"] = f"{model.service_model.service_name}.{model.name}"
+        context["api_profiler_started_at"] = time.monotonic()
+
+    def _stats(self, operation: str) -> dict:
+        """Returns the stats of an operation in the current thread's scope.
+        Must be called with the lock held."""
+        if getattr(_thread_scope, "scope", None) == BACKGROUND_SCOPE:
+            return self._background[operation]
+        return self._current[self._scope][operation]
+
+    def _record(self, context, error: bool, retries: int):
+        started_at = context.get("api_profiler_started_at")
+        if started_at is None:
+            return
+        latency_ms = (time.monotonic() - started_at) * 1000
+        with self._lock:
+            stats = self._stats(context["api_profiler_operation"])
+            stats["calls"] += 1
+            stats["errors"] += int(error)
+            stats["retries"] += retries
+            stats["latencies_ms"].append(latency_ms)
+
+    def _after_call(self, http_response, parsed, model, context, **kwargs):
+        retries = parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+        self._record(context, http_response.status_code >= 300, retries)
+
+    def _after_call_error(self, context, **kwargs):
+        self._record(context, True, context.get("retries", {}).get("attempt", 1) - 1)
+
+    def _response_received(self, parsed_response, event_name, **kwargs):
+        if not parsed_response:
+            return
+        code = parsed_response.get("Error", {}).get("Code")
+        if code in THROTTLING_ERROR_CODES:
+            _, service_name, operation_name = event_name.split(".", 2)
+            with self._lock:
+                self._stats(f"{service_name}.{operation_name}")["throttled"] += 1
+
+    def _set_scope(self, scope: str) -> str:
+        with self._lock:
+            previous, self._scope = self._scope, scope
+        return previous
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        previous = self._set_scope(f"fixture:{fixturedef.argname}")
+        yield
+        self._set_scope(previous)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        self._set_scope("setup")
+        yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        self._set_scope("call")
+        yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item, nextitem):
+        self._set_scope("teardown")
+        yield
+        with self._lock:
+            profile = {scope: dict(ops) for scope, ops in self._current.items() if ops}
+            self._current.clear()
+            self._scope = SESSION_SCOPE
+        ops = [stats for scope_ops in profile.values() for stats in scope_ops.values()]
+        item.user_properties.extend([
+            ("api_calls", sum(s["calls"] for s in ops)),
+            ("api_retries", sum(s["retries"] for s in ops)),
+            ("api_throttled", sum(s["throttled"] for s in ops)),
+            (PROFILE_PROPERTY, json.dumps(profile)),
+        ])
+
+    def pytest_runtest_logreport(self, report):
+        # Runs on the xdist controller too, which is where the report is
+        # written when running in parallel
+        if report.when != "teardown":
+            return
+        for name, value in report.user_properties:
+            if name == PROFILE_PROPERTY:
+                self._profiles[report.nodeid] = json.loads(value)
+
+    def _take_leftovers(self) -> Dict[str, Dict[str, Dict[str, dict]]]:
+        """Returns and forgets the calls made outside of any test, and those
+        of the background threads, as profiles keyed by their scope."""
+        leftovers = {}
+        with self._lock:
+            if any(self._current.values()):
+                leftovers[SESSION_SCOPE] = {scope: dict(ops) for scope, ops in self._current.items() if ops}
+            if self._background:
+                leftovers[BACKGROUND_SCOPE] = {BACKGROUND_SCOPE: dict(self._background)}
+            self._current.clear()
+            self._background.clear()
+        return leftovers
+
+    def _add_leftovers(self, leftovers: dict):
+        for name, profile in leftovers.items():
+            _merge_profile(self._profiles.setdefault(name, {}), profile)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        # The xdist controller, receiving a worker's leftover calls
+        output = getattr(node, "workeroutput", {}).get(WORKER_OUTPUT_KEY)
+        if output:
+            self._add_leftovers(json.loads(output))
+
+    def report(self) -> dict:
+        by_operation = defaultdict(_new_stats)
+        tests = {}
+        self._add_leftovers(self._take_leftovers())
+        profiles = dict(self._profiles)
+        for nodeid, profile in profiles.items():
+            tests[nodeid] = {}
+            for scope, ops in profile.items():
+                tests[nodeid][scope] = {op: summarize(stats) for op, stats in ops.items()}
+                for op, stats in ops.items():
+                    _merge(by_operation[op], stats)
+        return {
+            "by_operation": {
+                op: summarize(stats)
+                for op, stats in sorted(by_operation.items(), key=lambda i: -i[1]["calls"])
+            },
+            "tests": tests,
+        }
+
+    def pytest_sessionfinish(self, session):
+        if hasattr(session.config, "workerinput"):
+            session.config.workeroutput[WORKER_OUTPUT_KEY] = json.dumps(self._take_leftovers())
+            return
+        with open(self.report_path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        logging.info(f"Wrote API profile to {self.report_path}")
+
+
+def register(config):
+    """Enables the profiler if `--api-profile` was given."""
+    path = config.getoption("--api-profile")
+    if not path:
+        return
+    profiler = ApiProfiler(path)
+    config.pluginmanager.register(profiler, "e2e-api-profiler")
+    clients.register_client_hook(profiler.attach)
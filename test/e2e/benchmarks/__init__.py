@@ -0,0 +1,21 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Benchmarks for the e2e harness itself.
+
+The benchmarks run against the offline CloudFront stand-in
+(`e2e.cloudfront_standin`) and need neither an AWS account nor a cluster.
+Run them from the `test` directory, e.g.:
+
+    python -m e2e.benchmarks.client_overhead
+"""
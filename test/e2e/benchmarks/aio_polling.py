@@ -0,0 +1,148 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Compares waiting on many resources with a thread pool of synchronous
+helpers versus one event loop of `e2e.aio` coroutines.
+
+For every count, that many VpcOrigins are created in the CloudFront
+stand-in and deleted, and then both approaches wait until CloudFront no
+longer returns them. The threaded approaches run `vpc_origin.wait_until_deleted`
+with `--threads` workers, or with one thread per resource; the event loop
+runs `aio.CloudFront.wait_until_deleted` for every resource at once, with
+`--threads` requests in flight at most.
+The report shows the wall time, the peak number of threads and the API
+calls of each.
+
+Usage:
+    python -m e2e.benchmarks.aio_polling --count 10,100,1000
+"""
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from e2e import aio, clients, vpc_origin
+from e2e.cloudfront_standin import CloudFrontStandIn
+
+DEFAULT_COUNTS = "10,100,1000"
+DEFAULT_THREADS = 50
+DEFAULT_DELETE_SECONDS = 15
+INTERVAL_SECONDS = 1
+TIMEOUT_SECONDS = 120
+CREATE_WORKERS = 16
+
+
+class ThreadSampler:
+    """Records the peak number of live threads, sampled in the background.
+    The stand-in's request threads are not counted."""
+
+    def __init__(self, interval_seconds: float = 0.01):
+        self.interval_seconds = interval_seconds
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            live = sum(1 for t in threading.enumerate() if "process_request" not in t.name)
+            self.peak = max(self.peak, live)
+            self._stop.wait(self.interval_seconds)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def create_and_delete(count: int) -> list:
+    c = clients.get_cloudfront_client()
+
+    def create(i: int) -> str:
+        return c.create_vpc_origin(VpcOriginEndpointConfig={
+            "Name": f"bench-{i}", "Arn": "arn:aws:elasticloadbalancing:us-east-1:000000000000:loadbalancer/app/bench/1",
+            "HTTPPort": 80, "HTTPSPort": 443, "OriginProtocolPolicy": "http-only",
+        })["VpcOrigin"]["Id"]
+
+    def delete(vpc_origin_id: str):
+        etag = c.get_vpc_origin(Id=vpc_origin_id)["ETag"]
+        c.delete_vpc_origin(Id=vpc_origin_id, IfMatch=etag)
+
+    with ThreadPoolExecutor(CREATE_WORKERS) as pool:
+        ids = list(pool.map(create, range(count)))
+        list(pool.map(delete, ids))
+    return ids
+
+
+def wait_with_threads(ids: list, threads: int):
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(
+            lambda i: vpc_origin.wait_until_deleted(
+                i, timeout_seconds=TIMEOUT_SECONDS, interval_seconds=INTERVAL_SECONDS,
+            ),
+            ids,
+        ))
+
+
+async def wait_with_event_loop(ids: list, max_concurrency: int):
+    async with aio.CloudFront(max_concurrency=max_concurrency) as cf:
+        await asyncio.gather(*(
+            cf.wait_until_deleted(
+                "VpcOrigin", i, timeout_seconds=TIMEOUT_SECONDS, interval_seconds=INTERVAL_SECONDS,
+            )
+            for i in ids
+        ))
+
+
+def measure(standin: CloudFrontStandIn, count: int, wait) -> dict:
+    ids = create_and_delete(count)
+    standin.reset_counters()
+    with ThreadSampler() as threads:
+        start = time.perf_counter()
+        wait(ids)
+        seconds = time.perf_counter() - start
+    return {"seconds": seconds, "threads": threads.peak, "calls": sum(standin.calls.values())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", default=DEFAULT_COUNTS, help="comma-separated resource counts")
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS,
+                        help="thread pool size, and requests in flight for the event loop")
+    parser.add_argument("--delete-seconds", type=float, default=DEFAULT_DELETE_SECONDS)
+    args = parser.parse_args()
+
+    with CloudFrontStandIn(deploy_seconds=0, delete_seconds=args.delete_seconds) as standin:
+        os.environ.update(standin.environ())
+        clients.reset()
+
+        print(f"Waiting until VpcOrigins are deleted ({args.delete_seconds:g}s each), {args.threads} threads/requests in flight")
+        print(f"{'count':>6} {'approach':<12} {'seconds':>8} {'threads':>8} {'calls':>7}")
+        for count in [int(c) for c in args.count.split(",")]:
+            for name, wait in (
+                ("thread pool", lambda ids: wait_with_threads(ids, args.threads)),
+                ("thread each", lambda ids: wait_with_threads(ids, len(ids))),
+                ("asyncio", lambda ids: asyncio.run(wait_with_event_loop(ids, args.threads))),
+            ):
+                r = measure(standin, count, wait)
+                print(f"{count:>6} {name:<12} {r['seconds']:>8.2f} {r['threads']:>8} {r['calls']:>7}")
+
+
+if __name__ == "__main__":
+    main()
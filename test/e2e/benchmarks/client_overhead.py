@@ -0,0 +1,78 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Measures the per-call overhead of building a new boto3 client for every
+helper call versus reusing the pooled client from `e2e.clients`.
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+import boto3
+
+from e2e import clients
+from e2e.cloudfront_standin import CloudFrontStandIn
+
+DEFAULT_CALLS = 200
+
+
+def _measure(call, calls: int):
+    """Returns (milliseconds per call, peak KiB allocated per call) for
+    `calls` invocations of `call`.
+
+    Timing and allocation tracking are separate passes because tracemalloc
+    slows down every allocation it records.
+    """
+    call()  # warm up imports and caches
+    start = time.perf_counter()
+    for _ in range(calls):
+        call()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / calls * 1000, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=DEFAULT_CALLS)
+    args = parser.parse_args()
+
+    with CloudFrontStandIn() as standin:
+        os.environ.update(standin.environ())
+        clients.reset()
+
+        cache_policy_id = clients.get_cloudfront_client().create_cache_policy(
+            CachePolicyConfig={"Name": "bench", "MinTTL": 1},
+        )["CachePolicy"]["Id"]
+
+        def fresh_client():
+            boto3.client("cloudfront").get_cache_policy(Id=cache_policy_id)
+
+        def pooled_client():
+            clients.get_cloudfront_client().get_cache_policy(Id=cache_policy_id)
+
+        print(f"GetCachePolicy x {args.calls} against {standin.endpoint_url}")
+        print(f"{'client':<10} {'ms/call':>10} {'peak KiB':>10}")
+        for name, call in (("fresh", fresh_client), ("pooled", pooled_client)):
+            per_call, peak = _measure(call, args.calls)
+            print(f"{name:<10} {per_call:>10.2f} {peak:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
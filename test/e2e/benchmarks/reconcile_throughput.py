@@ -0,0 +1,242 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Measures how fast the controller reconciles many CRs of a fast kind, for
+a sweep of max concurrent syncs settings.
+
+For every setting, N CRs are created at once from the resources/*.yaml
+templates. A single watch on the namespace records when each of them first
+becomes ACK.ResourceSynced, so the report shows time-to-synced percentiles
+and overall throughput, plus the CloudFront API calls made meanwhile.
+
+With --helm-release, each setting is applied to the installed controller
+through `helm upgrade --set reconcile.resourceMaxConcurrentSyncs.<Kind>=N`;
+otherwise only the controller's current setting is measured.
+
+For reproducible runs, pass --standin-port to serve the CloudFront stand-in
+from this process and install the controller with `aws.endpoint_url`
+pointing at it (and `aws.allow_unsafe_aws_endpoint_urls=true`). API call
+counts are only available against the stand-in.
+
+Usage:
+    python -m e2e.benchmarks.reconcile_throughput --kind CachePolicy \\
+        --count 200 --concurrency 1,4,16 \\
+        --helm-release ack-cloudfront-controller --standin-port 8080
+"""
+
+import argparse
+import json
+import subprocess
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from acktest.k8s import resource as k8s
+from acktest.resources import random_suffix_name
+from kubernetes import client, watch
+
+from e2e import CRD_GROUP, CRD_VERSION, cr_watch, load_resource
+from e2e.cloudfront_standin import CloudFrontStandIn
+
+DEFAULT_COUNT = 100
+DEFAULT_CONCURRENCY = "1,2,4,8"
+DEFAULT_TIMEOUT_SECONDS = 60 * 15
+CREATE_WORKERS = 16
+RUN_LABEL = "e2e.benchmark/run"
+
+# Maps a kind to its resource template, plural and template replacements
+KINDS = {
+    "CachePolicy": ("cache_policy", "cachepolicies", {
+        "CACHE_POLICY_NAME": "{name}",
+        "CACHE_POLICY_COMMENT": "reconcile throughput benchmark",
+        "MIN_TTL": "1",
+    }),
+    "OriginRequestPolicy": ("origin_request_policy", "originrequestpolicies", {
+        "ORIGIN_REQUEST_POLICY_NAME": "{name}",
+        "ORIGIN_REQUEST_POLICY_COMMENT": "reconcile throughput benchmark",
+    }),
+    "ResponseHeadersPolicy": ("response_headers_policy", "responseheaderspolicies", {
+        "RESPONSE_HEADERS_POLICY_NAME": "{name}",
+        "RESPONSE_HEADERS_POLICY_COMMENT": "reconcile throughput benchmark",
+    }),
+}
+
+
+@dataclass
+class RoundResult:
+    max_concurrent_syncs: Optional[int]
+    count: int
+    synced: int
+    wall_seconds: float
+    # Seconds from each CR's creation to its first ACK.ResourceSynced
+    latencies: List[float] = field(default_factory=list, repr=False)
+    api_calls: Optional[int] = None
+
+    def percentile(self, percent: float) -> float:
+        values = sorted(self.latencies)
+        if not values:
+            return 0.0
+        return values[max(0, min(len(values) - 1, round(percent / 100 * len(values)) - 1))]
+
+
+def set_max_concurrent_syncs(release: str, namespace: str, kind: str, syncs: int):
+    """Applies a max concurrent syncs setting to the installed controller and
+    waits for it to roll out."""
+    subprocess.run(
+        [
+            "helm", "upgrade", release, "--namespace", namespace,
+            "--reuse-values", "--wait",
+            "--set", f"reconcile.resourceMaxConcurrentSyncs.{kind}={syncs}",
+        ],
+        check=True,
+    )
+
+
+def _watch_synced(plural: str, namespace: str, selector: str, synced: Dict[str, float], stop: threading.Event):
+    api = client.CustomObjectsApi(k8s._get_k8s_api_client())
+    while not stop.is_set():
+        # Restarting the watch without a resource version replays the
+        # current objects, so nothing is missed between streams.
+        w = watch.Watch()
+        for event in w.stream(
+            api.list_namespaced_custom_object,
+            CRD_GROUP, CRD_VERSION, namespace, plural,
+            label_selector=selector,
+            timeout_seconds=5,
+        ):
+            cr = event["object"]
+            name = cr["metadata"]["name"]
+            if name not in synced and cr_watch.is_synced(cr):
+                synced[name] = time.monotonic()
+            if stop.is_set():
+                w.stop()
+                break
+
+
+def run_round(
+    kind: str,
+    count: int,
+    namespace: str,
+    timeout_seconds: float,
+    standin: Optional[CloudFrontStandIn],
+    max_concurrent_syncs: Optional[int],
+) -> RoundResult:
+    template, plural, replacements = KINDS[kind]
+    run_id = random_suffix_name("bench", 16)
+    names = [random_suffix_name(f"{run_id}-{i}", 48) for i in range(count)]
+    refs = {
+        name: k8s.CustomResourceReference(CRD_GROUP, CRD_VERSION, plural, name, namespace=namespace)
+        for name in names
+    }
+
+    created: Dict[str, float] = {}
+    synced: Dict[str, float] = {}
+    stop = threading.Event()
+    watcher = threading.Thread(
+        target=_watch_synced,
+        args=(plural, namespace, f"{RUN_LABEL}={run_id}", synced, stop),
+        daemon=True,
+    )
+    watcher.start()
+
+    def create(name: str):
+        data = load_resource(template, additional_replacements={
+            key: value.format(name=name) for key, value in replacements.items()
+        })
+        data["metadata"].setdefault("labels", {})[RUN_LABEL] = run_id
+        created[name] = time.monotonic()
+        k8s.create_custom_resource(refs[name], data)
+
+    calls_before = sum(standin.calls.values()) if standin else None
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=CREATE_WORKERS) as pool:
+        list(pool.map(create, names))
+
+    deadline = start + timeout_seconds
+    while len(synced) < count and time.monotonic() < deadline:
+        time.sleep(0.5)
+    wall_seconds = time.monotonic() - start
+    api_calls = sum(standin.calls.values()) - calls_before if standin else None
+    stop.set()
+    watcher.join()
+
+    with ThreadPoolExecutor(max_workers=CREATE_WORKERS) as pool:
+        list(pool.map(lambda ref: k8s.delete_custom_resource(ref, period_length=1, wait_periods=60), refs.values()))
+
+    return RoundResult(
+        max_concurrent_syncs=max_concurrent_syncs,
+        count=count,
+        synced=len(synced),
+        wall_seconds=wall_seconds,
+        latencies=[synced[name] - created[name] for name in synced],
+        api_calls=api_calls,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kind", choices=sorted(KINDS), default="CachePolicy")
+    parser.add_argument("--count", type=int, default=DEFAULT_COUNT)
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY,
+                        help="comma-separated max concurrent syncs settings to sweep")
+    parser.add_argument("--namespace", default="default")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SECONDS)
+    parser.add_argument("--helm-release", default=None)
+    parser.add_argument("--helm-namespace", default="ack-system")
+    parser.add_argument("--standin-port", type=int, default=None)
+    parser.add_argument("--standin-host", default="0.0.0.0")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    settings = [int(s) for s in args.concurrency.split(",")] if args.helm_release else [None]
+
+    standin = None
+    if args.standin_port is not None:
+        standin = CloudFrontStandIn(host=args.standin_host, port=args.standin_port, seed=args.seed)
+        standin.start()
+
+    results = []
+    try:
+        for syncs in settings:
+            if syncs is not None:
+                set_max_concurrent_syncs(args.helm_release, args.helm_namespace, args.kind, syncs)
+            results.append(run_round(
+                args.kind, args.count, args.namespace, args.timeout, standin, syncs,
+            ))
+    finally:
+        if standin is not None:
+            standin.stop()
+
+    print(f"{args.kind} x {args.count}")
+    print(f"{'syncs':>6} {'synced':>7} {'wall s':>8} {'CR/s':>7} {'p50 s':>7} {'p90 s':>7} {'p99 s':>7} {'API calls':>10}")
+    for r in results:
+        print(
+            f"{r.max_concurrent_syncs or 'current':>6} {r.synced:>7} {r.wall_seconds:>8.1f} "
+            f"{r.synced / r.wall_seconds:>7.2f} {r.percentile(50):>7.1f} "
+            f"{r.percentile(90):>7.1f} {r.percentile(99):>7.1f} "
+            f"{r.api_calls if r.api_calls is not None else 'n/a':>10}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([
+                dict(asdict(r), p50=r.percentile(50), p90=r.percentile(90), p99=r.percentile(99))
+                for r in results
+            ], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
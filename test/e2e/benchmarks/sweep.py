@@ -0,0 +1,151 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Measures how fast `e2e.service_sweep` inventories and deletes leaked
+resources, for a sweep of worker counts.
+
+For every setting, the CloudFront stand-in is filled with N leaked
+resources of each kind, named with an e2e prefix, plus as many resources
+that must be kept. The report shows how long the streaming inventory and
+the sweep took, their throughput and the API calls they made, and checks
+that exactly the leaked resources were deleted.
+
+Usage:
+    python -m e2e.benchmarks.sweep --count 500 --workers 1,8,32
+"""
+
+import argparse
+import os
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from e2e import clients, inventory, service_sweep
+from e2e.cloudfront_standin import CloudFrontStandIn
+
+DEFAULT_COUNT = 200
+DEFAULT_WORKERS = "1,8,32"
+DEFAULT_DEPLOY_SECONDS = 0.5
+CREATE_WORKERS = 16
+LEAKED_PREFIX = "my-cache-policy-"
+KEPT_PREFIX = "keep-"
+
+
+def _create(kind: str, name: str):
+    c = clients.get_cloudfront_client()
+    if kind == "CachePolicy":
+        c.create_cache_policy(CachePolicyConfig={"Name": name, "MinTTL": 1})
+    elif kind == "OriginAccessControl":
+        c.create_origin_access_control(OriginAccessControlConfig={
+            "Name": name, "SigningProtocol": "sigv4", "SigningBehavior": "always",
+            "OriginAccessControlOriginType": "s3",
+        })
+    elif kind == "Function":
+        c.create_function(
+            Name=name, FunctionCode=b"function handler(event) { return event.request; }",
+            FunctionConfig={"Comment": name, "Runtime": "cloudfront-js-2.0"},
+        )
+    elif kind == "Distribution":
+        c.create_distribution(DistributionConfig={
+            "CallerReference": name, "Comment": name, "Enabled": True,
+            "Origins": {"Quantity": 1, "Items": [{"Id": "origin", "DomainName": f"{name}.s3.amazonaws.com"}]},
+            "DefaultCacheBehavior": {"TargetOriginId": "origin", "ViewerProtocolPolicy": "allow-all"},
+        })
+
+
+KINDS = ("CachePolicy", "OriginAccessControl", "Function", "Distribution")
+
+
+def populate(count: int):
+    names = [
+        (kind, f"{prefix}{kind.lower()}-{i}")
+        for kind in KINDS
+        for prefix in (LEAKED_PREFIX, KEPT_PREFIX)
+        for i in range(count)
+    ]
+    with ThreadPoolExecutor(CREATE_WORKERS) as pool:
+        list(pool.map(lambda args: _create(*args), names))
+
+
+def remaining() -> dict:
+    counts = {"leaked": 0, "kept": 0}
+    for item in inventory.stream(KINDS):
+        if service_sweep.matches(item, [LEAKED_PREFIX]):
+            counts["leaked"] += 1
+        elif service_sweep.matches(item, [KEPT_PREFIX]):
+            counts["kept"] += 1
+    return counts
+
+
+def run(standin: CloudFrontStandIn, count: int, workers: int) -> dict:
+    populate(count)
+    standin.reset_counters()
+
+    start = time.perf_counter()
+    dry_run = service_sweep.Sweeper(workers).sweep(
+        service_sweep.find_leaks([LEAKED_PREFIX], 0, KINDS, protected=set()), dry_run=True,
+    )
+    inventory_seconds = time.perf_counter() - start
+    inventory_calls = sum(standin.calls.values())
+
+    standin.reset_counters()
+    start = time.perf_counter()
+    report = service_sweep.Sweeper(workers).sweep(
+        service_sweep.find_leaks([LEAKED_PREFIX], 0, KINDS, protected=set()),
+    )
+    sweep_seconds = time.perf_counter() - start
+    sweep_calls = sum(standin.calls.values())
+
+    left = remaining()
+    assert len(dry_run.results) == count * len(KINDS), len(dry_run.results)
+    assert left == {"leaked": 0, "kept": count * len(KINDS)}, left
+
+    # Delete the kept resources too, so the next setting starts empty
+    service_sweep.Sweeper(32).sweep(service_sweep.find_leaks([KEPT_PREFIX], 0, KINDS, protected=set()))
+    return {
+        "workers": workers,
+        "leaked": len(report.results),
+        "inventory_s": inventory_seconds,
+        "inventory_calls": inventory_calls,
+        "sweep_s": sweep_seconds,
+        "sweep_calls": sweep_calls,
+        "items_per_s": len(report.results) / sweep_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=DEFAULT_COUNT, help="leaked resources per kind")
+    parser.add_argument("--workers", default=DEFAULT_WORKERS, help="comma-separated worker counts")
+    parser.add_argument("--deploy-seconds", type=float, default=DEFAULT_DEPLOY_SECONDS)
+    args = parser.parse_args()
+
+    with CloudFrontStandIn(deploy_seconds=args.deploy_seconds) as standin:
+        os.environ.update(standin.environ())
+        clients.reset()
+
+        print(f"{args.count} leaked and {args.count} kept resources of each of {', '.join(KINDS)}")
+        print(
+            f"{'workers':>8} {'leaked':>7} {'inventory s':>12} {'calls':>6} "
+            f"{'sweep s':>8} {'calls':>6} {'items/s':>8}"
+        )
+        for workers in [int(w) for w in args.workers.split(",")]:
+            r = run(standin, args.count, workers)
+            print(
+                f"{r['workers']:>8} {r['leaked']:>7} {r['inventory_s']:>12.2f} {r['inventory_calls']:>6} "
+                f"{r['sweep_s']:>8.2f} {r['sweep_calls']:>6} {r['items_per_s']:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
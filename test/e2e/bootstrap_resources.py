@@ -15,12 +15,101 @@
 for them.
 """
 
-from dataclasses import dataclass
-from acktest.bootstrapping import Resources
+import logging
+import threading
+
+from dataclasses import dataclass, fields
+from pathlib import Path
+from botocore.exceptions import ClientError
+from acktest.bootstrapping import Bootstrappable, Resources, BootstrapFailureException
 from acktest.bootstrapping.s3 import Bucket
 from acktest.bootstrapping.elbv2 import NetworkLoadBalancer
-from e2e.cloudfront_bootstrap import ConnectionGroup, MultiTenantDistribution
-from e2e import bootstrap_directory
+from e2e.clients import get_client
+from e2e.cloudfront_bootstrap import (
+    ConnectionGroup,
+    DistributionPool,
+    MultiTenantDistribution,
+    HEALTHY,
+    MISSING,
+    BROKEN,
+)
+from e2e import bootstrap_directory, dag, snapshot
+
+BOOTSTRAP_FILE_NAME = snapshot.SNAPSHOT_FILE_NAME
+
+# Maps a resource to the resources that must be bootstrapped before it. The
+# multi-tenant and pooled distributions serve content from the public
+# bucket; nothing else depends on anything, so everything else is
+# bootstrapped concurrently.
+BOOTSTRAP_DEPENDENCIES = {
+    "TenantDistribution": ["PublicBucket"],
+    "DistributionPool": ["PublicBucket"],
+}
+
+
+def bucket_domain_name(bucket: Bucket) -> str:
+    return f"{bucket.name}.s3.amazonaws.com"
+
+
+def _bucket_health(bucket: Bucket) -> str:
+    try:
+        get_client("s3").head_bucket(Bucket=bucket.name)
+    except ClientError as ex:
+        if ex.response["Error"]["Code"] in ("404", "NoSuchBucket"):
+            return MISSING
+        raise
+    return HEALTHY
+
+
+def _load_balancer_health(nlb: NetworkLoadBalancer) -> str:
+    if not nlb.arn:
+        return MISSING
+    try:
+        lbs = get_client("elbv2").describe_load_balancers(
+            LoadBalancerArns=[nlb.arn],
+        )["LoadBalancers"]
+    except ClientError as ex:
+        if ex.response["Error"]["Code"] == "LoadBalancerNotFound":
+            return MISSING
+        raise
+    if not lbs:
+        return MISSING
+    if lbs[0]["State"]["Code"] not in ("active", "provisioning"):
+        return BROKEN
+    return HEALTHY
+
+
+# Health checks for the acktest bootstrappables. The CloudFront ones in
+# e2e.cloudfront_bootstrap implement a `health()` method instead.
+HEALTH_CHECKS = {
+    Bucket: _bucket_health,
+    NetworkLoadBalancer: _load_balancer_health,
+}
+
+
+def _health(resource: Bootstrappable) -> str:
+    if hasattr(resource, "health"):
+        return resource.health()
+    return HEALTH_CHECKS[type(resource)](resource)
+
+
+class CleanupFailureException(Exception):
+    """Raised when one or more resources failed to clean up. Carries the
+    error of every failed resource, keyed by resource name, and the names of
+    the resources that were cleaned up."""
+
+    def __init__(self, errors: dict, cleaned: list = ()):
+        self.errors = errors
+        self.cleaned = list(cleaned)
+        report = "\n".join(
+            f"  {name}: {type(error).__name__}: {error}"
+            for name, error in errors.items()
+        )
+        super().__init__(f"Failed to clean up {len(errors)} resource(s):\n{report}")
+
+
+_checkpoint_lock = threading.Lock()
+
 
 @dataclass
 class BootstrapResources(Resources):
@@ -28,11 +117,232 @@ class BootstrapResources(Resources):
     NetworkLoadBalancer: NetworkLoadBalancer
     TenantConnectionGroup: ConnectionGroup
     TenantDistribution: MultiTenantDistribution
-    
+    # None in the snapshots of bootstraps from before the pool existed
+    DistributionPool: DistributionPool = None
+
+    # Not dataclass fields, so that they are not mistaken for resources.
+    # `bootstrapped` lists the resources that finished bootstrapping; None
+    # means all of them (snapshots only used to be written on success).
+    bootstrapped = None
+    _checkpoint_path = None
+
+    @property
+    def complete(self) -> bool:
+        return self.bootstrapped is None or set(self.bootstrapped) >= set(self.bootstrappables())
+
+    def enable_checkpoints(self, directory: Path, file_name: str = BOOTSTRAP_FILE_NAME):
+        """Makes bootstrap() write the snapshot to `directory` whenever a
+        resource is created or finishes bootstrapping, instead of only once
+        at the end."""
+        self._checkpoint_path = Path(directory) / file_name
+
+    def checkpoint(self):
+        """Atomically writes the current state of every resource to the
+        checkpoint file, if checkpoints are enabled."""
+        if self._checkpoint_path is None:
+            return
+        with _checkpoint_lock:
+            snapshot.write(self, self._checkpoint_path.parent, self._checkpoint_path.name)
+
+    def serialize(self, output_path: Path, bootstrap_file_name: str = BOOTSTRAP_FILE_NAME):
+        """Writes the versioned JSON snapshot of the resources."""
+        snapshot.write(self, output_path, bootstrap_file_name)
+
+    @classmethod
+    def deserialize(cls, input_path: Path, bootstrap_file_name: str = BOOTSTRAP_FILE_NAME):
+        """Reads the resources back from their snapshot, converting a
+        bootstrap.pkl written by a previous version if needed."""
+        return snapshot.Snapshot.load(input_path, bootstrap_file_name).materialize(cls)
+
+    def _bootstrap_one(self, name: str, resource: Bootstrappable):
+        resource.bootstrap()
+        with _checkpoint_lock:
+            self.bootstrapped = sorted(set(self.bootstrapped or []) | {name})
+        self.checkpoint()
+
+    def bootstrappables(self):
+        return {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if isinstance(getattr(self, f.name), Bootstrappable)
+        }
+
+    def bootstrap(self, names=None):
+        """Bootstraps every resource as soon as its dependencies are ready,
+        running independent resources concurrently.
+
+        If `names` is given, only those resources are bootstrapped and the
+        others are assumed to be ready.
+
+        Raises:
+            BootstrapFailureException: If any of the resources failed to
+                bootstrap. The resources that started bootstrapping are
+                cleaned up; the checkpoint is kept while it records any
+                other resource, or any resource that failed to clean up.
+        """
+        resources = {
+            name: resource
+            for name, resource in self.bootstrappables().items()
+            if names is None or name in names
+        }
+        if self.bootstrapped is None:
+            self.bootstrapped = [n for n in self.bootstrappables() if n not in resources]
+        for resource in resources.values():
+            if hasattr(resource, "set_checkpoint"):
+                resource.set_checkpoint(self.checkpoint)
+        self.checkpoint()
+
+        results = dag.run(
+            {
+                name: (lambda name=name, resource=resource: self._bootstrap_one(name, resource))
+                for name, resource in resources.items()
+            },
+            BOOTSTRAP_DEPENDENCIES,
+            logger_name="e2e.bootstrap",
+        )
+        for result in sorted(results.values(), key=lambda r: -r.seconds):
+            logging.info(f"Bootstrap {result.name}: {result.seconds:.1f}s")
+
+        failed = [r.name for r in results.values() if not r.ok]
+        if failed:
+            # Failed resources may have been partially created, so clean up
+            # everything that started.
+            started = [name for name, result in results.items() if result.started_at is not None]
+            try:
+                self._cleanup({name: resources[name] for name in started})
+            except CleanupFailureException as ex:
+                # Keep the checkpoint so that service_cleanup can retry, but
+                # stop recording the resources that are gone as
+                # bootstrapped, so that a resume creates them again.
+                logging.error(str(ex))
+                self.bootstrapped = [n for n in self.bootstrapped if n not in ex.cleaned]
+                self.checkpoint()
+            else:
+                self.bootstrapped = [n for n in self.bootstrapped if n not in started]
+                if self.bootstrapped:
+                    # Resources bootstrapped by an earlier run, or reused,
+                    # are only recorded in the checkpoint. Keep it, so that
+                    # the next run resumes with them.
+                    self.checkpoint()
+                elif self._checkpoint_path is not None:
+                    self._checkpoint_path.unlink(missing_ok=True)
+            raise BootstrapFailureException(f"Failed to bootstrap {', '.join(failed)}")
+
+    def resume(self):
+        """Finishes an interrupted bootstrap.
+
+        CloudFront resources that were created before the interruption are
+        waited on instead of being created again.
+        """
+        pending = [n for n in self.bootstrappables() if n not in self.bootstrapped]
+        logging.info(f"Resuming bootstrap of {', '.join(pending)}")
+        self.bootstrap(names=pending)
+
+    def check_health(self) -> dict:
+        """Checks every resource against the AWS APIs, concurrently.
+
+        Returns:
+            HEALTHY, MISSING or BROKEN for every resource, keyed by name
+        """
+        health = {}
+
+        def check(name, resource):
+            try:
+                health[name] = _health(resource)
+            except Exception as ex:
+                logging.warning(f"Health check of {name} failed: {ex}")
+                health[name] = BROKEN
+
+        dag.run(
+            {
+                name: (lambda name=name, resource=resource: check(name, resource))
+                for name, resource in self.bootstrappables().items()
+            },
+            logger_name="e2e.health",
+        )
+        return health
+
+    def bootstrap_reusing(self, previous: "BootstrapResources"):
+        """Bootstraps the resources, reusing the healthy ones from a previous
+        bootstrap instead of creating them again.
+
+        Missing or broken resources are recreated, along with everything
+        that depends on them. The previous ones are cleaned up first, while
+        the previous snapshot still records them.
+
+        Raises:
+            BootstrapFailureException: If any replaced resource failed to
+                clean up, in which case the previous snapshot is left as is,
+                or if any recreated resource failed to bootstrap.
+        """
+        health = previous.check_health()
+        for name, status in sorted(health.items()):
+            logging.info(f"Previously bootstrapped {name}: {status}")
+
+        # Resources that the previous bootstrap did not have count as missing
+        stale = {name for name in self.bootstrappables() if health.get(name, MISSING) != HEALTHY}
+        changed = True
+        while changed:
+            changed = False
+            for name, deps in BOOTSTRAP_DEPENDENCIES.items():
+                if name not in stale and stale.intersection(deps):
+                    logging.info(f"Recreating {name} along with its dependencies")
+                    stale.add(name)
+                    changed = True
+
+        leftovers = previous.bootstrappables()
+        try:
+            previous._cleanup({
+                name: leftovers[name] for name in stale if health.get(name, MISSING) != MISSING
+            })
+        except CleanupFailureException as ex:
+            logging.error(str(ex))
+            raise BootstrapFailureException("Failed to clean up the replaced resources")
+
+        for name in self.bootstrappables():
+            if name not in stale:
+                setattr(self, name, getattr(previous, name))
+        # Recreated distributions must serve from the bucket in use, which
+        # may be the reused one.
+        self.TenantDistribution.bucket_domain_name = bucket_domain_name(self.PublicBucket)
+        if self.DistributionPool is not None:
+            self.DistributionPool.bucket_domain_name = bucket_domain_name(self.PublicBucket)
+        # Reused resources stay recorded in the checkpoint if this fails
+        self.bootstrap(names=stale)
+
+    def cleanup(self):
+        """Cleans up every resource concurrently, in reverse dependency
+        order, e.g. the bucket is only deleted once the distribution that
+        serves from it is gone.
+
+        Resources that must be disabled before deletion all start disabling
+        right away, and each is deleted as soon as its own disable deploys.
+
+        Raises:
+            CleanupFailureException: If any of the resources failed to clean
+                up, with the errors of all of them.
+        """
+        self._cleanup(self.bootstrappables())
+
+    def _cleanup(self, resources: dict):
+        results = dag.run(
+            {name: resource.cleanup for name, resource in resources.items()},
+            dag.reverse(BOOTSTRAP_DEPENDENCIES),
+            logger_name="e2e.cleanup",
+        )
+        errors = {name: r.error for name, r in results.items() if r.error is not None}
+        if errors:
+            raise CleanupFailureException(
+                errors, [name for name, r in results.items() if r.ok],
+            )
+
 
 _bootstrap_resources = None
 
-def get_bootstrap_resources(bootstrap_file_name: str = "bootstrap.pkl") -> BootstrapResources:
+def get_bootstrap_resources(bootstrap_file_name: str = BOOTSTRAP_FILE_NAME) -> BootstrapResources:
+    """Returns the bootstrapped resources as objects. Tests that only read
+    their outputs should use `e2e.snapshot.get_bootstrap_snapshot` instead,
+    which does not import the bootstrapping stack."""
     global _bootstrap_resources
     if _bootstrap_resources is None:
         _bootstrap_resources = BootstrapResources.deserialize(bootstrap_directory, bootstrap_file_name=bootstrap_file_name)
@@ -13,23 +13,22 @@
 
 """Utilities for working with CachePolicy resources"""
 
-import datetime
-import time
-
-import boto3
-import pytest
+from e2e import waiter
+from e2e.clients import get_cloudfront_client
 
 DEFAULT_WAIT_UNTIL_EXISTS_TIMEOUT_SECONDS = 60*10
 DEFAULT_WAIT_UNTIL_EXISTS_INTERVAL_SECONDS = 15
 DEFAULT_WAIT_UNTIL_DELETED_TIMEOUT_SECONDS = 60*10
 DEFAULT_WAIT_UNTIL_DELETED_INTERVAL_SECONDS = 15
+DEFAULT_WAIT_UNTIL_CHANGED_TIMEOUT_SECONDS = 60*5
+DEFAULT_WAIT_UNTIL_CHANGED_INTERVAL_SECONDS = 5
 
 
 def wait_until_exists(
         cache_policy_id: str,
         timeout_seconds: int = DEFAULT_WAIT_UNTIL_EXISTS_TIMEOUT_SECONDS,
         interval_seconds: int = DEFAULT_WAIT_UNTIL_EXISTS_INTERVAL_SECONDS,
-    ) -> None:
+    ) -> waiter.WaitResult:
     """Waits until a CachePolicy with a supplied name is returned from
     CloudFront GetCachePolicy API.
 
@@ -38,30 +37,25 @@ def wait_until_exists(
 
         wait_until_exists(cache_policy_id)
 
+    Returns:
+        a WaitResult with the number of polls and the seconds waited
+
     Raises:
         pytest.fail upon timeout
     """
-    now = datetime.datetime.now()
-    timeout = now + datetime.timedelta(seconds=timeout_seconds)
-
-    while True:
-        if datetime.datetime.now() >= timeout:
-            pytest.fail(
-                "Timed out waiting for CachePolicy to exist "
-                "in CloudFront API"
-            )
-        time.sleep(interval_seconds)
-
-        latest = get(cache_policy_id)
-        if latest is not None:
-            break
+    return waiter.wait_until_exists(
+        lambda: get(cache_policy_id),
+        "CachePolicy",
+        timeout_seconds=timeout_seconds,
+        max_interval_seconds=interval_seconds,
+    )
 
 
 def wait_until_deleted(
         cache_policy_id: str,
         timeout_seconds: int = DEFAULT_WAIT_UNTIL_DELETED_TIMEOUT_SECONDS,
         interval_seconds: int = DEFAULT_WAIT_UNTIL_DELETED_INTERVAL_SECONDS,
-    ) -> None:
+    ) -> waiter.WaitResult:
     """Waits until a CachePolicy with a supplied ID is no longer returned from
     the CloudFront API.
 
@@ -70,23 +64,48 @@ def wait_until_deleted(
 
         wait_until_deleted(cache_policy_id)
 
+    Returns:
+        a WaitResult with the number of polls and the seconds waited
+
     Raises:
         pytest.fail upon timeout
     """
-    now = datetime.datetime.now()
-    timeout = now + datetime.timedelta(seconds=timeout_seconds)
+    return waiter.wait_until_deleted(
+        lambda: get(cache_policy_id),
+        "CachePolicy",
+        timeout_seconds=timeout_seconds,
+        max_interval_seconds=interval_seconds,
+    )
+
+
+def wait_until_changed(
+        cache_policy_id: str,
+        since_etag: str,
+        timeout_seconds: int = DEFAULT_WAIT_UNTIL_CHANGED_TIMEOUT_SECONDS,
+        interval_seconds: int = DEFAULT_WAIT_UNTIL_CHANGED_INTERVAL_SECONDS,
+    ) -> waiter.WaitResult:
+    """Waits until the CloudFront API returns a version of a CachePolicy
+    other than `since_etag`, i.e. until an update has been applied.
+
+    Usage:
+        from e2e.cache_policy import wait_until_changed
+
+        wait_until_changed(cache_policy_id, latest['ETag'])
 
-    while True:
-        if datetime.datetime.now() >= timeout:
-            pytest.fail(
-                "Timed out waiting for CachePolicy to be "
-                "deleted in CloudFront API"
-            )
-        time.sleep(interval_seconds)
+    Returns:
+        a WaitResult with the new record, the number of polls and the
+        seconds waited
 
-        latest = get(cache_policy_id)
-        if latest is None:
-            break
+    Raises:
+        pytest.fail upon timeout
+    """
+    return waiter.wait_until_changed(
+        lambda: get(cache_policy_id),
+        "CachePolicy",
+        since_etag,
+        timeout_seconds=timeout_seconds,
+        max_interval_seconds=interval_seconds,
+    )
 
 
 def get(cache_policy_id):
@@ -95,9 +114,11 @@ def get(cache_policy_id):
 
     If no such CachePolicy exists, returns None.
     """
-    c = boto3.client('cloudfront')
+    c = get_cloudfront_client()
     try:
         resp = c.get_cache_policy(Id=cache_policy_id)
-        return resp['CachePolicy']
+        record = resp['CachePolicy']
+        record['ETag'] = resp['ETag']
+        return record
     except c.exceptions.NoSuchCachePolicy:
         return None
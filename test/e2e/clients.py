@@ -0,0 +1,135 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Process-wide cache of pooled boto3 clients for the e2e helpers.
+
+Building a boto3 client loads and parses the service model and creates a new
+HTTP connection pool. The helpers in this package poll CloudFront many times
+per test, so they share one client per (service, region, endpoint) instead.
+botocore clients are thread-safe once created; creation itself is serialized
+because boto3 sessions are not.
+
+Usage:
+    from e2e.clients import get_cloudfront_client
+
+    c = get_cloudfront_client()
+    c.get_distribution(Id=distribution_id)
+"""
+
+import os
+import threading
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+import boto3
+from botocore.client import BaseClient
+from botocore.config import Config
+
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+DEFAULT_MAX_ATTEMPTS = 10
+
+CLIENT_CONFIG = Config(
+    max_pool_connections=DEFAULT_MAX_POOL_CONNECTIONS,
+    retries={"mode": "adaptive", "max_attempts": DEFAULT_MAX_ATTEMPTS},
+    tcp_keepalive=True,
+)
+
+_lock = threading.Lock()
+_session: Optional[boto3.session.Session] = None
+_clients: Dict[Tuple, BaseClient] = {}
+# Registered hooks, with whether their handlers may block
+_client_hooks: List[Tuple[Callable[[BaseClient], None], bool]] = []
+
+
+def _endpoint_override(service_name: str) -> Optional[str]:
+    service_key = service_name.upper().replace("-", "_")
+    return (
+        os.environ.get(f"AWS_ENDPOINT_URL_{service_key}")
+        or os.environ.get("AWS_ENDPOINT_URL")
+    )
+
+
+def get_session() -> boto3.session.Session:
+    """Returns the boto3 session shared by every client in this process."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = boto3.session.Session()
+        return _session
+
+
+def get_client(service_name: str, region_name: Optional[str] = None) -> BaseClient:
+    """Returns the shared client for a service, creating it on first use.
+
+    Clients are keyed by the configured endpoint as well, so pointing the
+    process at a different endpoint (e.g. the CloudFront stand-in) through
+    `AWS_ENDPOINT_URL_<SERVICE>` yields a fresh client.
+    """
+    key = (os.getpid(), service_name, region_name, _endpoint_override(service_name))
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    session = get_session()
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = session.client(
+                service_name,
+                region_name=region_name,
+                config=CLIENT_CONFIG,
+            )
+            for hook, _ in _client_hooks:
+                hook(client)
+            _clients[key] = client
+    return client
+
+
+def get_cloudfront_client() -> BaseClient:
+    """Returns the shared CloudFront client."""
+    return get_client("cloudfront")
+
+
+def register_client_hook(hook: Callable[[BaseClient], None], blocking: bool = False):
+    """Registers a function that is called with every client this module
+    creates, including the ones that already exist.
+
+    Hooks typically register handlers on `client.meta.events`. Hooks whose
+    handlers may block the calling thread, e.g. to sleep, must pass
+    `blocking`, and are not applied to asyncio clients.
+    """
+    with _lock:
+        _client_hooks.append((hook, blocking))
+        existing = list(_clients.values())
+    for client in existing:
+        hook(client)
+
+
+def apply_async_client_hooks(client):
+    """Applies the registered non-blocking hooks to an aiobotocore client,
+    which shares the events of a botocore client but runs its handlers on
+    the event loop."""
+    with _lock:
+        hooks = [hook for hook, blocking in _client_hooks if not blocking]
+    for hook in hooks:
+        hook(client)
+
+
+def reset():
+    """Drops every cached client and the shared session."""
+    global _session
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        _session = None
@@ -11,42 +11,79 @@
 # express or implied. See the License for the specific language governing
 # permissions and limitations under the License.
 
-"""Bootstrappable CloudFront resources for distribution tenant e2e tests.
+"""Bootstrappable CloudFront resources for distribution tenant and
+distribution update e2e tests.
 
 These resources are created once during bootstrap and reused across test runs,
-avoiding the 10+ minute setup/teardown for connection groups and multi-tenant
+avoiding the 10+ minute setup/teardown for connection groups and
 distributions on every test invocation.
 """
 
 import logging
-import time
-import boto3
+import threading
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from acktest.bootstrapping import Bootstrappable
 from acktest import resources
 
+from e2e import managed_policies, waiter
+from e2e.clients import get_cloudfront_client
+
 
 WAIT_INTERVAL_SECONDS = 15
 WAIT_TIMEOUT_SECONDS = 60 * 15
 
+DEFAULT_POOL_SIZE = 2
+POOL_COMMENT = "Pooled distribution for update tests"
+POOL_ORIGIN_ID = "pool-origin"
+# Tags every pooled distribution, and is kept when a lease is returned
+POOL_TAG_KEY = "e2e.pool"
+
+_pool_lock = threading.Lock()
+
+# Results of a bootstrapped resource's health check
+HEALTHY = "healthy"
+MISSING = "missing"
+BROKEN = "broken"
+
+
+class Checkpointing:
+    """Lets a bootstrappable persist its outputs the moment they exist, so
+    that an interrupted bootstrap can be resumed instead of leaking them.
+
+    The owner of the bootstrappable sets the checkpoint function, which is
+    not serialized along with the resource.
+    """
+
+    _checkpoint_fn = None
+
+    def set_checkpoint(self, checkpoint_fn):
+        self._checkpoint_fn = checkpoint_fn
+
+    def checkpoint(self):
+        if self._checkpoint_fn is not None:
+            self._checkpoint_fn()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_checkpoint_fn", None)
+        return state
+
 
 def _wait_until_deployed(describe_fn, resource_type):
     """Polls a describe function until the resource status is 'Deployed'."""
-    deadline = time.time() + WAIT_TIMEOUT_SECONDS
-    while time.time() < deadline:
-        resp = describe_fn()
-        status = resp.get("Status", "")
-        if status == "Deployed":
-            logging.info(f"{resource_type} reached Deployed status")
-            return resp
-        logging.info(f"Waiting for {resource_type} to deploy (status: {status})")
-        time.sleep(WAIT_INTERVAL_SECONDS)
-    raise Exception(f"Timed out waiting for {resource_type} to reach Deployed status")
+    return waiter.wait_for(
+        describe_fn,
+        lambda resp: resp.get("Status", "") == "Deployed",
+        f"{resource_type} to reach Deployed status",
+        timeout_seconds=WAIT_TIMEOUT_SECONDS,
+        max_interval_seconds=WAIT_INTERVAL_SECONDS,
+    ).value
 
 
 @dataclass
-class ConnectionGroup(Bootstrappable):
+class ConnectionGroup(Checkpointing, Bootstrappable):
     # Inputs
     name_prefix: str
 
@@ -56,11 +93,40 @@ class ConnectionGroup(Bootstrappable):
 
     @property
     def cf_client(self):
-        return boto3.client("cloudfront")
+        return get_cloudfront_client()
 
     def bootstrap(self):
+        """Creates the connection group and waits for it to deploy.
+
+        If the connection group was already created by an interrupted
+        bootstrap, only waits for it to deploy. A broken one, e.g. disabled,
+        is cleaned up and created again.
+        """
         super().bootstrap()
 
+        health = self.health()
+        if health == HEALTHY:
+            logging.info(
+                f"Resuming in-flight ConnectionGroup: {self.connection_group_id}"
+            )
+        else:
+            if health == BROKEN:
+                # e.g. disabled by an interrupted cleanup
+                logging.info(f"Replacing broken ConnectionGroup: {self.connection_group_id}")
+                self.cleanup()
+            self._create()
+            self.checkpoint()
+
+        _wait_until_deployed(
+            lambda: self._get()["ConnectionGroup"],
+            f"ConnectionGroup {self.name}",
+        )
+
+        logging.info(
+            f"ConnectionGroup bootstrapped: id={self.connection_group_id}"
+        )
+
+    def _create(self):
         self.name = resources.random_suffix_name(self.name_prefix, 63)
         logging.info(f"Creating ConnectionGroup: {self.name}")
 
@@ -74,50 +140,72 @@ class ConnectionGroup(Bootstrappable):
         self.connection_group_id = cg["Id"]
         self.arn = cg["Arn"]
 
+    def _get(self):
+        return self.cf_client.get_connection_group(
+            Identifier=self.connection_group_id
+        )
+
+    def health(self) -> str:
+        """Checks whether a previously bootstrapped connection group can be
+        reused: it must still exist and be enabled."""
+        if not self.connection_group_id:
+            return MISSING
+        try:
+            cg = self._get()["ConnectionGroup"]
+        except self.cf_client.exceptions.EntityNotFound:
+            return MISSING
+        if not cg["Enabled"] or cg["Status"] not in ("Deployed", "InProgress"):
+            return BROKEN
+        return HEALTHY
+
+    def disable(self):
+        """Starts disabling the connection group, which CloudFront requires
+        before it can be deleted. Does not wait for the change to deploy."""
+        resp = self._get()
+        if not resp["ConnectionGroup"]["Enabled"]:
+            return
+        logging.info(f"Disabling ConnectionGroup: {self.connection_group_id}")
+        self.cf_client.update_connection_group(
+            Id=self.connection_group_id,
+            Enabled=False,
+            IfMatch=resp["ETag"],
+        )
+
+    def wait_until_disabled(self):
         _wait_until_deployed(
-            lambda: self.cf_client.get_connection_group(
-                Identifier=self.connection_group_id
-            )["ConnectionGroup"],
-            f"ConnectionGroup {self.name}",
+            lambda: self._get()["ConnectionGroup"],
+            f"ConnectionGroup {self.connection_group_id} (disable)",
         )
 
-        logging.info(
-            f"ConnectionGroup bootstrapped: id={self.connection_group_id}"
+    def delete(self):
+        self.cf_client.delete_connection_group(
+            Id=self.connection_group_id,
+            IfMatch=self._get()["ETag"],
         )
 
     def cleanup(self):
+        """Disables, then deletes, the connection group.
+
+        Errors are raised so that the caller can report them.
+        """
         if self.connection_group_id:
             logging.info(
                 f"Cleaning up ConnectionGroup: {self.connection_group_id}"
             )
             try:
-                # Disable before delete
-                self.cf_client.update_connection_group(
-                    Identifier=self.connection_group_id,
-                    Enabled=False,
-                    IfMatch="*",
-                )
-                _wait_until_deployed(
-                    lambda: self.cf_client.get_connection_group(
-                        Identifier=self.connection_group_id
-                    )["ConnectionGroup"],
-                    f"ConnectionGroup {self.connection_group_id} (disable)",
-                )
-                self.cf_client.delete_connection_group(
-                    Identifier=self.connection_group_id,
-                    IfMatch="*",
-                )
-            except Exception as ex:
-                logging.error(
-                    f"Error cleaning up ConnectionGroup "
-                    f"{self.connection_group_id}: {ex}"
+                self.disable()
+                self.wait_until_disabled()
+                self.delete()
+            except self.cf_client.exceptions.EntityNotFound:
+                logging.info(
+                    f"ConnectionGroup {self.connection_group_id} already deleted"
                 )
 
         super().cleanup()
 
 
 @dataclass
-class MultiTenantDistribution(Bootstrappable):
+class MultiTenantDistribution(Checkpointing, Bootstrappable):
     # Inputs
     name_prefix: str
     bucket_domain_name: str
@@ -129,21 +217,44 @@ class MultiTenantDistribution(Bootstrappable):
 
     @property
     def cf_client(self):
-        return boto3.client("cloudfront")
-
-    def _get_caching_optimized_policy_id(self):
-        resp = self.cf_client.list_cache_policies(Type="managed")
-        for item in resp["CachePolicyList"]["Items"]:
-            if item["CachePolicy"]["CachePolicyConfig"]["Name"] == "Managed-CachingOptimized":
-                return item["CachePolicy"]["Id"]
-        raise Exception("Managed-CachingOptimized cache policy not found")
+        return get_cloudfront_client()
 
     def bootstrap(self):
+        """Creates the distribution and waits for it to deploy.
+
+        If the distribution was already created by an interrupted bootstrap,
+        only waits for it to deploy. A broken one, e.g. disabled, is cleaned
+        up and created again.
+        """
         super().bootstrap()
 
+        health = self.health()
+        if health == HEALTHY:
+            logging.info(
+                f"Resuming in-flight Distribution: {self.distribution_id}"
+            )
+        else:
+            if health == BROKEN:
+                # e.g. disabled by an interrupted cleanup
+                logging.info(f"Replacing broken Distribution: {self.distribution_id}")
+                self.cleanup()
+            self._create()
+            self.checkpoint()
+
+        _wait_until_deployed(
+            lambda: self.cf_client.get_distribution(Id=self.distribution_id)["Distribution"],
+            f"Distribution {self.name}",
+        )
+
+        logging.info(
+            f"Multi-tenant Distribution bootstrapped: "
+            f"id={self.distribution_id}, domain={self.domain_name}"
+        )
+
+    def _create(self):
         self.name = resources.random_suffix_name(self.name_prefix, 63)
         origin_id = resources.random_suffix_name("origin", 32)
-        cache_policy_id = self._get_caching_optimized_policy_id()
+        cache_policy_id = managed_policies.cache_policy_id("Managed-CachingOptimized")
 
         logging.info(f"Creating multi-tenant Distribution: {self.name}")
 
@@ -178,57 +289,202 @@ class MultiTenantDistribution(Bootstrappable):
         self.domain_name = dist["DomainName"]
         self.arn = dist["ARN"]
 
+    def health(self) -> str:
+        """Checks whether a previously bootstrapped distribution can be
+        reused: it must still exist, be enabled and accept tenants."""
+        if not self.distribution_id:
+            return MISSING
+        try:
+            dist = self.cf_client.get_distribution(
+                Id=self.distribution_id
+            )["Distribution"]
+        except self.cf_client.exceptions.NoSuchDistribution:
+            return MISSING
+        config = dist["DistributionConfig"]
+        if not config.get("Enabled", False) or config.get("ConnectionMode") != "tenant-only":
+            return BROKEN
+        return HEALTHY
+
+    def disable(self):
+        """Starts disabling the distribution, which CloudFront requires
+        before it can be deleted. Does not wait for the change to deploy."""
+        resp = self.cf_client.get_distribution_config(Id=self.distribution_id)
+        config = resp["DistributionConfig"]
+        if not config.get("Enabled", False):
+            return
+        logging.info(f"Disabling Distribution: {self.distribution_id}")
+        config["Enabled"] = False
+        self.cf_client.update_distribution(
+            Id=self.distribution_id,
+            DistributionConfig=config,
+            IfMatch=resp["ETag"],
+        )
+
+    def wait_until_disabled(self):
         _wait_until_deployed(
-            lambda: self.cf_client.get_distribution(Id=self.distribution_id)["Distribution"],
-            f"Distribution {self.name}",
+            lambda: self.cf_client.get_distribution(
+                Id=self.distribution_id
+            )["Distribution"],
+            f"Distribution {self.distribution_id} (disable)",
         )
 
-        logging.info(
-            f"Multi-tenant Distribution bootstrapped: "
-            f"id={self.distribution_id}, domain={self.domain_name}"
+    def delete(self):
+        # Re-fetch the ETag, which changes with every update
+        resp = self.cf_client.get_distribution_config(Id=self.distribution_id)
+        self.cf_client.delete_distribution(
+            Id=self.distribution_id,
+            IfMatch=resp["ETag"],
         )
 
     def cleanup(self):
+        """Disables, then deletes, the distribution.
+
+        Errors are raised so that the caller can report them.
+        """
         if self.distribution_id:
             logging.info(
                 f"Cleaning up Distribution: {self.distribution_id}"
             )
             try:
-                # Get current ETag
-                resp = self.cf_client.get_distribution_config(
-                    Id=self.distribution_id
-                )
-                etag = resp["ETag"]
-                config = resp["DistributionConfig"]
-
-                # Disable if enabled
-                if config.get("Enabled", False):
-                    config["Enabled"] = False
-                    self.cf_client.update_distribution(
-                        Id=self.distribution_id,
-                        DistributionConfig=config,
-                        IfMatch=etag,
-                    )
-                    _wait_until_deployed(
-                        lambda: self.cf_client.get_distribution(
-                            Id=self.distribution_id
-                        )["Distribution"],
-                        f"Distribution {self.distribution_id} (disable)",
-                    )
-                    # Re-fetch ETag after update
-                    resp = self.cf_client.get_distribution_config(
-                        Id=self.distribution_id
-                    )
-                    etag = resp["ETag"]
-
-                self.cf_client.delete_distribution(
-                    Id=self.distribution_id,
-                    IfMatch=etag,
+                self.disable()
+                self.wait_until_disabled()
+                self.delete()
+            except self.cf_client.exceptions.NoSuchDistribution:
+                logging.info(
+                    f"Distribution {self.distribution_id} already deleted"
                 )
-            except Exception as ex:
-                logging.error(
-                    f"Error cleaning up Distribution "
-                    f"{self.distribution_id}: {ex}"
+
+        super().cleanup()
+
+
+def pooled_distribution_config(caller_reference: str, bucket_domain_name: str) -> dict:
+    """Returns the baseline config of a pooled distribution, which it is
+    created with and returned to after every lease."""
+    return {
+        "CallerReference": caller_reference,
+        "Comment": POOL_COMMENT,
+        "Enabled": False,
+        "DefaultCacheBehavior": {
+            "TargetOriginId": POOL_ORIGIN_ID,
+            "ViewerProtocolPolicy": "allow-all",
+            "CachePolicyId": managed_policies.cache_policy_id("Managed-CachingOptimized"),
+        },
+        "Origins": {
+            "Quantity": 1,
+            "Items": [
+                {
+                    "Id": POOL_ORIGIN_ID,
+                    "DomainName": bucket_domain_name,
+                    "S3OriginConfig": {
+                        "OriginAccessIdentity": "",
+                    },
+                },
+            ],
+        },
+    }
+
+
+@dataclass
+class DistributionPool(Checkpointing, Bootstrappable):
+    """Disabled, deployed distributions that update tests lease through
+    resource adoption instead of creating their own; see
+    `e2e.distribution_pool`."""
+
+    # Inputs
+    name_prefix: str
+    bucket_domain_name: str
+    size: int = DEFAULT_POOL_SIZE
+
+    # Outputs
+    distribution_ids: list = field(init=False, default_factory=list)
+
+    @property
+    def cf_client(self):
+        return get_cloudfront_client()
+
+    def bootstrap(self):
+        """Creates the distributions concurrently and waits for them to
+        deploy.
+
+        Distributions created by an interrupted bootstrap that still exist
+        are kept, and only the missing ones are created.
+        """
+        super().bootstrap()
+
+        self.distribution_ids = [i for i in self.distribution_ids if self._exists(i)]
+        missing = self.size - len(self.distribution_ids)
+        if missing > 0:
+            logging.info(f"Creating {missing} pooled Distributions")
+        with ThreadPoolExecutor(max_workers=max(1, self.size)) as pool:
+            list(pool.map(lambda _: self._create(), range(missing)))
+            list(pool.map(self._wait_until_deployed, list(self.distribution_ids)))
+
+        logging.info(
+            f"Distribution pool bootstrapped: ids={', '.join(self.distribution_ids)}"
+        )
+
+    def _create(self):
+        name = resources.random_suffix_name(self.name_prefix, 63)
+        resp = self.cf_client.create_distribution_with_tags(
+            DistributionConfigWithTags={
+                "DistributionConfig": pooled_distribution_config(name, self.bucket_domain_name),
+                "Tags": {"Items": [{"Key": POOL_TAG_KEY, "Value": self.name_prefix}]},
+            },
+        )
+        with _pool_lock:
+            self.distribution_ids.append(resp["Distribution"]["Id"])
+        self.checkpoint()
+
+    def _exists(self, distribution_id: str) -> bool:
+        try:
+            self.cf_client.get_distribution(Id=distribution_id)
+        except self.cf_client.exceptions.NoSuchDistribution:
+            return False
+        return True
+
+    def _wait_until_deployed(self, distribution_id: str):
+        _wait_until_deployed(
+            lambda: self.cf_client.get_distribution(Id=distribution_id)["Distribution"],
+            f"pooled Distribution {distribution_id}",
+        )
+
+    def health(self) -> str:
+        """Checks whether a previously bootstrapped pool can be reused: all
+        of its distributions must still exist."""
+        if len(self.distribution_ids) < self.size:
+            return MISSING
+        if not all(self._exists(i) for i in self.distribution_ids):
+            return BROKEN
+        return HEALTHY
+
+    def _cleanup_one(self, distribution_id: str):
+        try:
+            resp = self.cf_client.get_distribution_config(Id=distribution_id)
+            config = resp["DistributionConfig"]
+            if config.get("Enabled", False):
+                config["Enabled"] = False
+                self.cf_client.update_distribution(
+                    Id=distribution_id, DistributionConfig=config, IfMatch=resp["ETag"],
                 )
+            self._wait_until_deployed(distribution_id)
+            self.cf_client.delete_distribution(
+                Id=distribution_id,
+                IfMatch=self.cf_client.get_distribution_config(Id=distribution_id)["ETag"],
+            )
+        except self.cf_client.exceptions.NoSuchDistribution:
+            logging.info(f"Distribution {distribution_id} already deleted")
+
+    def cleanup(self):
+        """Disables, if a lease left them enabled, then deletes the
+        distributions, concurrently.
+
+        Errors are raised so that the caller can report them.
+        """
+        if self.distribution_ids:
+            logging.info(
+                f"Cleaning up pooled Distributions: {', '.join(self.distribution_ids)}"
+            )
+            with ThreadPoolExecutor(max_workers=len(self.distribution_ids)) as pool:
+                list(pool.map(self._cleanup_one, self.distribution_ids))
 
         super().cleanup()
@@ -0,0 +1,1048 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""An offline, in-process stand-in for the CloudFront control-plane API.
+
+The stand-in speaks the same REST-XML wire protocol as CloudFront, so any
+boto3 client (or the controller itself, via ``--aws-endpoint-url``) can be
+pointed at it. Requests are routed and decoded, and responses encoded, using
+the botocore service model, which keeps the stand-in in lock-step with the
+shapes the helpers in this package actually parse.
+
+Resources that CloudFront deploys asynchronously (Distributions,
+ConnectionGroups, VpcOrigins and DistributionTenants) report ``InProgress``
+(or ``Deploying``) until their configured deploy latency has elapsed and
+``Deployed`` afterwards. ETags change on every mutation and ``IfMatch`` is
+enforced, ``NotFound``-style errors use the same codes as CloudFront, and
+throttling can be injected per operation.
+
+Usage:
+    from e2e.cloudfront_standin import CloudFrontStandIn
+
+    with CloudFrontStandIn(deploy_seconds={"Distribution": 0.5}) as standin:
+        os.environ.update(standin.environ())
+        ...
+
+The stand-in can also be run on its own, e.g. to point a locally running
+controller at it:
+
+    python -m e2e.cloudfront_standin --port 8080 --deploy-seconds 5
+"""
+
+import argparse
+import datetime
+import logging
+import random
+import re
+import string
+import threading
+import time
+import uuid
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Union
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+import botocore.session
+from botocore.awsrequest import HeadersDict
+from botocore.parsers import RestXMLParser
+
+DEFAULT_ACCOUNT_ID = "123456789012"
+DEFAULT_DEPLOY_SECONDS = 1.0
+DEFAULT_MAX_ITEMS = 100
+XML_NAMESPACE = "http://cloudfront.amazonaws.com/doc/2020-05-31/"
+
+# Kinds that go through an asynchronous InProgress -> Deployed transition.
+DEPLOYED_KINDS = (
+    "Distribution",
+    "ConnectionGroup",
+    "VpcOrigin",
+    "DistributionTenant",
+)
+
+# The AWS managed policies that the bootstrap and the tests look up by name.
+MANAGED_CACHE_POLICIES = {
+    "Managed-CachingOptimized": "658327ea-f89d-4fab-a63d-7e88639e58f6",
+    "Managed-CachingDisabled": "4135ea2d-6df8-44a3-9df3-4b5a84be39ad",
+}
+MANAGED_ORIGIN_REQUEST_POLICIES = {
+    "Managed-AllViewer": "216adef6-5c7f-47e4-b989-5492eafa07d3",
+    "Managed-CORS-S3Origin": "88a5eaf4-2fd4-4709-b370-b4c650ea3fcf",
+}
+MANAGED_RESPONSE_HEADERS_POLICIES = {
+    "Managed-SimpleCORS": "60669652-455b-4ae9-85a4-c4c02393f86c",
+    "Managed-SecurityHeadersPolicy": "67f7725c-6f97-4210-82d7-5512b31e9d03",
+}
+
+# The three policy kinds share the exact same API surface.
+POLICY_KINDS = {
+    "CachePolicy": ("NoSuchCachePolicy", MANAGED_CACHE_POLICIES),
+    "OriginRequestPolicy": (
+        "NoSuchOriginRequestPolicy", MANAGED_ORIGIN_REQUEST_POLICIES,
+    ),
+    "ResponseHeadersPolicy": (
+        "NoSuchResponseHeadersPolicy", MANAGED_RESPONSE_HEADERS_POLICIES,
+    ),
+}
+
+
+class StandInError(Exception):
+    """An error that is returned to the client as a CloudFront error
+    response."""
+
+    def __init__(self, status: int, code: str, message: str = ""):
+        super().__init__(f"{code}: {message}")
+        self.status = status
+        self.code = code
+        self.message = message or code
+
+
+def _not_found(code: str, kind: str, identifier: str) -> StandInError:
+    return StandInError(404, code, f"The specified {kind} {identifier} does not exist.")
+
+
+def _random_id(prefix: str = "E", length: int = 13) -> str:
+    alphabet = string.ascii_uppercase + string.digits
+    return prefix + "".join(random.choices(alphabet, k=length))
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class _Record(dict):
+    """A stored resource. The record itself is the (mutable) response
+    payload; bookkeeping lives in attributes."""
+
+    def __init__(self, kind: str, **payload):
+        super().__init__(**payload)
+        self.kind = kind
+        self.etag = _random_id("E", 13)
+        self.ready_at = 0.0
+        self.deleting = False
+        self.created = time.monotonic()
+
+    def touch(self, ready_at: float = 0.0):
+        self.etag = _random_id("E", 13)
+        self.ready_at = ready_at
+        self["LastModifiedTime"] = _now()
+
+
+class CloudFrontStandIn:
+    """In-process HTTP server that emulates the CloudFront control plane.
+
+    Args:
+        deploy_seconds: seconds a mutated resource stays ``InProgress`` before
+            reporting ``Deployed``. Either a single number for all kinds or a
+            dict keyed by kind (``Distribution``, ``ConnectionGroup``, ...).
+        delete_seconds: seconds a VpcOrigin stays in ``Deleting`` after a
+            DeleteVpcOrigin call before it disappears.
+        throttle: probability (0.0-1.0) of answering a call with a
+            ``Throttling`` error. Either a single number for all operations or
+            a dict keyed by operation name.
+        request_latency: seconds added to every request, to emulate network
+            round-trip time.
+        seed: seed for the random generator that drives throttling.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        deploy_seconds: Union[float, Dict[str, float]] = DEFAULT_DEPLOY_SECONDS,
+        delete_seconds: float = DEFAULT_DEPLOY_SECONDS,
+        throttle: Union[float, Dict[str, float]] = 0.0,
+        request_latency: float = 0.0,
+        account_id: str = DEFAULT_ACCOUNT_ID,
+        seed: Optional[int] = None,
+    ):
+        self.deploy_seconds = deploy_seconds
+        self.delete_seconds = delete_seconds
+        self.throttle = throttle
+        self.request_latency = request_latency
+        self.account_id = account_id
+
+        self.calls = Counter()
+        self.throttled = Counter()
+
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._records: Dict[str, Dict[str, _Record]] = {}
+        self._tags: Dict[str, Dict[str, str]] = {}
+
+        model = botocore.session.get_session().get_service_model("cloudfront")
+        self._routes = []
+        for name in model.operation_names:
+            handler = getattr(self, f"_op_{_snake(name)}", None)
+            if handler is not None:
+                self._routes.append(_Route(model.operation_model(name), handler))
+        # Prefer literal path segments over placeholders when several
+        # templates match, e.g. `/distribution/{Id}/config` over `{Id}`.
+        self._routes.sort(key=lambda r: r.specificity, reverse=True)
+        self._parser = RestXMLParser()
+
+        self._seed_managed_policies()
+
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    # Lifecycle
+
+    @property
+    def endpoint_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "CloudFrontStandIn":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="cloudfront-standin",
+            daemon=True,
+        )
+        self._thread.start()
+        logging.info(f"CloudFront stand-in listening on {self.endpoint_url}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "CloudFrontStandIn":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def environ(self) -> Dict[str, str]:
+        """Returns the environment variables that point boto3 at this
+        stand-in, with dummy credentials."""
+        return {
+            "AWS_ENDPOINT_URL_CLOUDFRONT": self.endpoint_url,
+            "AWS_ACCESS_KEY_ID": "standin",
+            "AWS_SECRET_ACCESS_KEY": "standin",
+            "AWS_DEFAULT_REGION": "us-east-1",
+        }
+
+    # Introspection helpers for benchmarks
+
+    def count(self, kind: str) -> int:
+        with self._lock:
+            return len(self._records.get(kind, {}))
+
+    def reset_counters(self):
+        with self._lock:
+            self.calls.clear()
+            self.throttled.clear()
+
+    # Request dispatch
+
+    def handle(self, method: str, raw_path: str, headers: dict, body: bytes):
+        """Dispatches a single HTTP request. Returns a tuple of
+        (status, headers, body)."""
+        if self.request_latency:
+            time.sleep(self.request_latency)
+
+        split = urlsplit(raw_path)
+        path = unquote(split.path)
+        query = {k: v[0] for k, v in parse_qs(split.query, keep_blank_values=True).items()}
+
+        for route in self._routes:
+            uri_params = route.match(method, path, query)
+            if uri_params is None:
+                continue
+            op = route.operation
+            with self._lock:
+                self.calls[op.name] += 1
+                if self._should_throttle(op.name):
+                    self.throttled[op.name] += 1
+                    return _error_response(StandInError(400, "Throttling", "Rate exceeded"))
+            try:
+                params = self._parse_input(op, uri_params, query, headers, body)
+                with self._lock:
+                    status, result = route.handler(params)
+                    return _success_response(op, status, result)
+            except StandInError as ex:
+                return _error_response(ex)
+            except Exception:
+                # Answer with an error body, rather than dropping the
+                # connection, so the client reports the failed call
+                logging.exception(f"cloudfront-standin: {op.name} failed")
+                return _error_response(StandInError(500, "InternalError", f"{op.name} failed in the stand-in"))
+
+        return _error_response(
+            StandInError(404, "UnknownOperation", f"No route for {method} {path}")
+        )
+
+    def _should_throttle(self, operation_name: str) -> bool:
+        rate = self.throttle
+        if isinstance(rate, dict):
+            rate = rate.get(operation_name, 0.0)
+        return rate > 0 and self._random.random() < rate
+
+    def _parse_input(self, op, uri_params, query, headers, body) -> dict:
+        shape = op.input_shape
+        if shape is None:
+            return {}
+        params = self._parser.parse(
+            {"body": body, "headers": headers, "status_code": 200}, shape,
+        )
+        params.pop("ResponseMetadata", None)
+        for name, member in shape.members.items():
+            location = member.serialization.get("location")
+            wire_name = member.serialization.get("name", name)
+            if location == "uri" and wire_name in uri_params:
+                params[name] = uri_params[wire_name]
+            elif location == "querystring" and wire_name in query:
+                value = query[wire_name]
+                params[name] = int(value) if member.type_name == "integer" else value
+        return params
+
+    # State helpers
+
+    def _deploy_latency(self, kind: str) -> float:
+        latency = self.deploy_seconds
+        if isinstance(latency, dict):
+            latency = latency.get(kind, DEFAULT_DEPLOY_SECONDS)
+        return latency
+
+    def _store(self, kind: str) -> Dict[str, _Record]:
+        return self._records.setdefault(kind, {})
+
+    def _add(self, record: _Record, key: str) -> _Record:
+        record["LastModifiedTime"] = _now()
+        if record.kind in DEPLOYED_KINDS:
+            record.ready_at = time.monotonic() + self._deploy_latency(record.kind)
+        self._store(record.kind)[key] = record
+        return record
+
+    def _mutate(self, record: _Record):
+        ready_at = 0.0
+        if record.kind in DEPLOYED_KINDS:
+            ready_at = time.monotonic() + self._deploy_latency(record.kind)
+        record.touch(ready_at)
+
+    def _lookup(self, kind: str, key: str, not_found_code: str) -> _Record:
+        self._expire(kind)
+        record = self._store(kind).get(key)
+        if record is None:
+            raise _not_found(not_found_code, kind, key)
+        self._refresh_status(record)
+        return record
+
+    def _expire(self, kind: str):
+        """Removes asynchronously deleted records whose deletion finished."""
+        store = self._store(kind)
+        now = time.monotonic()
+        for key in [k for k, r in store.items() if r.deleting and r.ready_at <= now]:
+            del store[key]
+
+    def _refresh_status(self, record: _Record):
+        if record.kind not in DEPLOYED_KINDS:
+            return
+        if record.deleting:
+            record["Status"] = "Deleting"
+        elif record.ready_at > time.monotonic():
+            record["Status"] = "Deploying" if record.kind == "VpcOrigin" else "InProgress"
+        else:
+            record["Status"] = "Deployed"
+
+    def _records_of(self, kind: str):
+        self._expire(kind)
+        records = list(self._store(kind).values())
+        for record in records:
+            self._refresh_status(record)
+        return records
+
+    def _check_if_match(self, record: _Record, if_match: Optional[str]):
+        if not if_match:
+            raise StandInError(400, "InvalidIfMatchVersion", "The If-Match version is missing or not valid.")
+        if if_match != "*" and if_match != record.etag:
+            raise StandInError(412, "PreconditionFailed", "The precondition given in one or more of the request-header fields evaluated to false.")
+
+    def _arn(self, resource_type: str, resource_id: str) -> str:
+        return f"arn:aws:cloudfront::{self.account_id}:{resource_type}/{resource_id}"
+
+    def _set_tags(self, arn: str, tags: Optional[dict]):
+        items = (tags or {}).get("Items", [])
+        self._tags[arn] = {t["Key"]: t.get("Value", "") for t in items}
+
+    def _seed_managed_policies(self):
+        for kind, (_, managed) in POLICY_KINDS.items():
+            for name, policy_id in managed.items():
+                record = _Record(kind, **{
+                    "Id": policy_id,
+                    f"{kind}Config": {"Name": name, "Comment": f"AWS managed policy {name}"},
+                })
+                record.managed = True
+                self._add(record, policy_id)
+
+    # Distributions
+
+    def _new_distribution(self, config: dict) -> _Record:
+        distribution_id = _random_id()
+        record = _Record(
+            "Distribution",
+            Id=distribution_id,
+            ARN=self._arn("distribution", distribution_id),
+            InProgressInvalidationBatches=0,
+            DomainName=f"d{_random_id('', 13).lower()}.cloudfront.net",
+            ActiveTrustedSigners={"Enabled": False, "Quantity": 0},
+            DistributionConfig=config,
+        )
+        self._add(record, distribution_id)
+        self._tags[record["ARN"]] = {}
+        self._refresh_status(record)
+        return record
+
+    def _op_create_distribution(self, params):
+        record = self._new_distribution(params["DistributionConfig"])
+        return 201, {
+            "Distribution": record,
+            "ETag": record.etag,
+            "Location": f"/2020-05-31/distribution/{record['Id']}",
+        }
+
+    def _op_create_distribution_with_tags(self, params):
+        config = params["DistributionConfigWithTags"]
+        record = self._new_distribution(config["DistributionConfig"])
+        self._set_tags(record["ARN"], config.get("Tags"))
+        return 201, {
+            "Distribution": record,
+            "ETag": record.etag,
+            "Location": f"/2020-05-31/distribution/{record['Id']}",
+        }
+
+    def _op_get_distribution(self, params):
+        record = self._lookup("Distribution", params["Id"], "NoSuchDistribution")
+        return 200, {"Distribution": record, "ETag": record.etag}
+
+    def _op_get_distribution_config(self, params):
+        record = self._lookup("Distribution", params["Id"], "NoSuchDistribution")
+        return 200, {"DistributionConfig": record["DistributionConfig"], "ETag": record.etag}
+
+    def _op_update_distribution(self, params):
+        record = self._lookup("Distribution", params["Id"], "NoSuchDistribution")
+        self._check_if_match(record, params.get("IfMatch"))
+        record["DistributionConfig"] = params["DistributionConfig"]
+        self._mutate(record)
+        self._refresh_status(record)
+        return 200, {"Distribution": record, "ETag": record.etag}
+
+    def _op_delete_distribution(self, params):
+        record = self._lookup("Distribution", params["Id"], "NoSuchDistribution")
+        self._check_if_match(record, params.get("IfMatch"))
+        if record["DistributionConfig"].get("Enabled", False) or record["Status"] != "Deployed":
+            raise StandInError(409, "DistributionNotDisabled", "The distribution you are trying to delete has not been disabled.")
+        del self._store("Distribution")[record["Id"]]
+        self._tags.pop(record["ARN"], None)
+        return 204, None
+
+    def _op_list_distributions(self, params):
+        summaries = [
+            {**r["DistributionConfig"], **r, "ETag": r.etag}
+            for r in self._records_of("Distribution")
+        ]
+        page, next_marker = _page(summaries, params, "Id")
+        return 200, {"DistributionList": _marker_list(page, params, next_marker)}
+
+    # ConnectionGroups
+
+    def _op_create_connection_group(self, params):
+        group_id = _random_id("cg_", 27)
+        record = _Record(
+            "ConnectionGroup",
+            Id=group_id,
+            Name=params["Name"],
+            Arn=self._arn("connection-group", group_id),
+            CreatedTime=_now(),
+            Ipv6Enabled=params.get("Ipv6Enabled", True),
+            RoutingEndpoint=f"{_random_id('', 13).lower()}.cloudfront.net",
+            Enabled=params.get("Enabled", True),
+            IsDefault=False,
+        )
+        if "AnycastIpListId" in params:
+            record["AnycastIpListId"] = params["AnycastIpListId"]
+        self._add(record, group_id)
+        self._set_tags(record["Arn"], params.get("Tags"))
+        self._refresh_status(record)
+        return 201, {"ConnectionGroup": record, "ETag": record.etag}
+
+    def _find_connection_group(self, identifier: str) -> _Record:
+        self._expire("ConnectionGroup")
+        for record in self._store("ConnectionGroup").values():
+            if identifier in (record["Id"], record["Name"], record["Arn"]):
+                self._refresh_status(record)
+                return record
+        raise _not_found("EntityNotFound", "ConnectionGroup", identifier)
+
+    def _op_get_connection_group(self, params):
+        record = self._find_connection_group(params["Identifier"])
+        return 200, {"ConnectionGroup": record, "ETag": record.etag}
+
+    def _op_update_connection_group(self, params):
+        record = self._find_connection_group(params["Id"])
+        self._check_if_match(record, params.get("IfMatch"))
+        for key in ("Ipv6Enabled", "AnycastIpListId", "Enabled"):
+            if key in params:
+                record[key] = params[key]
+        self._mutate(record)
+        self._refresh_status(record)
+        return 200, {"ConnectionGroup": record, "ETag": record.etag}
+
+    def _op_delete_connection_group(self, params):
+        record = self._find_connection_group(params["Id"])
+        self._check_if_match(record, params.get("IfMatch"))
+        if record["Enabled"] or record["Status"] != "Deployed":
+            raise StandInError(409, "ResourceNotDisabled", "The connection group must be disabled and deployed before it can be deleted.")
+        del self._store("ConnectionGroup")[record["Id"]]
+        self._tags.pop(record["Arn"], None)
+        return 204, None
+
+    def _op_list_connection_groups(self, params):
+        summaries = [{**r, "ETag": r.etag} for r in self._records_of("ConnectionGroup")]
+        page, next_marker = _page(summaries, params, "Id")
+        return 200, {"ConnectionGroups": page, "NextMarker": next_marker}
+
+    # DistributionTenants
+
+    def _op_create_distribution_tenant(self, params):
+        self._lookup("Distribution", params["DistributionId"], "EntityNotFound")
+        tenant_id = _random_id("dt_", 27)
+        record = _Record(
+            "DistributionTenant",
+            Id=tenant_id,
+            Arn=self._arn("distribution-tenant", tenant_id),
+            CreatedTime=_now(),
+            Enabled=params.get("Enabled", True),
+            **{k: v for k, v in params.items() if k not in ("Tags", "Enabled")},
+        )
+        self._add(record, tenant_id)
+        self._set_tags(record["Arn"], params.get("Tags"))
+        self._refresh_status(record)
+        return 201, {"DistributionTenant": record, "ETag": record.etag}
+
+    def _find_distribution_tenant(self, identifier: str) -> _Record:
+        self._expire("DistributionTenant")
+        for record in self._store("DistributionTenant").values():
+            if identifier in (record["Id"], record["Name"], record["Arn"]):
+                self._refresh_status(record)
+                return record
+        raise _not_found("EntityNotFound", "DistributionTenant", identifier)
+
+    def _op_get_distribution_tenant(self, params):
+        record = self._find_distribution_tenant(params["Identifier"])
+        return 200, {"DistributionTenant": record, "ETag": record.etag}
+
+    def _op_update_distribution_tenant(self, params):
+        record = self._find_distribution_tenant(params["Id"])
+        self._check_if_match(record, params.get("IfMatch"))
+        for key, value in params.items():
+            if key not in ("Id", "IfMatch"):
+                record[key] = value
+        self._mutate(record)
+        self._refresh_status(record)
+        return 200, {"DistributionTenant": record, "ETag": record.etag}
+
+    def _op_delete_distribution_tenant(self, params):
+        record = self._find_distribution_tenant(params["Id"])
+        self._check_if_match(record, params.get("IfMatch"))
+        if record["Enabled"]:
+            raise StandInError(409, "ResourceNotDisabled", "The distribution tenant must be disabled before it can be deleted.")
+        del self._store("DistributionTenant")[record["Id"]]
+        self._tags.pop(record["Arn"], None)
+        return 204, None
+
+    def _op_list_distribution_tenants(self, params):
+        summaries = [{**r, "ETag": r.etag} for r in self._records_of("DistributionTenant")]
+        page, next_marker = _page(summaries, params, "Id")
+        return 200, {"DistributionTenantList": page, "NextMarker": next_marker}
+
+    # VpcOrigins
+
+    def _op_create_vpc_origin(self, params):
+        origin_id = _random_id("vo_", 27)
+        record = _Record(
+            "VpcOrigin",
+            Id=origin_id,
+            Arn=self._arn("vpcorigin", origin_id),
+            AccountId=self.account_id,
+            CreatedTime=_now(),
+            VpcOriginEndpointConfig=params["VpcOriginEndpointConfig"],
+        )
+        self._add(record, origin_id)
+        self._set_tags(record["Arn"], params.get("Tags"))
+        self._refresh_status(record)
+        return 202, {"VpcOrigin": record, "ETag": record.etag}
+
+    def _op_get_vpc_origin(self, params):
+        record = self._lookup("VpcOrigin", params["Id"], "EntityNotFound")
+        return 200, {"VpcOrigin": record, "ETag": record.etag}
+
+    def _op_update_vpc_origin(self, params):
+        record = self._lookup("VpcOrigin", params["Id"], "EntityNotFound")
+        self._check_if_match(record, params.get("IfMatch"))
+        record["VpcOriginEndpointConfig"] = params["VpcOriginEndpointConfig"]
+        self._mutate(record)
+        self._refresh_status(record)
+        return 202, {"VpcOrigin": record, "ETag": record.etag}
+
+    def _op_delete_vpc_origin(self, params):
+        record = self._lookup("VpcOrigin", params["Id"], "EntityNotFound")
+        self._check_if_match(record, params.get("IfMatch"))
+        if record["Status"] != "Deployed":
+            raise StandInError(409, "IllegalDelete", "The VPC origin is not in a deletable state.")
+        record.deleting = True
+        record.ready_at = time.monotonic() + self.delete_seconds
+        self._tags.pop(record["Arn"], None)
+        self._refresh_status(record)
+        return 202, {"VpcOrigin": record, "ETag": record.etag}
+
+    def _op_list_vpc_origins(self, params):
+        summaries = [
+            {**r, "Name": r["VpcOriginEndpointConfig"].get("Name"),
+             "OriginEndpointArn": r["VpcOriginEndpointConfig"].get("Arn")}
+            for r in self._records_of("VpcOrigin")
+        ]
+        page, next_marker = _page(summaries, params, "Id")
+        return 200, {"VpcOriginList": _marker_list(page, params, next_marker)}
+
+    # Cache, OriginRequest and ResponseHeaders policies
+
+    def _policy_create(self, kind: str, params):
+        policy_id = str(uuid.uuid4())
+        config = params[f"{kind}Config"]
+        for record in self._records_of(kind):
+            if record[f"{kind}Config"].get("Name") == config.get("Name"):
+                raise StandInError(409, f"{kind}AlreadyExists", f"A {kind} with this name already exists.")
+        record = self._add(_Record(kind, **{"Id": policy_id, f"{kind}Config": config}), policy_id)
+        record.managed = False
+        return 201, {kind: record, "ETag": record.etag, "Location": f"/{policy_id}"}
+
+    def _policy_get(self, kind: str, params):
+        record = self._lookup(kind, params["Id"], POLICY_KINDS[kind][0])
+        return 200, {kind: record, "ETag": record.etag}
+
+    def _policy_get_config(self, kind: str, params):
+        record = self._lookup(kind, params["Id"], POLICY_KINDS[kind][0])
+        return 200, {f"{kind}Config": record[f"{kind}Config"], "ETag": record.etag}
+
+    def _policy_update(self, kind: str, params):
+        record = self._lookup(kind, params["Id"], POLICY_KINDS[kind][0])
+        if record.managed:
+            raise StandInError(403, "IllegalUpdate", "Managed policies cannot be updated.")
+        self._check_if_match(record, params.get("IfMatch"))
+        record[f"{kind}Config"] = params[f"{kind}Config"]
+        self._mutate(record)
+        return 200, {kind: record, "ETag": record.etag}
+
+    def _policy_delete(self, kind: str, params):
+        record = self._lookup(kind, params["Id"], POLICY_KINDS[kind][0])
+        if record.managed:
+            raise StandInError(409, "IllegalDelete", "Managed policies cannot be deleted.")
+        self._check_if_match(record, params.get("IfMatch"))
+        del self._store(kind)[record["Id"]]
+        return 204, None
+
+    def _policy_list(self, kind: str, params):
+        wanted = params.get("Type")
+        summaries = [
+            {"Type": "managed" if r.managed else "custom", kind: r, "Id": r["Id"]}
+            for r in self._records_of(kind)
+            if wanted is None or wanted == ("managed" if r.managed else "custom")
+        ]
+        page, next_marker = _page(summaries, params, "Id")
+        return 200, {f"{kind}List": {
+            "NextMarker": next_marker,
+            "MaxItems": params.get("MaxItems", DEFAULT_MAX_ITEMS),
+            "Quantity": len(page),
+            "Items": page,
+        }}
+
+    def _op_create_cache_policy(self, params):
+        return self._policy_create("CachePolicy", params)
+
+    def _op_get_cache_policy(self, params):
+        return self._policy_get("CachePolicy", params)
+
+    def _op_get_cache_policy_config(self, params):
+        return self._policy_get_config("CachePolicy", params)
+
+    def _op_update_cache_policy(self, params):
+        return self._policy_update("CachePolicy", params)
+
+    def _op_delete_cache_policy(self, params):
+        return self._policy_delete("CachePolicy", params)
+
+    def _op_list_cache_policies(self, params):
+        return self._policy_list("CachePolicy", params)
+
+    def _op_create_origin_request_policy(self, params):
+        return self._policy_create("OriginRequestPolicy", params)
+
+    def _op_get_origin_request_policy(self, params):
+        return self._policy_get("OriginRequestPolicy", params)
+
+    def _op_get_origin_request_policy_config(self, params):
+        return self._policy_get_config("OriginRequestPolicy", params)
+
+    def _op_update_origin_request_policy(self, params):
+        return self._policy_update("OriginRequestPolicy", params)
+
+    def _op_delete_origin_request_policy(self, params):
+        return self._policy_delete("OriginRequestPolicy", params)
+
+    def _op_list_origin_request_policies(self, params):
+        return self._policy_list("OriginRequestPolicy", params)
+
+    def _op_create_response_headers_policy(self, params):
+        return self._policy_create("ResponseHeadersPolicy", params)
+
+    def _op_get_response_headers_policy(self, params):
+        return self._policy_get("ResponseHeadersPolicy", params)
+
+    def _op_get_response_headers_policy_config(self, params):
+        return self._policy_get_config("ResponseHeadersPolicy", params)
+
+    def _op_update_response_headers_policy(self, params):
+        return self._policy_update("ResponseHeadersPolicy", params)
+
+    def _op_delete_response_headers_policy(self, params):
+        return self._policy_delete("ResponseHeadersPolicy", params)
+
+    def _op_list_response_headers_policies(self, params):
+        return self._policy_list("ResponseHeadersPolicy", params)
+
+    # OriginAccessControls
+
+    def _op_create_origin_access_control(self, params):
+        oac_id = _random_id()
+        record = _Record(
+            "OriginAccessControl",
+            Id=oac_id,
+            OriginAccessControlConfig=params["OriginAccessControlConfig"],
+        )
+        self._add(record, oac_id)
+        return 201, {"OriginAccessControl": record, "ETag": record.etag, "Location": f"/{oac_id}"}
+
+    def _op_get_origin_access_control(self, params):
+        record = self._lookup("OriginAccessControl", params["Id"], "NoSuchOriginAccessControl")
+        return 200, {"OriginAccessControl": record, "ETag": record.etag}
+
+    def _op_update_origin_access_control(self, params):
+        record = self._lookup("OriginAccessControl", params["Id"], "NoSuchOriginAccessControl")
+        self._check_if_match(record, params.get("IfMatch"))
+        record["OriginAccessControlConfig"] = params["OriginAccessControlConfig"]
+        self._mutate(record)
+        return 200, {"OriginAccessControl": record, "ETag": record.etag}
+
+    def _op_delete_origin_access_control(self, params):
+        record = self._lookup("OriginAccessControl", params["Id"], "NoSuchOriginAccessControl")
+        self._check_if_match(record, params.get("IfMatch"))
+        del self._store("OriginAccessControl")[record["Id"]]
+        return 204, None
+
+    def _op_list_origin_access_controls(self, params):
+        summaries = [
+            {**r["OriginAccessControlConfig"], "Id": r["Id"]}
+            for r in self._records_of("OriginAccessControl")
+        ]
+        page, next_marker = _page(summaries, params, "Id")
+        return 200, {"OriginAccessControlList": _marker_list(page, params, next_marker)}
+
+    # Functions
+
+    def _function(self, name: str, stage: str = "DEVELOPMENT") -> _Record:
+        record = self._store("Function").get(name)
+        if record is None or stage not in record.stages:
+            raise _not_found("NoSuchFunctionExists", "Function", name)
+        return record
+
+    def _function_summary(self, record: _Record, stage: str = "DEVELOPMENT") -> dict:
+        return {
+            "Name": record["Name"],
+            "Status": "UNPUBLISHED" if stage == "DEVELOPMENT" and "LIVE" not in record.stages else "UNASSOCIATED",
+            "FunctionConfig": record.stages[stage],
+            "FunctionMetadata": {
+                "FunctionARN": self._arn("function", record["Name"]),
+                "Stage": stage,
+                "CreatedTime": record["CreatedTime"],
+                "LastModifiedTime": record["LastModifiedTime"],
+            },
+        }
+
+    def _op_create_function(self, params):
+        name = params["Name"]
+        if name in self._store("Function"):
+            raise StandInError(409, "FunctionAlreadyExists", f"Function {name} already exists.")
+        record = _Record("Function", Name=name, CreatedTime=_now())
+        record.stages = {"DEVELOPMENT": params["FunctionConfig"]}
+        self._add(record, name)
+        return 201, {
+            "FunctionSummary": self._function_summary(record),
+            "ETag": record.etag,
+            "Location": f"/2020-05-31/function/{name}",
+        }
+
+    def _op_describe_function(self, params):
+        stage = params.get("Stage", "DEVELOPMENT")
+        record = self._function(params["Name"], stage)
+        return 200, {"FunctionSummary": self._function_summary(record, stage), "ETag": record.etag}
+
+    def _op_update_function(self, params):
+        record = self._function(params["Name"])
+        self._check_if_match(record, params.get("IfMatch"))
+        record.stages["DEVELOPMENT"] = params["FunctionConfig"]
+        self._mutate(record)
+        return 200, {"FunctionSummary": self._function_summary(record), "ETag": record.etag}
+
+    def _op_publish_function(self, params):
+        record = self._function(params["Name"])
+        self._check_if_match(record, params.get("IfMatch"))
+        record.stages["LIVE"] = record.stages["DEVELOPMENT"]
+        self._mutate(record)
+        return 200, {"FunctionSummary": self._function_summary(record, "LIVE")}
+
+    def _op_delete_function(self, params):
+        record = self._function(params["Name"])
+        self._check_if_match(record, params.get("IfMatch"))
+        del self._store("Function")[record["Name"]]
+        return 204, None
+
+    def _op_list_functions(self, params):
+        stage = params.get("Stage", "DEVELOPMENT")
+        summaries = [
+            {**self._function_summary(r, stage), "Id": r["Name"]}
+            for r in self._records_of("Function")
+            if stage in r.stages
+        ]
+        page, next_marker = _page(summaries, params, "Id")
+        return 200, {"FunctionList": {
+            "NextMarker": next_marker,
+            "MaxItems": params.get("MaxItems", DEFAULT_MAX_ITEMS),
+            "Quantity": len(page),
+            "Items": page,
+        }}
+
+    # Tagging
+
+    def _tags_for(self, arn: str) -> Dict[str, str]:
+        tags = self._tags.get(arn)
+        if tags is None:
+            raise StandInError(404, "NoSuchResource", f"The specified resource {arn} does not exist.")
+        return tags
+
+    def _op_list_tags_for_resource(self, params):
+        tags = self._tags_for(params["Resource"])
+        return 200, {"Tags": {"Items": [{"Key": k, "Value": v} for k, v in tags.items()]}}
+
+    def _op_tag_resource(self, params):
+        tags = self._tags_for(params["Resource"])
+        for tag in params.get("Tags", {}).get("Items", []):
+            tags[tag["Key"]] = tag.get("Value", "")
+        return 204, None
+
+    def _op_untag_resource(self, params):
+        tags = self._tags_for(params["Resource"])
+        for key in params.get("TagKeys", {}).get("Items", []):
+            tags.pop(key, None)
+        return 204, None
+
+
+class _Route:
+    """Matches requests against an operation's HTTP binding."""
+
+    def __init__(self, operation, handler):
+        self.operation = operation
+        self.handler = handler
+        self.method = operation.http["method"]
+        path, _, static_query = operation.http["requestUri"].partition("?")
+        self.static_query = {k: v[0] for k, v in parse_qs(static_query, keep_blank_values=True).items()}
+        pattern = re.sub(
+            r"\\\{(\w+)(\\\+)?\\\}",
+            lambda m: f"(?P<{m.group(1)}>{'.+' if m.group(2) else '[^/]+'})",
+            re.escape(path),
+        )
+        self.pattern = re.compile(f"^{pattern}$")
+        self.specificity = (len(self.static_query), len(re.sub(r"\{[^}]*\}", "", path)))
+
+    def match(self, method: str, path: str, query: dict) -> Optional[dict]:
+        if method != self.method:
+            return None
+        for key, value in self.static_query.items():
+            if query.get(key) != value:
+                return None
+        m = self.pattern.match(path)
+        return m.groupdict() if m else None
+
+
+def _snake(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def _page(items: list, params: dict, key: str):
+    """Returns one page of items and the marker of the next page, if any.
+
+    A marker that matches no item, e.g. because that item was deleted since
+    the previous page, is rejected as CloudFront does, rather than starting
+    over and repeating items.
+    """
+    marker = params.get("Marker")
+    max_items = int(params.get("MaxItems") or DEFAULT_MAX_ITEMS)
+    start = 0
+    if marker:
+        for i, item in enumerate(items):
+            if item[key] == marker:
+                start = i
+                break
+        else:
+            raise StandInError(400, "InvalidArgument", f"The marker {marker} is not valid.")
+    page = items[start:start + max_items]
+    next_marker = items[start + max_items][key] if start + max_items < len(items) else None
+    return page, next_marker
+
+
+def _marker_list(page: list, params: dict, next_marker: Optional[str]) -> dict:
+    return {
+        "Marker": params.get("Marker", ""),
+        "NextMarker": next_marker,
+        "MaxItems": int(params.get("MaxItems") or DEFAULT_MAX_ITEMS),
+        "IsTruncated": next_marker is not None,
+        "Quantity": len(page),
+        "Items": page,
+    }
+
+
+def _serialize_xml(shape, value, name: str) -> str:
+    """Serializes a value to REST-XML following the given botocore shape."""
+    if value is None:
+        return ""
+    type_name = shape.type_name
+    if type_name == "structure":
+        body = "".join(
+            _serialize_xml(member, value[member_name], member.serialization.get("name", member_name))
+            for member_name, member in shape.members.items()
+            if member_name in value and member.serialization.get("location") is None
+        )
+    elif type_name == "list":
+        member_name = shape.member.serialization.get("name", "member")
+        body = "".join(_serialize_xml(shape.member, item, member_name) for item in value)
+    elif type_name == "map":
+        body = "".join(
+            f"<entry>{_serialize_xml(shape.key, k, 'key')}{_serialize_xml(shape.value, v, 'value')}</entry>"
+            for k, v in value.items()
+        )
+    elif type_name == "boolean":
+        body = "true" if value else "false"
+    elif type_name == "timestamp":
+        if isinstance(value, datetime.datetime):
+            value = value.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        body = escape(str(value))
+    elif type_name == "blob":
+        return ""
+    else:
+        body = escape(str(value))
+    return f"<{name}>{body}</{name}>"
+
+
+def _success_response(op, status: int, result: Optional[dict]):
+    headers = {}
+    body = b""
+    shape = op.output_shape
+    if shape is not None and result is not None:
+        for member_name, member in shape.members.items():
+            if member.serialization.get("location") == "header" and result.get(member_name) is not None:
+                headers[member.serialization.get("name", member_name)] = str(result[member_name])
+        payload = shape.serialization.get("payload")
+        if payload is not None:
+            xml = _serialize_xml(shape.members[payload], result.get(payload), payload)
+        else:
+            xml = _serialize_xml(shape, result, shape.name)
+        if xml:
+            root, _, rest = xml.partition(">")
+            body = f'<?xml version="1.0"?>\n{root} xmlns="{XML_NAMESPACE}">{rest}'.encode()
+    if body:
+        headers["Content-Type"] = "text/xml"
+    return status, headers, body
+
+
+def _error_response(error: StandInError):
+    body = (
+        f'<?xml version="1.0"?>\n<ErrorResponse xmlns="{XML_NAMESPACE}">'
+        f"<Error><Type>{'Receiver' if error.status >= 500 else 'Sender'}</Type><Code>{error.code}</Code>"
+        f"<Message>{escape(error.message)}</Message></Error>"
+        f"<RequestId>{uuid.uuid4()}</RequestId></ErrorResponse>"
+    ).encode()
+    return error.status, {"Content-Type": "text/xml"}, body
+
+
+def _make_handler(standin: CloudFrontStandIn):
+    class Handler(BaseHTTPRequestHandler):
+        # HTTP/1.1 so that pooled clients can keep their connections alive.
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _dispatch(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            headers = HeadersDict(self.headers.items())
+            status, response_headers, response_body = standin.handle(
+                self.command, self.path, headers, body,
+            )
+            self.send_response(status)
+            for key, value in response_headers.items():
+                self.send_header(key, value)
+            self.send_header("x-amz-request-id", str(uuid.uuid4()))
+            self.send_header("Content-Length", str(len(response_body)))
+            self.end_headers()
+            if response_body:
+                self.wfile.write(response_body)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+        def log_message(self, format, *args):
+            logging.debug("cloudfront-standin: " + format % args)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--deploy-seconds", type=float, default=DEFAULT_DEPLOY_SECONDS)
+    parser.add_argument("--throttle", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.INFO)
+    standin = CloudFrontStandIn(
+        host=args.host,
+        port=args.port,
+        deploy_seconds=args.deploy_seconds,
+        delete_seconds=args.deploy_seconds,
+        throttle=args.throttle,
+    ).start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
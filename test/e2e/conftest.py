@@ -11,15 +11,63 @@
 # express or implied. See the License for the specific language governing
 # permissions and limitations under the License.
 
-import boto3
 import pytest
 from acktest import k8s
 
+from e2e import api_profiler, leak_check, parallel, prefetch, propagation, rate_limit, reaper, vcr
+from e2e.clients import get_cloudfront_client
+
+# Reports of every test phase, collected on the xdist controller (or the
+# only process) to record module durations for the scheduler
+_reports = []
+
 
 def pytest_addoption(parser):
     parser.addoption("--runslow", action="store_true", default=False, help="run slow tests")
+    parser.addoption(
+        "--bootstrap", action="store_true", default=False,
+        help="bootstrap the shared resources first, unless already bootstrapped",
+    )
+    parser.addoption(
+        "--api-profile", metavar="PATH", default=None,
+        help="profile the AWS API calls of every test and write a JSON report to PATH",
+    )
+    parser.addoption(
+        "--vcr", choices=vcr.MODES, default=None,
+        help="record the CloudFront API calls of every test module, or replay them",
+    )
+    parser.addoption(
+        "--vcr-dir", default=str(vcr.DEFAULT_DIRECTORY),
+        help="directory of the recorded cassettes",
+    )
+    parser.addoption(
+        "--vcr-time-compression", type=float, default=vcr.DEFAULT_TIME_COMPRESSION,
+        help="how many times faster waiters poll when replaying",
+    )
+    parser.addoption(
+        "--no-prefetch", action="store_true", default=False,
+        help="do not create the resources of slow fixtures in the background at session start",
+    )
+    parser.addoption(
+        "--no-rate-limit", action="store_true", default=False,
+        help="do not pace the AWS API calls of the harness",
+    )
+    parser.addoption(
+        "--leak-check", choices=leak_check.MODES, default=leak_check.DEFAULT_MODE,
+        help="warn about, or fail on, CloudFront resources that the session leaves behind",
+    )
+    parser.addoption(
+        "--no-reaper", action="store_true", default=False,
+        help="delete the resources of fixtures during their teardown, not in the background",
+    )
 
 def pytest_configure(config):
+    api_profiler.register(config)
+    vcr.register(config)
+    rate_limit.register(config)
+    leak_check.register(config)
+    reaper.register(config)
+    propagation.install()
     config.addinivalue_line(
         "markers", "service(arg): mark test associated with a given service"
     )
@@ -31,6 +79,9 @@ def pytest_configure(config):
     )
 
 def pytest_collection_modifyitems(config, items):
+    # Under xdist, the workers collect and the scheduler follows their order
+    if parallel.worker_id() is not None:
+        parallel.sort_slowest_first(items)
     if config.getoption("--runslow"):
         return
     skip_slow = pytest.mark.skip(reason="need --runslow option to run")
@@ -38,6 +89,52 @@ def pytest_collection_modifyitems(config, items):
         if "slow" in item.keywords:
             item.add_marker(skip_slow)
 
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    return parallel.make_scheduler(config, log)
+
+def pytest_runtest_logreport(report):
+    _reports.append(report)
+
+def pytest_sessionfinish(session):
+    if not hasattr(session.config, "workerinput"):
+        parallel.record_durations(_reports)
+
+@pytest.fixture(scope='session', autouse=True)
+def bootstrapped(request):
+    if request.config.getoption("--bootstrap"):
+        parallel.ensure_bootstrapped()
+
+# Under xdist, every worker creates its resources in its own namespace
+@pytest.fixture(scope='session', autouse=True)
+def worker_namespace():
+    namespace = parallel.namespace()
+    if namespace == parallel.DEFAULT_NAMESPACE:
+        yield namespace
+        return
+    api_client = k8s._get_k8s_api_client()
+    parallel.create_namespace(api_client, namespace)
+    yield namespace
+    parallel.delete_namespace(api_client, namespace)
+
+# Fixture resources are deleted in the background. Wait for them before the
+# worker namespace is deleted and the session checks for leaks.
+@pytest.fixture(scope='session', autouse=True)
+def reaped(worker_namespace):
+    yield
+    reaper.finish()
+
+# Start creating the resources of slow fixtures right away, so that their
+# deploys overlap with the other modules. When recording or replaying API
+# calls, creates stay in their module's cassette.
+@pytest.fixture(scope='session', autouse=True)
+def prefetched(request, bootstrapped, reaped):
+    config = request.config
+    if not config.getoption("--no-prefetch") and not config.getoption("--vcr") and parallel.worker_id() is None:
+        prefetch.start(prefetch.used_fixtures(request.session.items))
+    yield
+    prefetch.finish()
+
 # Provide a k8s client to interact with the integration test cluster
 @pytest.fixture(scope='class')
 def k8s_client():
@@ -45,4 +142,4 @@ def k8s_client():
 
 @pytest.fixture(scope='module')
 def cloudfront_client():
-    return boto3.client('cloudfront')
+    return get_cloudfront_client()
@@ -13,23 +13,22 @@
 
 """Utilities for working with ConnectionGroup resources"""
 
-import datetime
-import time
-
-import boto3
-import pytest
+from e2e import tagging, waiter
+from e2e.clients import get_cloudfront_client
 
 DEFAULT_WAIT_UNTIL_EXISTS_TIMEOUT_SECONDS = 60 * 10
 DEFAULT_WAIT_UNTIL_EXISTS_INTERVAL_SECONDS = 15
 DEFAULT_WAIT_UNTIL_DELETED_TIMEOUT_SECONDS = 60 * 10
 DEFAULT_WAIT_UNTIL_DELETED_INTERVAL_SECONDS = 15
+DEFAULT_WAIT_UNTIL_CHANGED_TIMEOUT_SECONDS = 60 * 5
+DEFAULT_WAIT_UNTIL_CHANGED_INTERVAL_SECONDS = 5
 
 
 def wait_until_exists(
     connection_group_id: str,
     timeout_seconds: int = DEFAULT_WAIT_UNTIL_EXISTS_TIMEOUT_SECONDS,
     interval_seconds: int = DEFAULT_WAIT_UNTIL_EXISTS_INTERVAL_SECONDS,
-) -> None:
+) -> waiter.WaitResult:
     """Waits until a ConnectionGroup with a supplied ID is returned from
     CloudFront GetConnectionGroup API.
 
@@ -38,30 +37,25 @@ def wait_until_exists(
 
         wait_until_exists(connection_group_id)
 
+    Returns:
+        a WaitResult with the number of polls and the seconds waited
+
     Raises:
         pytest.fail upon timeout
     """
-    now = datetime.datetime.now()
-    timeout = now + datetime.timedelta(seconds=timeout_seconds)
-
-    while True:
-        if datetime.datetime.now() >= timeout:
-            pytest.fail(
-                "Timed out waiting for ConnectionGroup to exist "
-                "in CloudFront API"
-            )
-        time.sleep(interval_seconds)
-
-        latest = get(connection_group_id)
-        if latest is not None:
-            break
+    return waiter.wait_until_exists(
+        lambda: get(connection_group_id),
+        "ConnectionGroup",
+        timeout_seconds=timeout_seconds,
+        max_interval_seconds=interval_seconds,
+    )
 
 
 def wait_until_deleted(
     connection_group_id: str,
     timeout_seconds: int = DEFAULT_WAIT_UNTIL_DELETED_TIMEOUT_SECONDS,
     interval_seconds: int = DEFAULT_WAIT_UNTIL_DELETED_INTERVAL_SECONDS,
-) -> None:
+) -> waiter.WaitResult:
     """Waits until a ConnectionGroup with a supplied ID is no longer returned
     from the CloudFront API.
 
@@ -70,23 +64,48 @@ def wait_until_deleted(
 
         wait_until_deleted(connection_group_id)
 
+    Returns:
+        a WaitResult with the number of polls and the seconds waited
+
     Raises:
         pytest.fail upon timeout
     """
-    now = datetime.datetime.now()
-    timeout = now + datetime.timedelta(seconds=timeout_seconds)
+    return waiter.wait_until_deleted(
+        lambda: get(connection_group_id),
+        "ConnectionGroup",
+        timeout_seconds=timeout_seconds,
+        max_interval_seconds=interval_seconds,
+    )
+
+
+def wait_until_changed(
+    connection_group_id: str,
+    since_etag: str,
+    timeout_seconds: int = DEFAULT_WAIT_UNTIL_CHANGED_TIMEOUT_SECONDS,
+    interval_seconds: int = DEFAULT_WAIT_UNTIL_CHANGED_INTERVAL_SECONDS,
+) -> waiter.WaitResult:
+    """Waits until the CloudFront API returns a version of a ConnectionGroup
+    other than `since_etag`, i.e. until an update has been applied.
 
-    while True:
-        if datetime.datetime.now() >= timeout:
-            pytest.fail(
-                "Timed out waiting for ConnectionGroup to be "
-                "deleted in CloudFront API"
-            )
-        time.sleep(interval_seconds)
+    Usage:
+        from e2e.connection_group import wait_until_changed
+
+        wait_until_changed(connection_group_id, latest["ETag"])
 
-        latest = get(connection_group_id)
-        if latest is None:
-            break
+    Returns:
+        a WaitResult with the new record, the number of polls and the
+        seconds waited
+
+    Raises:
+        pytest.fail upon timeout
+    """
+    return waiter.wait_until_changed(
+        lambda: get(connection_group_id),
+        "ConnectionGroup",
+        since_etag,
+        timeout_seconds=timeout_seconds,
+        max_interval_seconds=interval_seconds,
+    )
 
 
 def get(connection_group_id):
@@ -97,10 +116,12 @@ def get(connection_group_id):
 
     If no such ConnectionGroup exists, returns None.
     """
-    c = boto3.client("cloudfront")
+    c = get_cloudfront_client()
     try:
         resp = c.get_connection_group(Identifier=connection_group_id)
-        return resp["ConnectionGroup"]
+        record = resp["ConnectionGroup"]
+        record["ETag"] = resp["ETag"]
+        return record
     except c.exceptions.EntityNotFound:
         return None
 
@@ -112,9 +133,4 @@ def get_tags(connection_group_arn):
 
     If no such ConnectionGroup exists, returns None.
     """
-    c = boto3.client("cloudfront")
-    try:
-        resp = c.list_tags_for_resource(Resource=connection_group_arn)
-        return resp["Tags"]["Items"]
-    except c.exceptions.NoSuchResource:
-        return None
+    return tagging.get_tags(connection_group_arn)
@@ -0,0 +1,168 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Event-driven waits on custom resources, built on the Kubernetes watch API.
+
+Instead of sleeping for a fixed period and then asserting, these helpers
+stream the events of a single CR and return as soon as the controller has
+caught up with it. Each function fails the current test upon timeout.
+
+Usage:
+    before = k8s.get_resource(ref)
+    k8s.patch_custom_resource(ref, updates)
+    cr_watch.wait_until_updated(ref, before, timeout_seconds=300)
+"""
+
+import logging
+import time
+
+from typing import Callable, Optional
+
+import pytest
+from acktest.k8s import resource as k8s
+from kubernetes import client, watch
+from kubernetes.client.rest import ApiException
+
+from e2e import propagation, waiter
+
+SYNCED_CONDITION = "ACK.ResourceSynced"
+
+
+def _condition_status(cr: dict, condition_type: str) -> Optional[str]:
+    for condition in cr.get("status", {}).get("conditions", []) or []:
+        if condition.get("type") == condition_type:
+            return condition.get("status")
+    return None
+
+
+def is_synced(cr: dict) -> bool:
+    """Returns whether the controller has synced the CR with its latest
+    spec."""
+    if _condition_status(cr, SYNCED_CONDITION) != "True":
+        return False
+    observed = cr.get("status", {}).get("observedGeneration")
+    return observed is None or observed >= cr["metadata"].get("generation", 0)
+
+
+def wait_for(
+    ref: k8s.CustomResourceReference,
+    predicate: Callable[[dict], bool],
+    description: str,
+    timeout_seconds: float,
+) -> dict:
+    """Returns the CR as soon as `predicate(cr)` is true, checking the current
+    CR first and then every change event.
+
+    Raises:
+        WaitTimeoutError if the predicate does not hold before the deadline.
+    """
+    start = time.monotonic()
+    deadline = start + timeout_seconds
+    api = client.CustomObjectsApi(k8s._get_k8s_api_client())
+    events = 0
+
+    cr = k8s.get_resource(ref)
+    while True:
+        if cr is not None and predicate(cr):
+            logging.info(
+                f"{description}: done after {events} events "
+                f"({time.monotonic() - start:.1f}s)"
+            )
+            propagation.observe_cr(cr)
+            return cr
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise waiter.WaitTimeoutError(
+                description,
+                waiter.WaitResult(value=cr, polls=events, waited_seconds=time.monotonic() - start),
+            )
+
+        kwargs = {"field_selector": f"metadata.name={ref.name}"}
+        if cr is not None:
+            kwargs["resource_version"] = cr["metadata"]["resourceVersion"]
+        w = watch.Watch()
+        try:
+            for event in w.stream(
+                api.list_namespaced_custom_object,
+                ref.group, ref.version, ref.namespace, ref.plural,
+                timeout_seconds=max(1, int(remaining)),
+                **kwargs,
+            ):
+                events += 1
+                cr = event["object"] if event["type"] != "DELETED" else None
+                if cr is not None and predicate(cr):
+                    break
+        except ApiException as ex:
+            # The resource version we started from is too old to watch from
+            if ex.status != 410:
+                raise
+            cr = k8s.get_resource(ref)
+        finally:
+            w.stop()
+
+
+def wait_until_synced(
+    ref: k8s.CustomResourceReference,
+    timeout_seconds: float,
+) -> dict:
+    """Waits until the CR is ACK.ResourceSynced, failing the current test
+    upon timeout.
+
+    Returns: the synced CR
+    """
+    try:
+        return wait_for(
+            ref,
+            is_synced,
+            f"{ref.plural} {ref.name} to be synced",
+            timeout_seconds,
+        )
+    except waiter.WaitTimeoutError as ex:
+        pytest.fail(str(ex))
+
+
+def wait_until_updated(
+    ref: k8s.CustomResourceReference,
+    before: dict,
+    timeout_seconds: float,
+) -> dict:
+    """Waits until the controller has applied a change made to the CR since
+    `before` was read, failing the current test upon timeout.
+
+    The change is applied once the CR is synced again and its `status.eTag`,
+    which CloudFront changes with every update, differs from the one in
+    `before`. A patch that did not change the spec only waits to be synced.
+
+    Returns: the updated CR
+    """
+    current = k8s.get_resource(ref)
+    if current["metadata"].get("generation") == before["metadata"].get("generation"):
+        return wait_until_synced(ref, timeout_seconds)
+
+    etag_before = before.get("status", {}).get("eTag")
+    has_observed_generation = "observedGeneration" in current.get("status", {})
+
+    def updated(cr: dict) -> bool:
+        if not is_synced(cr):
+            return False
+        return has_observed_generation or cr.get("status", {}).get("eTag") != etag_before
+
+    try:
+        return wait_for(
+            ref,
+            updated,
+            f"{ref.plural} {ref.name} to be updated",
+            timeout_seconds,
+        )
+    except waiter.WaitTimeoutError as ex:
+        pytest.fail(str(ex))
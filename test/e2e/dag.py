@@ -0,0 +1,136 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Runs a small dependency graph of tasks over a thread pool.
+
+Each task starts as soon as all of its dependencies have succeeded, so
+independent tasks overlap and the total wall-clock time approaches that of
+the longest dependency chain rather than the sum of all tasks.
+"""
+
+import logging
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional
+
+
+class DependencyFailed(Exception):
+    """Recorded for a task that was skipped because a dependency failed."""
+
+
+@dataclass
+class NodeResult:
+    name: str
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.finished_at is not None and self.error is None
+
+    @property
+    def skipped(self) -> bool:
+        return isinstance(self.error, DependencyFailed)
+
+    @property
+    def seconds(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+def _topological_order(names: Iterable[str], dependencies: Dict[str, Iterable[str]]):
+    order, visiting, done = [], set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle involving {name}")
+        visiting.add(name)
+        for dep in dependencies.get(name, ()):
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return order
+
+
+def run(
+    tasks: Dict[str, Callable[[], None]],
+    dependencies: Dict[str, Iterable[str]] = {},
+    logger_name: str = "e2e.dag",
+    max_workers: Optional[int] = None,
+) -> Dict[str, NodeResult]:
+    """Runs every task once all of its dependencies have succeeded.
+
+    `dependencies` maps a task name to the names of the tasks it depends on;
+    names that are not in `tasks` are ignored. A task whose dependency failed
+    is not run and its result carries a `DependencyFailed` error.
+
+    Each task logs its start and finish, with timings, through its own
+    logger named `<logger_name>.<task name>`.
+
+    Returns:
+        the NodeResult of every task, keyed by task name
+    """
+    dependencies = {
+        name: [d for d in dependencies.get(name, ()) if d in tasks]
+        for name in tasks
+    }
+    results = {name: NodeResult(name) for name in tasks}
+    futures = {}
+
+    def run_node(name: str):
+        log = logging.getLogger(f"{logger_name}.{name}")
+        result = results[name]
+        for dep in dependencies[name]:
+            futures[dep].result()
+            if not results[dep].ok:
+                result.error = DependencyFailed(f"{name} skipped: {dep} failed")
+                log.warning(str(result.error))
+                return
+        result.started_at = time.monotonic()
+        log.info(f"{name} started")
+        try:
+            tasks[name]()
+        except Exception as ex:
+            result.error = ex
+            log.exception(f"{name} failed after {time.monotonic() - result.started_at:.1f}s")
+        finally:
+            result.finished_at = time.monotonic()
+        if result.error is None:
+            log.info(f"{name} finished in {result.seconds:.1f}s")
+
+    # Tasks are submitted in topological order, so the dependencies of a
+    # task are always dequeued before it and a bounded pool cannot deadlock.
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(tasks), 1)) as pool:
+        for name in _topological_order(tasks, dependencies):
+            futures[name] = pool.submit(run_node, name)
+    return results
+
+
+def reverse(dependencies: Dict[str, Iterable[str]]) -> Dict[str, list]:
+    """Returns the reversed dependency graph, e.g. to tear down resources in
+    the opposite order they were created in."""
+    reversed_dependencies = {}
+    for name, deps in dependencies.items():
+        for dep in deps:
+            reversed_dependencies.setdefault(dep, []).append(name)
+    return reversed_dependencies
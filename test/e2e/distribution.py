@@ -13,23 +13,22 @@
 
 """Utilities for working with Distribution resources"""
 
-import datetime
-import time
-
-import boto3
-import pytest
+from e2e import tagging, waiter
+from e2e.clients import get_cloudfront_client
 
 DEFAULT_WAIT_UNTIL_EXISTS_TIMEOUT_SECONDS = 60*10
 DEFAULT_WAIT_UNTIL_EXISTS_INTERVAL_SECONDS = 15
 DEFAULT_WAIT_UNTIL_DELETED_TIMEOUT_SECONDS = 60*10
 DEFAULT_WAIT_UNTIL_DELETED_INTERVAL_SECONDS = 15
+DEFAULT_WAIT_UNTIL_CHANGED_TIMEOUT_SECONDS = 60*5
+DEFAULT_WAIT_UNTIL_CHANGED_INTERVAL_SECONDS = 5
 
 
 def wait_until_exists(
         distribution_id: str,
         timeout_seconds: int = DEFAULT_WAIT_UNTIL_EXISTS_TIMEOUT_SECONDS,
         interval_seconds: int = DEFAULT_WAIT_UNTIL_EXISTS_INTERVAL_SECONDS,
-    ) -> None:
+    ) -> waiter.WaitResult:
     """Waits until a Distribution with a supplied name is returned from
     CloudFront GetDistribution API.
 
@@ -38,30 +37,25 @@ def wait_until_exists(
 
         wait_until_exists(distribution_id)
 
+    Returns:
+        a WaitResult with the number of polls and the seconds waited
+
     Raises:
         pytest.fail upon timeout
     """
-    now = datetime.datetime.now()
-    timeout = now + datetime.timedelta(seconds=timeout_seconds)
-
-    while True:
-        if datetime.datetime.now() >= timeout:
-            pytest.fail(
-                "Timed out waiting for Distribution to exist "
-                "in CloudFront API"
-            )
-        time.sleep(interval_seconds)
-
-        latest = get(distribution_id)
-        if latest is not None:
-            break
+    return waiter.wait_until_exists(
+        lambda: get(distribution_id),
+        "Distribution",
+        timeout_seconds=timeout_seconds,
+        max_interval_seconds=interval_seconds,
+    )
 
 
 def wait_until_deleted(
         distribution_id: str,
         timeout_seconds: int = DEFAULT_WAIT_UNTIL_DELETED_TIMEOUT_SECONDS,
         interval_seconds: int = DEFAULT_WAIT_UNTIL_DELETED_INTERVAL_SECONDS,
-    ) -> None:
+    ) -> waiter.WaitResult:
     """Waits until a Distribution with a supplied ID is no longer returned from
     the CloudFront API.
 
@@ -70,23 +64,48 @@ def wait_until_deleted(
 
         wait_until_deleted(distribution_id)
 
+    Returns:
+        a WaitResult with the number of polls and the seconds waited
+
     Raises:
         pytest.fail upon timeout
     """
-    now = datetime.datetime.now()
-    timeout = now + datetime.timedelta(seconds=timeout_seconds)
+    return waiter.wait_until_deleted(
+        lambda: get(distribution_id),
+        "Distribution",
+        timeout_seconds=timeout_seconds,
+        max_interval_seconds=interval_seconds,
+    )
+
 
-    while True:
-        if datetime.datetime.now() >= timeout:
-            pytest.fail(
-                "Timed out waiting for Distribution to be "
-                "deleted in CloudFront API"
-            )
-        time.sleep(interval_seconds)
+def wait_until_changed(
+        distribution_id: str,
+        since_etag: str,
+        timeout_seconds: int = DEFAULT_WAIT_UNTIL_CHANGED_TIMEOUT_SECONDS,
+        interval_seconds: int = DEFAULT_WAIT_UNTIL_CHANGED_INTERVAL_SECONDS,
+    ) -> waiter.WaitResult:
+    """Waits until the CloudFront API returns a version of a Distribution
+    other than `since_etag`, i.e. until an update has been applied.
 
-        latest = get(distribution_id)
-        if latest is None:
-            break
+    Usage:
+        from e2e.distribution import wait_until_changed
+
+        wait_until_changed(distribution_id, latest['ETag'])
+
+    Returns:
+        a WaitResult with the new record, the number of polls and the
+        seconds waited
+
+    Raises:
+        pytest.fail upon timeout
+    """
+    return waiter.wait_until_changed(
+        lambda: get(distribution_id),
+        "Distribution",
+        since_etag,
+        timeout_seconds=timeout_seconds,
+        max_interval_seconds=interval_seconds,
+    )
 
 
 def get(distribution_id):
@@ -95,10 +114,12 @@ def get(distribution_id):
 
     If no such Distribution exists, returns None.
     """
-    c = boto3.client('cloudfront')
+    c = get_cloudfront_client()
     try:
         resp = c.get_distribution(Id=distribution_id)
-        return resp['Distribution']
+        record = resp['Distribution']
+        record['ETag'] = resp['ETag']
+        return record
     except c.exceptions.NoSuchDistribution:
         return None
 
@@ -107,9 +128,4 @@ def get_tags(distribution_arn):
 
     If no such Distribution exists, returns None.
     """
-    c = boto3.client('cloudfront')
-    try:
-        resp = c.list_tags_for_resource(Resource=distribution_arn)
-        return resp['Tags']['Items']
-    except c.exceptions.NoSuchResource:
-        return None
\ No newline at end of file
+    return tagging.get_tags(distribution_arn)
\ No newline at end of file
@@ -0,0 +1,175 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Leases the pre-deployed distributions of the bootstrapped
+`DistributionPool` to tests.
+
+Creating a Distribution for a test and deleting it afterwards takes two
+global deployments. Instead, a test can lease a pooled distribution, which
+is disabled and deployed, and have its CR adopt it:
+
+    distribution_id = distribution_pool.lease()
+    if distribution_id is not None:
+        distribution_pool.adopt(resource_data, distribution_id)
+    k8s.create_custom_resource(ref, resource_data)
+    ...
+    k8s.delete_custom_resource(ref)
+    if not distribution_pool.release(distribution_id):
+        distribution.wait_until_deleted(distribution_id)
+
+The CR's spec is applied to the adopted distribution, which takes a single
+update deployment, and the CR is deleted with the `retain` policy, so the
+distribution survives it. On release, the distribution is returned to its
+baseline config and tags, without waiting for that to deploy; the next
+lease waits instead.
+
+Leases are exclusive across processes, e.g. pytest-xdist workers, through
+a lock file per distribution. When the pool is missing from the bootstrap,
+or all its distributions are leased, `lease` returns None and the test
+creates its own distribution.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import threading
+
+from typing import Dict, Optional
+
+from e2e import bootstrap_directory, waiter
+from e2e.clients import get_cloudfront_client
+from e2e.cloudfront_bootstrap import POOL_TAG_KEY, pooled_distribution_config
+from e2e.snapshot import get_bootstrap_snapshot
+
+LOCK_DIRECTORY = bootstrap_directory / ".distribution_pool"
+LEASE_TIMEOUT_SECONDS = 60 * 20
+LEASE_INTERVAL_SECONDS = 15
+
+ADOPTION_POLICY_ANNOTATION = "services.k8s.aws/adoption-policy"
+ADOPTION_FIELDS_ANNOTATION = "services.k8s.aws/adoption-fields"
+DELETION_POLICY_ANNOTATION = "services.k8s.aws/deletion-policy"
+
+_lock = threading.Lock()
+# Lock file descriptors of the leased distributions, by ID
+_leases: Dict[str, int] = {}
+
+
+def _pool():
+    try:
+        return get_bootstrap_snapshot().DistributionPool
+    except (AttributeError, FileNotFoundError):
+        return None
+
+
+def _try_lock(distribution_id: str) -> Optional[int]:
+    LOCK_DIRECTORY.mkdir(parents=True, exist_ok=True)
+    fd = os.open(LOCK_DIRECTORY / f"{distribution_id}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _unlock(fd: int):
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+def lease() -> Optional[str]:
+    """Leases a pooled distribution, once it is deployed, and returns its
+    ID. Returns None if no pooled distribution is available."""
+    pool = _pool()
+    if pool is None or not pool.distribution_ids:
+        return None
+    c = get_cloudfront_client()
+    for distribution_id in pool.distribution_ids:
+        with _lock:
+            if distribution_id in _leases:
+                continue
+            fd = _try_lock(distribution_id)
+            if fd is None:
+                continue
+            _leases[distribution_id] = fd
+        try:
+            waiter.wait_for(
+                lambda: c.get_distribution(Id=distribution_id)["Distribution"]["Status"],
+                lambda status: status == "Deployed",
+                f"pooled Distribution {distribution_id} to be deployed",
+                timeout_seconds=LEASE_TIMEOUT_SECONDS,
+                max_interval_seconds=LEASE_INTERVAL_SECONDS,
+            )
+        except (c.exceptions.NoSuchDistribution, waiter.WaitTimeoutError) as ex:
+            logging.warning(f"Skipping pooled Distribution {distribution_id}: {ex}")
+            _release_lock(distribution_id)
+            continue
+        logging.info(f"Leased pooled Distribution {distribution_id}")
+        return distribution_id
+    logging.info("No pooled Distribution available")
+    return None
+
+
+def adopt(resource_data: dict, distribution_id: str):
+    """Makes a Distribution CR adopt a leased distribution, apply its spec
+    to it, and leave it in place when the CR is deleted."""
+    annotations = resource_data.setdefault("metadata", {}).setdefault("annotations", {})
+    annotations[ADOPTION_POLICY_ANNOTATION] = "adopt-or-create"
+    annotations[ADOPTION_FIELDS_ANNOTATION] = json.dumps({"id": distribution_id})
+    annotations[DELETION_POLICY_ANNOTATION] = "retain"
+
+
+def _release_lock(distribution_id: str):
+    with _lock:
+        fd = _leases.pop(distribution_id, None)
+    if fd is not None:
+        _unlock(fd)
+
+
+def _reset(distribution_id: str):
+    """Returns a distribution to its baseline config and tags."""
+    pool = _pool()
+    c = get_cloudfront_client()
+    resp = c.get_distribution_config(Id=distribution_id)
+    baseline = pooled_distribution_config(
+        resp["DistributionConfig"]["CallerReference"], pool.bucket_domain_name,
+    )
+    c.update_distribution(Id=distribution_id, DistributionConfig=baseline, IfMatch=resp["ETag"])
+
+    # The CR's tags replaced the pool's tag while it was adopted
+    arn = c.get_distribution(Id=distribution_id)["Distribution"]["ARN"]
+    pool_tag = {"Key": POOL_TAG_KEY, "Value": pool.name_prefix}
+    current = c.list_tags_for_resource(Resource=arn)["Tags"]["Items"]
+    extra = [t["Key"] for t in current if t["Key"] != POOL_TAG_KEY]
+    if extra:
+        c.untag_resource(Resource=arn, TagKeys={"Items": extra})
+    if pool_tag not in current:
+        c.tag_resource(Resource=arn, Tags={"Items": [pool_tag]})
+
+
+def release(distribution_id: str) -> bool:
+    """Returns a leased distribution to the pool, once its CR is deleted.
+
+    Returns: False if the distribution was not leased, and so must be
+    deleted by the caller
+    """
+    with _lock:
+        if distribution_id not in _leases:
+            return False
+    try:
+        _reset(distribution_id)
+        logging.info(f"Returned pooled Distribution {distribution_id}")
+    finally:
+        _release_lock(distribution_id)
+    return True
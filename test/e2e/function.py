@@ -13,74 +13,87 @@
 
 """Utilities for working with Function resources"""
 
-import datetime
-import time
-
-import boto3
-import pytest
+from e2e import waiter
+from e2e.clients import get_cloudfront_client
 
 DEFAULT_WAIT_UNTIL_EXISTS_TIMEOUT_SECONDS = 60*10
 DEFAULT_WAIT_UNTIL_EXISTS_INTERVAL_SECONDS = 15
 DEFAULT_WAIT_UNTIL_DELETED_TIMEOUT_SECONDS = 60*10
 DEFAULT_WAIT_UNTIL_DELETED_INTERVAL_SECONDS = 15
+DEFAULT_WAIT_UNTIL_CHANGED_TIMEOUT_SECONDS = 60*5
+DEFAULT_WAIT_UNTIL_CHANGED_INTERVAL_SECONDS = 5
 
 
 def wait_until_exists(
         function_name: str,
         timeout_seconds: int = DEFAULT_WAIT_UNTIL_EXISTS_TIMEOUT_SECONDS,
         interval_seconds: int = DEFAULT_WAIT_UNTIL_EXISTS_INTERVAL_SECONDS,
-    ) -> None:
+    ) -> waiter.WaitResult:
     """Waits until a Function with a supplied name is returned from
     CloudFront GetFunction API.
     Usage:
         from e2e.function import wait_until_exists
         wait_until_exists(function_name)
+    Returns:
+        a WaitResult with the number of polls and the seconds waited
     Raises:
         pytest.fail upon timeout
     """
-    now = datetime.datetime.now()
-    timeout = now + datetime.timedelta(seconds=timeout_seconds)
-
-    while True:
-        if datetime.datetime.now() >= timeout:
-            pytest.fail(
-                "Timed out waiting for Function to exist "
-                "in CloudFront API"
-            )
-        time.sleep(interval_seconds)
-
-        latest = get(function_name)
-        if latest is not None:
-            break
+    return waiter.wait_until_exists(
+        lambda: get(function_name),
+        "Function",
+        timeout_seconds=timeout_seconds,
+        max_interval_seconds=interval_seconds,
+    )
 
 
 def wait_until_deleted(
         function_name: str,
         timeout_seconds: int = DEFAULT_WAIT_UNTIL_DELETED_TIMEOUT_SECONDS,
         interval_seconds: int = DEFAULT_WAIT_UNTIL_DELETED_INTERVAL_SECONDS,
-    ) -> None:
+    ) -> waiter.WaitResult:
     """Waits until a Function with a supplied ID is no longer returned from
     the CloudFront API.
     Usage:
         from e2e.function import wait_until_deleted
         wait_until_deleted(function_name)
+    Returns:
+        a WaitResult with the number of polls and the seconds waited
     Raises:
         pytest.fail upon timeout
     """
-    now = datetime.datetime.now()
-    timeout = now + datetime.timedelta(seconds=timeout_seconds)
+    return waiter.wait_until_deleted(
+        lambda: get(function_name),
+        "Function",
+        timeout_seconds=timeout_seconds,
+        max_interval_seconds=interval_seconds,
+    )
 
-    while True:
-        if datetime.datetime.now() >= timeout:
-            pytest.fail(
-                "Timed out waiting for Function to be "
-                "deleted in CloudFront API"
-            )
-        time.sleep(interval_seconds)
 
-        latest = get(function_name)
-        if latest is None:
-            break
+def wait_until_changed(
+        function_name: str,
+        since_etag: str,
+        timeout_seconds: int = DEFAULT_WAIT_UNTIL_CHANGED_TIMEOUT_SECONDS,
+        interval_seconds: int = DEFAULT_WAIT_UNTIL_CHANGED_INTERVAL_SECONDS,
+    ) -> waiter.WaitResult:
+    """Waits until the CloudFront API returns a version of a Function
+    other than `since_etag`, i.e. until an update has been applied.
+    Usage:
+        from e2e.function import wait_until_changed
+        wait_until_changed(function_name, latest['ETag'])
+    Returns:
+        a WaitResult with the new record, the number of polls and the
+        seconds waited
+    Raises:
+        pytest.fail upon timeout
+    """
+    return waiter.wait_until_changed(
+        lambda: get(function_name),
+        "Function",
+        since_etag,
+        timeout_seconds=timeout_seconds,
+        max_interval_seconds=interval_seconds,
+    )
 
 
 def get(function_name, stage="DEVELOPMENT"):
@@ -88,10 +101,13 @@ def get(function_name, stage="DEVELOPMENT"):
     API.
     If no such Function exists, returns None.
     """
-    c = boto3.client('cloudfront')
+    c = get_cloudfront_client()
     try:
         resp = c.describe_function(Name=function_name, Stage=stage)
-        return resp['FunctionSummary']
+        record = resp['FunctionSummary']
+        record['ETag'] = resp['ETag']
+        record['LastModifiedTime'] = record['FunctionMetadata']['LastModifiedTime']
+        return record
     except Exception:
         return None
 
@@ -0,0 +1,268 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Streams every CloudFront resource of the account, across all kinds.
+
+Each kind is listed through its List* API, one page at a time, and its
+summaries are yielded as `Item`s as soon as their page arrives, so that
+even accounts with thousands of resources are walked in constant memory.
+
+Usage:
+    from e2e import inventory
+
+    for item in inventory.stream(["CachePolicy", "Distribution"]):
+        print(item.kind, item.id, item.name)
+
+`index` keeps only the name, ETag and status of each resource, which is
+enough to tell which resources a test session left behind.
+"""
+
+import datetime
+import queue
+import threading
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from e2e import api_profiler
+from e2e.clients import get_cloudfront_client
+
+# Page size requested from the List* APIs
+PAGE_SIZE = 100
+
+
+@dataclass
+class Item:
+    kind: str
+    id: str
+    name: str
+    arn: Optional[str] = None
+    # When the resource was created or, if CloudFront does not say, last
+    # modified. None for kinds without timestamps.
+    timestamp: Optional[datetime.datetime] = None
+    # Other identifying strings, e.g. the origin domains of a Distribution
+    labels: List[str] = field(default_factory=list)
+    summary: dict = field(default_factory=dict, repr=False)
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}/{self.id}"
+
+
+class Entry(NamedTuple):
+    """What an index keeps of a resource."""
+    name: str
+    etag: Optional[str]
+    status: Optional[str]
+
+
+# Entries of every resource, keyed by kind then ID
+Index = Dict[str, Dict[str, Entry]]
+
+
+class Lister(NamedTuple):
+    # Client method that lists the kind
+    operation: str
+    # Extra parameters of the List* call
+    params: dict
+    # Returns the container of the items and the next page marker
+    page: Callable[[dict], tuple]
+    # Builds an Item from a summary
+    item: Callable[[dict], Item]
+
+
+def _marker_list(key: str):
+    def page(resp: dict) -> tuple:
+        container = resp.get(key, {})
+        return container.get("Items", []) or [], container.get("NextMarker")
+    return page
+
+
+def _top_level_list(key: str):
+    def page(resp: dict) -> tuple:
+        return resp.get(key, []) or [], resp.get("NextMarker")
+    return page
+
+
+def _distribution(s: dict) -> Item:
+    origins = s.get("Origins", {}).get("Items", []) or []
+    return Item(
+        "Distribution", s["Id"], s.get("Comment", ""), s.get("ARN"),
+        s.get("LastModifiedTime"),
+        labels=[o["DomainName"] for o in origins],
+        summary=s,
+    )
+
+
+def _named(kind: str, arn_key: str = "Arn", time_key: str = "CreatedTime"):
+    def item(s: dict) -> Item:
+        return Item(kind, s["Id"], s.get("Name", ""), s.get(arn_key), s.get(time_key), summary=s)
+    return item
+
+
+def _policy(kind: str):
+    def item(s: dict) -> Item:
+        policy = s[kind]
+        return Item(
+            kind, policy["Id"], policy[f"{kind}Config"]["Name"],
+            timestamp=policy.get("LastModifiedTime"), summary=s,
+        )
+    return item
+
+
+def _function(s: dict) -> Item:
+    metadata = s.get("FunctionMetadata", {})
+    return Item(
+        "Function", s["Name"], s["Name"], metadata.get("FunctionARN"),
+        metadata.get("CreatedTime"), summary=s,
+    )
+
+
+LISTERS: Dict[str, Lister] = {
+    "DistributionTenant": Lister(
+        "list_distribution_tenants", {}, _top_level_list("DistributionTenantList"),
+        _named("DistributionTenant"),
+    ),
+    "Distribution": Lister(
+        "list_distributions", {}, _marker_list("DistributionList"), _distribution,
+    ),
+    "ConnectionGroup": Lister(
+        "list_connection_groups", {}, _top_level_list("ConnectionGroups"),
+        _named("ConnectionGroup"),
+    ),
+    "VpcOrigin": Lister(
+        "list_vpc_origins", {}, _marker_list("VpcOriginList"), _named("VpcOrigin"),
+    ),
+    "CachePolicy": Lister(
+        "list_cache_policies", {"Type": "custom"}, _marker_list("CachePolicyList"),
+        _policy("CachePolicy"),
+    ),
+    "OriginRequestPolicy": Lister(
+        "list_origin_request_policies", {"Type": "custom"},
+        _marker_list("OriginRequestPolicyList"), _policy("OriginRequestPolicy"),
+    ),
+    "ResponseHeadersPolicy": Lister(
+        "list_response_headers_policies", {"Type": "custom"},
+        _marker_list("ResponseHeadersPolicyList"), _policy("ResponseHeadersPolicy"),
+    ),
+    "OriginAccessControl": Lister(
+        "list_origin_access_controls", {}, _marker_list("OriginAccessControlList"),
+        lambda s: Item("OriginAccessControl", s["Id"], s.get("Name", ""), summary=s),
+    ),
+    "Function": Lister(
+        "list_functions", {}, _marker_list("FunctionList"), _function,
+    ),
+}
+KINDS = tuple(LISTERS)
+
+
+def iter_kind(kind: str, page_size: int = PAGE_SIZE) -> Iterator[Item]:
+    """Yields every resource of a kind, fetching one page at a time."""
+    lister = LISTERS[kind]
+    c = get_cloudfront_client()
+    list_fn = getattr(c, lister.operation)
+    # Older List* APIs take MaxItems as a string, newer ones as an integer
+    max_items_shape = c.meta.service_model.operation_model(
+        c.meta.method_to_api_mapping[lister.operation],
+    ).input_shape.members["MaxItems"]
+    max_items = page_size if max_items_shape.type_name == "integer" else str(page_size)
+    marker = None
+    while True:
+        params = dict(lister.params, MaxItems=max_items)
+        if marker:
+            params["Marker"] = marker
+        summaries, marker = lister.page(list_fn(**params))
+        for summary in summaries:
+            yield lister.item(summary)
+        if not marker:
+            return
+
+
+_DONE = object()
+
+
+def stream(kinds: Iterable[str] = KINDS, page_size: int = PAGE_SIZE) -> Iterator[Item]:
+    """Yields every resource of the given kinds as its page arrives.
+
+    The kinds are listed concurrently, each by its own thread, so the items
+    of different kinds are interleaved. A listing error is raised once the
+    items fetched before it have been yielded.
+    """
+    kinds = list(kinds)
+    # Bounded, so that slow consumers hold back the listing threads
+    items: queue.Queue = queue.Queue(maxsize=page_size * 2)
+    errors: List[BaseException] = []
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def list_kind(kind: str):
+        try:
+            for item in iter_kind(kind, page_size):
+                if not put(item):
+                    return
+        except BaseException as ex:
+            errors.append(ex)
+        finally:
+            put(_DONE)
+
+    threads = [
+        threading.Thread(
+            target=api_profiler.in_current_scope(list_kind), args=(kind,),
+            name=f"inventory-{kind}", daemon=True,
+        )
+        for kind in kinds
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        remaining = len(threads)
+        while remaining:
+            item = items.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        stop.set()
+    if errors:
+        raise errors[0]
+
+
+def index(kinds: Iterable[str] = KINDS, page_size: int = PAGE_SIZE) -> Index:
+    """Returns a compact index of every resource of the given kinds, built
+    from a single listing of each."""
+    result: Index = {kind: {} for kind in kinds}
+    for item in stream(kinds, page_size):
+        result[item.kind][item.id] = Entry(
+            item.name, item.summary.get("ETag"), item.summary.get("Status"),
+        )
+    return result
+
+
+def added(before: Index, after: Index) -> Index:
+    """Returns the entries of `after` whose resources are not in `before`."""
+    result: Index = {}
+    for kind, entries in after.items():
+        known = before.get(kind, {})
+        new = {i: e for i, e in entries.items() if i not in known}
+        if new:
+            result[kind] = new
+    return result
@@ -0,0 +1,119 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Reports the CloudFront resources a test session leaves behind.
+
+At session start, an index of every resource kind the controller manages is
+taken in the background (see `e2e.inventory.index`). At session end, after
+every fixture was torn down, a second index is taken and the resources that
+were not in the first are reported, as a warning or as a session failure.
+The resources recorded in the bootstrap file are left out, since the
+bootstrap may create them after the first index was taken:
+
+    pytest --leak-check=fail tests/
+
+Under pytest-xdist, only the controller process checks, around the whole
+run. Resources created meanwhile by anything else in the account show up
+too. Leaks can be removed with `python -m e2e.service_sweep`.
+"""
+
+import logging
+import threading
+
+from typing import Optional, Set
+
+import pytest
+
+from e2e import api_profiler, inventory, service_sweep
+
+MODES = ("off", "warn", "fail")
+DEFAULT_MODE = "warn"
+
+
+def unprotected(index: inventory.Index, protected: Set[str]) -> inventory.Index:
+    """Returns the entries of an index whose ID and name are not in
+    `protected`."""
+    result: inventory.Index = {}
+    for kind, entries in index.items():
+        kept = {
+            i: e for i, e in entries.items() if i not in protected and e.name not in protected
+        }
+        if kept:
+            result[kind] = kept
+    return result
+
+
+class LeakCheckPlugin:
+    def __init__(self, fail: bool):
+        self.fail = fail
+        self.before: Optional[inventory.Index] = None
+        self.leaks: Optional[inventory.Index] = None
+        self.error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _take_before(self):
+        try:
+            self.before = inventory.index()
+        except BaseException as ex:
+            self.error = ex
+
+    def pytest_sessionstart(self, session):
+        # Overlaps with collection and the bootstrap, whose resources are
+        # left out at the end
+        self._thread = threading.Thread(
+            target=api_profiler.background(self._take_before), name="leak-check", daemon=True,
+        )
+        self._thread.start()
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_sessionfinish(self, session):
+        self._thread.join()
+        if self.error is None:
+            try:
+                self.leaks = unprotected(
+                    inventory.added(self.before, inventory.index()),
+                    service_sweep.protected_identifiers(),
+                )
+            except BaseException as ex:
+                self.error = ex
+        if self.error is not None:
+            logging.warning(f"Could not check for leaked resources: {self.error}")
+            return
+        if self.leaks and self.fail and session.exitstatus == pytest.ExitCode.OK:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.error is not None:
+            terminalreporter.write_sep("-", f"Leak check failed: {self.error}", yellow=True)
+            return
+        if not self.leaks:
+            return
+        count = sum(len(entries) for entries in self.leaks.values())
+        terminalreporter.write_sep(
+            "-", f"{count} CloudFront resources leaked", red=self.fail, yellow=not self.fail,
+        )
+        for kind, entries in sorted(self.leaks.items()):
+            for resource_id, entry in sorted(entries.items()):
+                terminalreporter.write_line(
+                    f"{kind:<24} {resource_id:<30} {entry.name} ({entry.status or '-'})"
+                )
+        terminalreporter.write_line("Remove them with: python -m e2e.service_sweep --min-age-hours 0")
+
+
+def register(config):
+    """Checks for leaks in the controller process, unless `--leak-check=off`
+    was given or API calls are replayed."""
+    mode = config.getoption("--leak-check")
+    if mode == "off" or config.getoption("--vcr") == "replay" or hasattr(config, "workerinput"):
+        return
+    config.pluginmanager.register(LeakCheckPlugin(fail=mode == "fail"), "e2e-leak-check")
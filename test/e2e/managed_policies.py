@@ -0,0 +1,166 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Resolves the IDs of CloudFront managed policies by name.
+
+The managed cache, origin request and response headers policy catalogs are
+fetched once per process, concurrently and across all pages, and indexed by
+policy name. The index is also cached on disk for `CATALOG_TTL_SECONDS`, so
+later runs resolve names without calling CloudFront at all.
+
+Set `MANAGED_POLICIES_CATALOG` to the path of a recorded catalog to resolve
+names offline; a recorded catalog never expires.
+
+Usage:
+    from e2e import managed_policies
+
+    policy_id = managed_policies.cache_policy_id("Managed-CachingOptimized")
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from e2e import bootstrap_directory
+from e2e.clients import get_cloudfront_client
+
+CATALOG_FILE = bootstrap_directory / "managed_policies.json"
+CATALOG_TTL_SECONDS = 60 * 60 * 24
+CATALOG_ENV_VAR = "MANAGED_POLICIES_CATALOG"
+
+# Maps each policy kind to the operation that lists it
+POLICY_LIST_OPERATIONS = {
+    "CachePolicy": "list_cache_policies",
+    "OriginRequestPolicy": "list_origin_request_policies",
+    "ResponseHeadersPolicy": "list_response_headers_policies",
+}
+
+_lock = threading.Lock()
+_catalog: Optional[Dict[str, Dict[str, str]]] = None
+
+
+def _fetch_kind(kind: str) -> Dict[str, str]:
+    list_fn = getattr(get_cloudfront_client(), POLICY_LIST_OPERATIONS[kind])
+    ids = {}
+    marker = None
+    while True:
+        kwargs = {"Type": "managed"}
+        if marker:
+            kwargs["Marker"] = marker
+        policy_list = list_fn(**kwargs)[f"{kind}List"]
+        for item in policy_list.get("Items", []):
+            policy = item[kind]
+            ids[policy[f"{kind}Config"]["Name"]] = policy["Id"]
+        marker = policy_list.get("NextMarker")
+        if not marker:
+            return ids
+
+
+def fetch() -> Dict[str, Dict[str, str]]:
+    """Lists every managed policy catalog from CloudFront, concurrently.
+
+    Returns:
+        the policy IDs keyed by policy kind, then by policy name
+    """
+    with ThreadPoolExecutor(max_workers=len(POLICY_LIST_OPERATIONS)) as pool:
+        futures = {kind: pool.submit(_fetch_kind, kind) for kind in POLICY_LIST_OPERATIONS}
+        return {kind: future.result() for kind, future in futures.items()}
+
+
+def _read_catalog(path: Path, ttl_seconds: Optional[float]):
+    """Returns the catalog recorded at `path`, or None if it is missing,
+    expired, or truncated or otherwise malformed."""
+    try:
+        with open(path) as f:
+            recorded = json.load(f)
+        fetched_at = float(recorded["fetched_at"])
+        policies = recorded["policies"]
+        if not all(isinstance(policies[kind], dict) for kind in POLICY_LIST_OPERATIONS):
+            raise ValueError("policy kinds are not mappings")
+    except (OSError, ValueError, KeyError, TypeError) as ex:
+        if not isinstance(ex, FileNotFoundError):
+            logging.warning(f"Ignoring unreadable managed policy catalog {path}: {ex}")
+        return None
+    if ttl_seconds is not None and time.time() - fetched_at > ttl_seconds:
+        return None
+    return policies
+
+
+def _write_catalog(path: Path, catalog: Dict[str, Dict[str, str]]):
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump({"fetched_at": time.time(), "policies": catalog}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+    except OSError as ex:
+        tmp_path.unlink(missing_ok=True)
+        logging.warning(f"Could not cache managed policies in {path}: {ex}")
+
+
+def get_catalog() -> Dict[str, Dict[str, str]]:
+    """Returns the managed policy IDs keyed by policy kind, then by policy
+    name, fetching them on first use unless a cached catalog is fresh."""
+    global _catalog
+    with _lock:
+        if _catalog is not None:
+            return _catalog
+
+        recorded_path = os.environ.get(CATALOG_ENV_VAR)
+        if recorded_path:
+            _catalog = _read_catalog(Path(recorded_path), ttl_seconds=None)
+            if _catalog is None:
+                raise FileNotFoundError(f"No valid managed policy catalog at {recorded_path}")
+            return _catalog
+
+        _catalog = _read_catalog(CATALOG_FILE, ttl_seconds=CATALOG_TTL_SECONDS)
+        if _catalog is None:
+            _catalog = fetch()
+            _write_catalog(CATALOG_FILE, _catalog)
+        return _catalog
+
+
+def policy_id(kind: str, name: str) -> str:
+    """Returns the ID of the managed policy of the given kind and name.
+
+    Raises:
+        KeyError if there is no such managed policy.
+    """
+    ids = get_catalog()[kind]
+    if name not in ids:
+        raise KeyError(f"Managed {kind} {name} not found")
+    return ids[name]
+
+
+def cache_policy_id(name: str) -> str:
+    return policy_id("CachePolicy", name)
+
+
+def origin_request_policy_id(name: str) -> str:
+    return policy_id("OriginRequestPolicy", name)
+
+
+def response_headers_policy_id(name: str) -> str:
+    return policy_id("ResponseHeadersPolicy", name)
+
+
+def reset():
+    """Forgets the in-memory catalog. The on-disk cache is kept."""
+    global _catalog
+    with _lock:
+        _catalog = None
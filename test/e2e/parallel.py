@@ -0,0 +1,193 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Support for running the e2e suite across pytest-xdist workers.
+
+    pytest -n 4 tests/
+
+- Every worker creates its custom resources in its own namespace and tags
+  their names with its worker ID, so workers never collide and leftovers
+  can be traced back to a worker.
+- The shared bootstrap is guarded by a file lock. With `--bootstrap`,
+  exactly one worker bootstraps (or resumes) it while the others wait.
+- Test modules are distributed whole (fixtures are module-scoped), slowest
+  first. Test durations are merged into the recorded ones after every run,
+  and modules without any fall back to `DEFAULT_MODULE_SECONDS`, so the
+  long Distribution and VpcOrigin waits start right away instead of
+  trailing at the end of the run. Runs without xdist keep their order.
+"""
+
+import json
+import logging
+import os
+
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from acktest.resources import random_suffix_name
+
+from e2e import bootstrap_directory, vcr
+
+DEFAULT_NAMESPACE = "default"
+NAMESPACE_PREFIX = "ack-cf-e2e"
+
+DURATIONS_FILE = bootstrap_directory / ".test_durations.json"
+
+# Rough module durations used until a run has recorded real ones
+DEFAULT_MODULE_SECONDS = {
+    "test_distribution.py": 1800,
+    "test_vpc_origin.py": 1500,
+    "test_distribution_tenant.py": 900,
+    "test_connection_group.py": 900,
+}
+UNKNOWN_MODULE_SECONDS = 120
+
+
+def worker_id() -> Optional[str]:
+    """Returns the ID of the current xdist worker, e.g. "gw0", or None when
+    not running under xdist."""
+    return os.environ.get("PYTEST_XDIST_WORKER")
+
+
+def namespace() -> str:
+    """Returns the namespace the current worker creates resources in."""
+    worker = worker_id()
+    if worker is None:
+        return DEFAULT_NAMESPACE
+    return f"{NAMESPACE_PREFIX}-{worker}"
+
+
+def random_name(prefix: str, max_length: int) -> str:
+    """Like `random_suffix_name`, but tags the name with the worker ID. The
+    random part keeps its length, so the name grows by the tag. The name is
+    numbered in the active cassette when recording or replaying."""
+    worker = worker_id()
+    if worker is None:
+        name = random_suffix_name(prefix, max_length)
+    else:
+        tagged = f"{prefix}-{worker}"
+        name = random_suffix_name(tagged, max_length + len(tagged) - len(prefix))
+    vcr.learn(name)
+    return name
+
+
+def create_namespace(api_client, name: str):
+    from kubernetes import client
+    from kubernetes.client.rest import ApiException
+
+    try:
+        client.CoreV1Api(api_client).create_namespace(
+            client.V1Namespace(metadata=client.V1ObjectMeta(name=name))
+        )
+        logging.info(f"Created namespace {name}")
+    except ApiException as ex:
+        if ex.status != 409:
+            raise
+
+
+def delete_namespace(api_client, name: str):
+    from kubernetes import client
+    from kubernetes.client.rest import ApiException
+
+    try:
+        client.CoreV1Api(api_client).delete_namespace(name)
+    except ApiException as ex:
+        if ex.status != 404:
+            raise
+
+
+def ensure_bootstrapped():
+    """Bootstraps the shared resources, or resumes an interrupted bootstrap,
+    unless they are already bootstrapped. Safe to call from every worker:
+    one of them bootstraps while the others wait on the lock."""
+    from e2e.snapshot import Snapshot, lock
+
+    with lock(bootstrap_directory):
+        if Snapshot.exists(bootstrap_directory) and Snapshot.load(bootstrap_directory).complete:
+            return
+        from e2e.service_bootstrap import service_bootstrap
+
+        service_bootstrap().serialize(bootstrap_directory)
+
+
+def module_of(nodeid: str) -> str:
+    return os.path.basename(nodeid.split("::", 1)[0])
+
+
+def load_test_durations() -> Dict[str, float]:
+    """Returns the recorded durations of the tests, keyed by node ID."""
+    try:
+        with open(DURATIONS_FILE) as f:
+            recorded = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(recorded, dict):
+        return {}
+    return {k: v for k, v in recorded.items() if "::" in k and isinstance(v, (int, float))}
+
+
+def load_durations() -> Dict[str, float]:
+    """Returns the duration of every module: the sum of its recorded tests,
+    or a default for modules without any."""
+    totals = defaultdict(float)
+    for nodeid, seconds in load_test_durations().items():
+        totals[module_of(nodeid)] += seconds
+    durations = dict(DEFAULT_MODULE_SECONDS)
+    durations.update(totals)
+    return durations
+
+
+def record_durations(reports: List):
+    """Merges the durations of the tests that ran into the recorded ones.
+    Tests that did not run, e.g. deselected with `-k` or not reached by an
+    aborted run, keep their previous durations."""
+    ran = defaultdict(float)
+    for report in reports:
+        ran[report.nodeid] += report.duration
+    if not ran:
+        return
+    durations = load_test_durations()
+    durations.update(ran)
+    tmp_path = DURATIONS_FILE.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(durations, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, DURATIONS_FILE)
+    except OSError as ex:
+        tmp_path.unlink(missing_ok=True)
+        logging.warning(f"Could not record test durations: {ex}")
+
+
+def sort_slowest_first(items: List):
+    """Reorders the collected items so that the slowest modules come first,
+    keeping the order of the items within each module. Only worth it under
+    xdist, where it decides which modules start first."""
+    durations = load_durations()
+    first_index = {}
+    for i, item in enumerate(items):
+        first_index.setdefault(module_of(item.nodeid), i)
+    items.sort(key=lambda item: (
+        -durations.get(module_of(item.nodeid), UNKNOWN_MODULE_SECONDS),
+        first_index[module_of(item.nodeid)],
+    ))
+
+
+def make_scheduler(config, log):
+    """Distributes whole modules in collection order, which
+    `sort_slowest_first` made slowest first."""
+    from xdist.scheduler import LoadFileScheduling
+
+    # Newer xdist versions reorder modules by test count unless told not to
+    if hasattr(config.option, "loadscopereorder"):
+        config.option.loadscopereorder = False
+    return LoadFileScheduling(config, log)
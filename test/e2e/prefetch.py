@@ -0,0 +1,134 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Creates the resources of slow fixtures in the background, from the start
+of the session.
+
+Some module-scoped fixtures create a resource that takes 10-15 minutes to
+deploy. Left to pytest, these creates run one after another, each when its
+module is reached. A test module can instead register the create and delete
+functions of such a fixture here. At session start, the creates of every
+registered fixture that a selected test uses are started in background
+threads, and the fixture only awaits its result:
+
+    def create_simple_distribution():
+        ...
+        return (ref, cr, distribution_id)
+
+    def delete_simple_distribution(value):
+        ...
+
+    prefetch.register("simple_distribution", create_simple_distribution, delete_simple_distribution)
+
+    @pytest.fixture(scope="module")
+    def simple_distribution():
+        with prefetch.claim("simple_distribution") as value:
+            yield value
+
+Under pytest-xdist, a worker does not know in advance which modules it will
+run, so nothing is prefetched; the scheduler starts the slowest modules
+first instead. With `--vcr`, nothing is prefetched either, so that every
+create is recorded in, and replayed from, its module's cassette.
+
+Resources that were prefetched but never claimed, e.g. because the session
+was interrupted, are deleted at the end of the session.
+"""
+
+import logging
+import threading
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional
+
+from e2e import api_profiler, reaper
+
+
+class SlowFixture(NamedTuple):
+    create: Callable[[], Any]
+    delete: Callable[[Any], None]
+
+
+_lock = threading.Lock()
+_fixtures: Dict[str, SlowFixture] = {}
+_futures: Dict[str, Future] = {}
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def register(name: str, create: Callable[[], Any], delete: Callable[[Any], None]):
+    """Registers the create and delete functions of the fixture `name`."""
+    with _lock:
+        _fixtures[name] = SlowFixture(create, delete)
+
+
+def start(names: Iterable[str]):
+    """Starts creating the resources of the registered fixtures among
+    `names`, each in its own thread."""
+    global _executor
+    with _lock:
+        names = [n for n in dict.fromkeys(names) if n in _fixtures and n not in _futures]
+        if not names:
+            return
+        if _executor is None:
+            _executor = ThreadPoolExecutor(thread_name_prefix="prefetch")
+        for name in names:
+            logging.info(f"Prefetching fixture {name}")
+            _futures[name] = _executor.submit(api_profiler.background(_fixtures[name].create))
+
+
+def used_fixtures(items) -> Iterable[str]:
+    """Returns the names of the registered fixtures used by the test items
+    that are not skipped."""
+    for item in items:
+        if item.get_closest_marker("skip") is not None:
+            continue
+        for name in getattr(item, "fixturenames", ()):
+            if name in _fixtures:
+                yield name
+
+
+@contextmanager
+def claim(name: str):
+    """Yields the value of a registered fixture, awaiting its prefetch or
+    creating it now, and hands its deletion to `e2e.reaper` on exit."""
+    with _lock:
+        future = _futures.pop(name, None)
+        fixture = _fixtures[name]
+    value = future.result() if future is not None else fixture.create()
+    try:
+        yield value
+    finally:
+        reaper.reap(name, fixture.delete, value)
+
+
+def finish():
+    """Hands the deletion of the resources that were prefetched but never
+    claimed to `e2e.reaper`."""
+    global _executor
+    with _lock:
+        unclaimed = dict(_futures)
+        _futures.clear()
+        executor, _executor = _executor, None
+    for name, future in unclaimed.items():
+        try:
+            value = future.result()
+        except BaseException as ex:
+            logging.warning(f"Prefetch of unclaimed fixture {name} failed: {ex}")
+            continue
+        logging.info(f"Deleting unclaimed fixture {name}")
+        try:
+            reaper.reap(f"unclaimed fixture {name}", _fixtures[name].delete, value)
+        except BaseException as ex:
+            logging.warning(f"Could not delete unclaimed fixture {name}: {ex}")
+    if executor is not None:
+        executor.shutdown(wait=True)
@@ -0,0 +1,291 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Tracks how long CloudFront resources take to deploy, across runs.
+
+Every Distribution, ConnectionGroup, VpcOrigin and DistributionTenant the
+harness reads or writes goes through a deployment cycle, from the moment
+its CR is applied until CloudFront reports it Deployed. For each cycle,
+the tracker timestamps:
+
+    applied       the CR was created, or its spec last changed
+    synced        the controller marked the CR ACK.ResourceSynced
+    in_progress   the harness first saw the resource InProgress
+    deployed      the harness first saw it Deployed again
+
+The CloudFront statuses come from the responses of every client in
+`e2e.clients`, so the bootstrap and all helper pollers feed the tracker.
+The CR timestamps are taken from the CRs returned by `e2e.cr_watch`, and
+are set by the API server, to the second. Resources created outside of
+Kubernetes, such as the bootstrapped ones, have no CR timestamps.
+
+Completed cycles are appended to `SAMPLES_FILE`, one JSON line each, and
+kept across runs. To render per-kind latency histograms and suggested
+waiter timeouts:
+
+    python -m e2e.propagation [--kind Distribution] [--days 30]
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from e2e import bootstrap_directory, clients
+
+SAMPLES_FILE = bootstrap_directory / ".propagation.jsonl"
+
+# Resource kinds, as keyed in CloudFront responses, and the key of their ARN
+TRACKED_KINDS = {
+    "Distribution": "ARN",
+    "ConnectionGroup": "Arn",
+    "VpcOrigin": "Arn",
+    "DistributionTenant": "Arn",
+}
+IN_PROGRESS = "InProgress"
+DEPLOYED = "Deployed"
+
+EVENTS = ("applied", "synced", "in_progress", "deployed")
+# Intervals reported for each kind, between two events
+INTERVALS = (
+    ("applied", "synced"),
+    ("synced", "deployed"),
+    ("in_progress", "deployed"),
+    ("applied", "deployed"),
+)
+# Upper bounds of the histogram buckets, in seconds
+BUCKETS = (5, 10, 20, 30, 60, 120, 180, 300, 600, 900, 1200, 1800, math.inf)
+# Suggested waiter timeouts are the 99th percentile times this factor
+TIMEOUT_MARGIN = 1.5
+
+
+def _parse_k8s_time(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    return datetime.datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(
+        tzinfo=datetime.timezone.utc,
+    ).timestamp()
+
+
+def cr_applied_at(cr: dict) -> Optional[float]:
+    """Returns when the spec of a CR last changed: the latest update of its
+    managed fields outside the status, or else its creation."""
+    metadata = cr.get("metadata", {})
+    times = [
+        _parse_k8s_time(entry.get("time"))
+        for entry in metadata.get("managedFields", []) or []
+        if entry.get("subresource") != "status" and "f:spec" in (entry.get("fieldsV1") or {})
+    ]
+    times = [t for t in times if t is not None]
+    return max(times) if times else _parse_k8s_time(metadata.get("creationTimestamp"))
+
+
+def cr_synced_at(cr: dict) -> Optional[float]:
+    for condition in cr.get("status", {}).get("conditions", []) or []:
+        if condition.get("type") == "ACK.ResourceSynced" and condition.get("status") == "True":
+            return _parse_k8s_time(condition.get("lastTransitionTime"))
+    return None
+
+
+class Tracker:
+    def __init__(self, samples_file: Path = SAMPLES_FILE):
+        self.samples_file = Path(samples_file)
+        self.run_id = f"{int(time.time())}-{os.getpid()}"
+        self._lock = threading.Lock()
+        # Open cycles keyed by ARN
+        self._cycles: Dict[str, dict] = {}
+        # When the CR of the last completed cycle was applied, by ARN
+        self._completed: Dict[str, float] = {}
+
+    def _cycle(self, arn: str, kind: str, name: str) -> dict:
+        cycle = self._cycles.get(arn)
+        if cycle is None:
+            cycle = {"kind": kind, "name": name, "arn": arn, "run": self.run_id}
+            cycle.update({event: None for event in EVENTS})
+            self._cycles[arn] = cycle
+        return cycle
+
+    def observe_status(self, kind: str, arn: str, name: str, status: str, at: Optional[float] = None):
+        """Records a CloudFront status of a resource."""
+        at = at or time.time()
+        with self._lock:
+            if status == IN_PROGRESS:
+                cycle = self._cycle(arn, kind, name)
+                if cycle["in_progress"] is None:
+                    cycle["in_progress"] = at
+            elif status == DEPLOYED:
+                cycle = self._cycles.get(arn)
+                if cycle is None or (cycle["in_progress"] is None and cycle["applied"] is None):
+                    return
+                cycle["deployed"] = at
+                del self._cycles[arn]
+                if cycle["applied"] is not None:
+                    self._completed[arn] = cycle["applied"]
+            else:
+                return
+        if status == DEPLOYED:
+            self._write(cycle)
+
+    def observe_cr(self, cr: dict):
+        """Records when a CR was applied and synced, if CloudFront has not
+        yet been seen to deploy its latest change."""
+        arn = cr.get("status", {}).get("ackResourceMetadata", {}).get("arn")
+        applied_at = cr_applied_at(cr)
+        if not arn or applied_at is None:
+            return
+        with self._lock:
+            if applied_at <= self._completed.get(arn, -math.inf):
+                return
+            cycle = self._cycle(arn, cr.get("kind", ""), cr["metadata"]["name"])
+            if cycle["applied"] is None or applied_at > cycle["applied"]:
+                cycle["applied"] = applied_at
+                cycle["synced"] = None
+            synced_at = cr_synced_at(cr)
+            if synced_at is not None and synced_at >= applied_at:
+                cycle["synced"] = synced_at
+
+    def _write(self, cycle: dict):
+        line = json.dumps(cycle, separators=(",", ":")) + "\n"
+        try:
+            # Appends of a single short line do not interleave across
+            # processes
+            with open(self.samples_file, "a") as f:
+                f.write(line)
+        except OSError as ex:
+            logging.warning(f"Could not record propagation sample to {self.samples_file}: {ex}")
+
+    def attach(self, client):
+        """Observes the resource statuses in a botocore client's responses.
+        Registered as a client hook."""
+        if client.meta.service_model.service_name == "cloudfront":
+            client.meta.events.register("after-call", self._after_call)
+
+    def _after_call(self, http_response, parsed, **kwargs):
+        if http_response.status_code >= 300:
+            return
+        for kind, arn_key in TRACKED_KINDS.items():
+            resource = parsed.get(kind)
+            if not isinstance(resource, dict) or arn_key not in resource:
+                continue
+            name = resource.get("Name") or resource.get("VpcOriginEndpointConfig", {}).get("Name") or resource.get("Id")
+            self.observe_status(kind, resource[arn_key], name, resource.get("Status"))
+
+
+_tracker: Optional[Tracker] = None
+
+
+def install(samples_file: Path = SAMPLES_FILE) -> Tracker:
+    """Tracks the resources seen by every client from `e2e.clients`."""
+    global _tracker
+    _tracker = Tracker(samples_file)
+    clients.register_client_hook(_tracker.attach)
+    return _tracker
+
+
+def observe_cr(cr: Optional[dict]):
+    """Records the apply and sync times of a CR, if tracking is installed."""
+    if _tracker is not None and cr:
+        _tracker.observe_cr(cr)
+
+
+def load_samples(samples_file: Path = SAMPLES_FILE, since: Optional[float] = None) -> List[dict]:
+    samples = []
+    try:
+        with open(samples_file) as f:
+            for line in f:
+                try:
+                    sample = json.loads(line)
+                except ValueError:
+                    continue
+                if since is None or (sample.get("deployed") or 0) >= since:
+                    samples.append(sample)
+    except FileNotFoundError:
+        pass
+    return samples
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    rank = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def durations(samples: List[dict]) -> Dict[str, Dict[str, List[float]]]:
+    """Returns the sorted durations of each interval, keyed by kind."""
+    result = defaultdict(lambda: defaultdict(list))
+    for sample in samples:
+        for start, end in INTERVALS:
+            if sample.get(start) is not None and sample.get(end) is not None:
+                result[sample["kind"]][f"{start}->{end}"].append(max(0.0, sample[end] - sample[start]))
+    for intervals in result.values():
+        for values in intervals.values():
+            values.sort()
+    return result
+
+
+def histogram(values: List[float], width: int = 40) -> List[str]:
+    counts = [0] * len(BUCKETS)
+    for value in values:
+        counts[next(i for i, bound in enumerate(BUCKETS) if value <= bound)] += 1
+    peak = max(counts) or 1
+    used = [i for i, count in enumerate(counts) if count]
+    lines = []
+    for i in range(used[0], used[-1] + 1) if used else ():
+        lower, bound, count = (BUCKETS[i - 1] if i else 0), BUCKETS[i], counts[i]
+        label = f"{lower:>5g}-{bound:<5g}s" if bound != math.inf else f"{lower:>5g}+     s"
+        lines.append(f"    {label} {count:>5} {'#' * math.ceil(count / peak * width)}")
+    return lines
+
+
+def report(samples: List[dict], kind: Optional[str] = None) -> str:
+    lines = []
+    for k, intervals in sorted(durations(samples).items()):
+        if kind and k != kind:
+            continue
+        lines.append(f"{k}")
+        for interval, values in intervals.items():
+            lines.append(
+                f"  {interval}: n={len(values)} p50={_percentile(values, 50):.0f}s "
+                f"p90={_percentile(values, 90):.0f}s p99={_percentile(values, 99):.0f}s "
+                f"max={values[-1]:.0f}s"
+            )
+            lines.extend(histogram(values))
+        deploys = intervals.get("in_progress->deployed") or intervals.get("applied->deployed")
+        if deploys:
+            lines.append(
+                f"  suggested wait timeout: "
+                f"{math.ceil(_percentile(deploys, 99) * TIMEOUT_MARGIN)}s"
+            )
+    return "\n".join(lines) if lines else "No propagation samples recorded"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render time-to-Deployed histograms")
+    parser.add_argument("--kind", choices=sorted(TRACKED_KINDS), default=None)
+    parser.add_argument("--days", type=float, default=None, help="only use samples from the last DAYS days")
+    parser.add_argument("--samples", default=str(SAMPLES_FILE))
+    args = parser.parse_args()
+
+    since = time.time() - args.days * 86400 if args.days else None
+    print(report(load_samples(Path(args.samples), since), args.kind))
+
+
+if __name__ == "__main__":
+    main()
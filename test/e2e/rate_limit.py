@@ -0,0 +1,242 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Token buckets that keep the harness under CloudFront's request rate
+limits, instead of relying on throttling errors and retries.
+
+CloudFront's control-plane quotas are per account, so they are shared by
+every pytest-xdist worker and by the controller under test. Once
+installed, a `RateLimiter` makes every request sent by a client from
+`e2e.clients` take a token from a bucket kept in a file, so the budget is
+shared across processes. Operations are matched against `BUDGETS` in
+order, and each pattern has its own bucket. The budgets leave headroom for
+the controller's own calls.
+
+Retried attempts take a token too. Replayed calls (see `e2e.vcr`) do not.
+The time spent waiting for tokens is recorded per operation in the same
+file, and reported at the end of a pytest session.
+
+Usage:
+    from e2e import clients, rate_limit
+
+    limiter = rate_limit.install()
+    c = clients.get_cloudfront_client()
+    c.list_tags_for_resource(Resource=arn)
+"""
+
+import asyncio
+import fcntl
+import fnmatch
+import json
+import logging
+import os
+import time
+
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from e2e import bootstrap_directory, clients
+
+STATE_FILE = bootstrap_directory / ".rate_limit.json"
+
+# (requests per second, burst) of the operations matching each pattern, as
+# `<service>.<operation>`
+BUDGETS: Dict[str, Tuple[float, float]] = {
+    "cloudfront.Create*": (2, 5),
+    "cloudfront.Update*": (2, 5),
+    "cloudfront.Delete*": (2, 5),
+    "cloudfront.ListTagsForResource": (5, 10),
+    "cloudfront.*": (10, 20),
+}
+
+
+class RateLimiter:
+    """Token buckets shared across processes through a state file, one
+    bucket per budget pattern."""
+
+    def __init__(self, path: Path = STATE_FILE, budgets: Dict[str, Tuple[float, float]] = BUDGETS):
+        self.path = Path(path)
+        self.budgets = budgets
+
+    def budget_of(self, operation: str) -> Optional[str]:
+        """Returns the pattern whose budget applies to an operation, given
+        as `<service>.<operation>`, or None if it is not limited."""
+        for pattern in self.budgets:
+            if fnmatch.fnmatchcase(operation, pattern):
+                return pattern
+        return None
+
+    def _update(self, update):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = b""
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                raw += chunk
+            try:
+                state = json.loads(raw) if raw else {}
+            except ValueError:
+                state = {}
+            state.setdefault("buckets", {})
+            state.setdefault("metrics", {})
+            result = update(state)
+            data = json.dumps(state).encode()
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, data)
+            return result
+        finally:
+            os.close(fd)
+
+    def try_acquire(self, operation: str, waited_seconds: float = 0.0) -> float:
+        """Takes a token for an operation if available, recording
+        `waited_seconds` as the time it waited for it.
+
+        Returns:
+            0 if the token was taken, otherwise the seconds until it will be
+            available
+        """
+        pattern = self.budget_of(operation)
+        if pattern is None:
+            return 0.0
+        rate, burst = self.budgets[pattern]
+
+        def take(state: dict) -> float:
+            now = time.time()
+            bucket = state["buckets"].setdefault(pattern, {"tokens": burst, "updated_at": now})
+            tokens = min(burst, bucket["tokens"] + max(0.0, now - bucket["updated_at"]) * rate)
+            bucket["updated_at"] = now
+            if tokens < 1:
+                bucket["tokens"] = tokens
+                return (1 - tokens) / rate
+            bucket["tokens"] = tokens - 1
+            metrics = state["metrics"].setdefault(
+                operation, {"calls": 0, "waited": 0, "waited_seconds": 0.0, "max_wait_seconds": 0.0},
+            )
+            metrics["calls"] += 1
+            if waited_seconds > 0:
+                metrics["waited"] += 1
+                metrics["waited_seconds"] += waited_seconds
+                metrics["max_wait_seconds"] = max(metrics["max_wait_seconds"], waited_seconds)
+            return 0.0
+
+        return self._update(take)
+
+    def acquire(self, operation: str) -> float:
+        """Blocks until a token for an operation is available, then takes it.
+
+        Returns: the seconds spent waiting
+        """
+        start = time.monotonic()
+        wait_seconds = self.try_acquire(operation)
+        while wait_seconds > 0:
+            time.sleep(wait_seconds)
+            wait_seconds = self.try_acquire(operation, time.monotonic() - start)
+        return time.monotonic() - start
+
+    async def acquire_async(self, operation: str) -> float:
+        """Like `acquire`, but waits for the state file's lock in a thread
+        and sleeps without blocking the event loop.
+
+        Returns: the seconds spent waiting
+        """
+        start = time.monotonic()
+        wait_seconds = await asyncio.to_thread(self.try_acquire, operation)
+        while wait_seconds > 0:
+            await asyncio.sleep(wait_seconds)
+            wait_seconds = await asyncio.to_thread(
+                self.try_acquire, operation, time.monotonic() - start,
+            )
+        return time.monotonic() - start
+
+    def metrics(self) -> Dict[str, dict]:
+        """Returns the calls and wait times recorded for each operation, by
+        every process sharing the state file."""
+        return self._update(lambda state: dict(state["metrics"]))
+
+    def reset(self):
+        """Forgets the recorded metrics and refills every bucket."""
+        def clear(state: dict):
+            state["buckets"].clear()
+            state["metrics"].clear()
+
+        self._update(clear)
+
+    def attach(self, client):
+        """Makes every request sent by a botocore client wait for a token.
+        Registered as a client hook."""
+        service_name = client.meta.service_model.service_name
+        client.meta.events.register(
+            "before-send",
+            lambda event_name, **kwargs: self._before_send(service_name, event_name),
+        )
+
+    def _before_send(self, service_name: str, event_name: str):
+        operation = f"{service_name}.{event_name.rsplit('.', 1)[-1]}"
+        waited_seconds = self.acquire(operation)
+        if waited_seconds > 1:
+            logging.debug(f"Waited {waited_seconds:.1f}s for a {operation} token")
+        # Returning nothing lets the request through
+
+
+_limiter: Optional[RateLimiter] = None
+
+
+def install(path: Path = STATE_FILE, budgets: Dict[str, Tuple[float, float]] = BUDGETS) -> RateLimiter:
+    """Rate limits every client from `e2e.clients`. The clients of `e2e.aio`
+    take their tokens from the same limiter, without blocking."""
+    global _limiter
+    _limiter = RateLimiter(path, budgets)
+    clients.register_client_hook(_limiter.attach, blocking=True)
+    return _limiter
+
+
+def installed() -> Optional[RateLimiter]:
+    """Returns the limiter of the last `install`, if any."""
+    return _limiter
+
+
+def format_metrics(metrics: Dict[str, dict]) -> str:
+    lines = [f"{'operation':<48} {'calls':>7} {'waited':>7} {'wait s':>8} {'max s':>7}"]
+    for operation, m in sorted(metrics.items(), key=lambda i: -i[1]["waited_seconds"]):
+        lines.append(
+            f"{operation:<48} {m['calls']:>7} {m['waited']:>7} "
+            f"{m['waited_seconds']:>8.1f} {m['max_wait_seconds']:>7.1f}"
+        )
+    return "\n".join(lines)
+
+
+class RateLimitPlugin:
+    def __init__(self, limiter: RateLimiter):
+        self.limiter = limiter
+
+    def pytest_terminal_summary(self, terminalreporter):
+        metrics = self.limiter.metrics()
+        if not metrics:
+            return
+        terminalreporter.write_sep("-", "CloudFront rate limiting")
+        terminalreporter.write_line(format_metrics(metrics))
+
+
+def register(config):
+    """Rate limits the harness unless `--no-rate-limit` was given. The
+    controller process starts the session with full buckets."""
+    if config.getoption("--no-rate-limit"):
+        return
+    limiter = install()
+    if not hasattr(config, "workerinput"):
+        limiter.reset()
+        config.pluginmanager.register(RateLimitPlugin(limiter), "e2e-rate-limit")
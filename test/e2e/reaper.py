@@ -0,0 +1,145 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Deletes the resources of torn down fixtures in the background.
+
+Deleting a CR and waiting until CloudFront no longer returns its resource
+takes up to 10-15 minutes for some kinds. Instead of blocking the next test
+module meanwhile, fixture teardowns hand the deletion to the reaper:
+
+    def delete_simple_cache_policy(value):
+        ...
+        cache_policy.wait_until_deleted(cache_policy_id)
+
+    @pytest.fixture(scope="module")
+    def simple_cache_policy():
+        ...
+        yield (ref, cr, cache_policy_id)
+
+        reaper.reap(f"CachePolicy {ref.name}", delete_simple_cache_policy, (ref, cr, cache_policy_id))
+
+At the end of the session, the reaper is drained before the worker
+namespace is deleted and before the leak check. Deletions that failed, or
+had not finished within `DRAIN_TIMEOUT_SECONDS`, are reported as an error
+in the teardown of the session's last test, as a failed fixture teardown
+would have been.
+
+With `--no-reaper` or `--vcr`, or outside of pytest, deletions run right
+away in the calling thread.
+"""
+
+import logging
+import threading
+import time
+import traceback
+
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+import pytest
+
+from e2e import api_profiler
+
+MAX_WORKERS = 32
+DRAIN_TIMEOUT_SECONDS = 60 * 30
+
+
+@dataclass
+class Deletion:
+    description: str
+    future: Future
+    submitted_at: float
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        if not self.future.done():
+            return None
+        return self.future.exception()
+
+
+_lock = threading.Lock()
+_enabled = False
+_executor: Optional[ThreadPoolExecutor] = None
+_deletions: List[Deletion] = []
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def _run(description: str, delete: Callable[..., Any], args: tuple):
+    start = time.monotonic()
+    try:
+        delete(*args)
+    except BaseException:
+        logging.warning(f"Deleting {description} failed:\n{traceback.format_exc()}")
+        raise
+    logging.info(f"Deleted {description} ({time.monotonic() - start:.0f}s)")
+
+
+def reap(description: str, delete: Callable[..., Any], *args):
+    """Calls `delete(*args)` in the background, or right away if the reaper
+    is not enabled."""
+    global _executor
+    if not _enabled:
+        delete(*args)
+        return
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(MAX_WORKERS, thread_name_prefix="reaper")
+        future = _executor.submit(api_profiler.background(_run), description, delete, args)
+        _deletions.append(Deletion(description, future, time.monotonic()))
+
+
+def drain(timeout_seconds: float = DRAIN_TIMEOUT_SECONDS) -> List[Deletion]:
+    """Waits until every deletion has finished, for at most
+    `timeout_seconds`, and returns the deletions that failed or did not
+    finish."""
+    global _executor
+    with _lock:
+        deletions = list(_deletions)
+        _deletions.clear()
+        executor, _executor = _executor, None
+    if deletions:
+        logging.info(f"Waiting for {len(deletions)} background deletions")
+        wait([d.future for d in deletions], timeout=timeout_seconds)
+    if executor is not None:
+        # Unfinished deletions keep running until the process exits
+        executor.shutdown(wait=False, cancel_futures=True)
+    return [d for d in deletions if not d.future.done() or d.error is not None]
+
+
+def finish(timeout_seconds: float = DRAIN_TIMEOUT_SECONDS):
+    """Drains the reaper, failing the current test teardown if any deletion
+    failed or did not finish."""
+    unsuccessful = drain(timeout_seconds)
+    if not unsuccessful:
+        return
+    now = time.monotonic()
+    lines = [
+        f"{d.description}: " + (
+            f"did not finish after {now - d.submitted_at:.0f}s" if not d.future.done()
+            else f"failed: {d.error!r}"
+        )
+        for d in unsuccessful
+    ]
+    pytest.fail(f"{len(unsuccessful)} background deletions unsuccessful:\n" + "\n".join(lines))
+
+
+def register(config):
+    """Enables the reaper unless `--no-reaper` was given. When recording or
+    replaying API calls, deletions stay in their module's cassette."""
+    if not config.getoption("--no-reaper") and not config.getoption("--vcr"):
+        enable()
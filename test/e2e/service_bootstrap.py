@@ -11,16 +11,24 @@
 # express or implied. See the License for the specific language governing
 # permissions and limitations under the License.
 """Bootstraps the resources required to run the CloudFront integration tests.
+
+The bootstrap file is written as soon as each resource is created, so an
+interrupted bootstrap is resumed by the next run instead of starting over.
+
+Pass `--reuse` to keep the healthy resources of a previous bootstrap (as
+recorded in the bootstrap file) and only recreate missing or broken ones.
 """
+import argparse
 import logging
 
 from acktest.bootstrapping import Resources, BootstrapFailureException
 from acktest.bootstrapping.s3 import Bucket
 from acktest.bootstrapping.elbv2 import NetworkLoadBalancer
 
-from e2e import bootstrap_directory
-from e2e.bootstrap_resources import BootstrapResources
-from e2e.cloudfront_bootstrap import ConnectionGroup, MultiTenantDistribution
+from e2e import bootstrap_directory, propagation, vcr
+from e2e.bootstrap_resources import BootstrapResources, bucket_domain_name
+from e2e.snapshot import Snapshot, lock
+from e2e.cloudfront_bootstrap import ConnectionGroup, DistributionPool, MultiTenantDistribution
 
 public_bucket_policy = """{
     "Version":"2008-10-17",
@@ -34,7 +42,7 @@ public_bucket_policy = """{
     "Resource":["arn:aws:s3:::$NAME/*"]
 }]}"""
 
-def service_bootstrap() -> Resources:
+def service_bootstrap(reuse: bool = False) -> Resources:
     logging.getLogger().setLevel(logging.INFO)
 
     bucket = Bucket(
@@ -55,18 +63,47 @@ def service_bootstrap() -> Resources:
         ),
         TenantDistribution=MultiTenantDistribution(
             name_prefix="ack-cf-tenant-dist",
-            bucket_domain_name=f"{bucket.name}.s3.amazonaws.com",
+            bucket_domain_name=bucket_domain_name(bucket),
+        ),
+        DistributionPool=DistributionPool(
+            name_prefix="ack-cf-pool-dist",
+            bucket_domain_name=bucket_domain_name(bucket),
         ),
     )
 
+    previous = None
+    if Snapshot.exists(bootstrap_directory):
+        previous = BootstrapResources.deserialize(bootstrap_directory)
+
     try:
-        resources.bootstrap()
+        with vcr.use_cassette(vcr.BOOTSTRAP_CASSETTE):
+            if previous is not None and not previous.complete:
+                resources = previous
+                resources.enable_checkpoints(bootstrap_directory)
+                resources.resume()
+            elif previous is not None and reuse:
+                resources.enable_checkpoints(bootstrap_directory)
+                resources.bootstrap_reusing(previous)
+            else:
+                resources.enable_checkpoints(bootstrap_directory)
+                resources.bootstrap()
     except BootstrapFailureException as ex:
         exit(254)
 
     return resources
 
 if __name__ == "__main__":
-    config = service_bootstrap()
-    # Write config to current directory by default
-    config.serialize(bootstrap_directory)
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--reuse",
+        action="store_true",
+        help="reuse the healthy resources of the previous bootstrap",
+    )
+    args = parser.parse_args()
+    vcr.install_from_env()
+    propagation.install()
+
+    with lock(bootstrap_directory):
+        config = service_bootstrap(reuse=args.reuse)
+        # Write config to current directory by default
+        config.serialize(bootstrap_directory)
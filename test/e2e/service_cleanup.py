@@ -16,15 +16,18 @@
 
 import logging
 
-from acktest.bootstrapping import Resources
-
 from e2e import bootstrap_directory
+from e2e.bootstrap_resources import BootstrapResources, CleanupFailureException
 
 def service_cleanup():
     logging.getLogger().setLevel(logging.INFO)
 
-    resources = Resources.deserialize(bootstrap_directory)
-    resources.cleanup()
+    resources = BootstrapResources.deserialize(bootstrap_directory)
+    try:
+        resources.cleanup()
+    except CleanupFailureException as ex:
+        logging.error(str(ex))
+        exit(254)
 
 if __name__ == "__main__":
     service_cleanup()
@@ -0,0 +1,354 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Sweeps the CloudFront resources leaked by failed e2e runs.
+
+Every kind is streamed from CloudFront (see `e2e.inventory`), and the
+resources whose name, or for Distributions an origin domain, starts with
+one of the e2e prefixes and that are older than `--min-age-hours` are
+deleted. Resources recorded in the current bootstrap file are never
+touched.
+
+Distributions, ConnectionGroups and DistributionTenants must be disabled,
+and deployed in that state, before they can be deleted, which takes
+minutes each. All resources are therefore disabled and awaited
+concurrently first. They are then deleted in dependency order: tenants,
+then the distributions and connection groups they use, then the origins,
+policies and functions those use. Every call is paced by the shared
+budgets of `e2e.rate_limit`.
+
+Usage:
+    python -m e2e.service_sweep --dry-run
+    python -m e2e.service_sweep --min-age-hours 6 --prefix my-cache-policy-
+"""
+
+import argparse
+import datetime
+import json
+import logging
+
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from e2e import bootstrap_directory, inventory, rate_limit, waiter
+from e2e.clients import get_cloudfront_client
+from e2e.snapshot import Snapshot
+
+# Name prefixes of the resources created by the bootstrap and the tests
+DEFAULT_PREFIXES = (
+    "ack-cloudfront-tests",
+    "ack-cf-tenant-",
+    "cloudfront-test-",
+    "dt-test-tenant-",
+    "my-cache-policy-",
+    "my-distribution-",
+    "my-function-",
+    "my-oac-",
+    "my-orp-",
+    "my-rhp-",
+)
+# Resources younger than this may belong to a run in progress
+DEFAULT_MIN_AGE_HOURS = 3
+DEFAULT_WORKERS = 32
+DEPLOY_TIMEOUT_SECONDS = 60 * 30
+DEPLOY_INTERVAL_SECONDS = 30
+
+# Kinds deleted in each phase. A resource can only be deleted once the
+# resources of the earlier phases, which may refer to it, are gone.
+PHASES = (
+    ("DistributionTenant",),
+    ("Distribution", "ConnectionGroup"),
+    (
+        "VpcOrigin", "CachePolicy", "OriginRequestPolicy",
+        "ResponseHeadersPolicy", "OriginAccessControl", "Function",
+    ),
+)
+# Kinds that are disabled, then awaited, before they can be deleted
+DISABLED_KINDS = ("Distribution", "ConnectionGroup", "DistributionTenant")
+# Kinds that must be deployed before they can be deleted
+DEPLOYED_KINDS = DISABLED_KINDS + ("VpcOrigin",)
+
+NOT_FOUND_CODES = {
+    "NoSuchDistribution", "EntityNotFound", "NoSuchCachePolicy",
+    "NoSuchOriginRequestPolicy", "NoSuchResponseHeadersPolicy",
+    "NoSuchOriginAccessControl", "NoSuchFunctionExists", "NoSuchResource",
+}
+
+DELETED = "deleted"
+GONE = "gone"
+FAILED = "failed"
+
+
+@dataclass
+class Result:
+    kind: str
+    id: str
+    name: str
+    plan: List[str]
+    outcome: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class Report:
+    dry_run: bool
+    scanned: int = 0
+    results: List[Result] = field(default_factory=list)
+
+    def counts(self) -> Dict[str, Counter]:
+        counts: Dict[str, Counter] = {}
+        for r in self.results:
+            counts.setdefault(r.kind, Counter())[r.outcome or "matched"] += 1
+        return counts
+
+
+def protected_identifiers(directory=bootstrap_directory) -> Set[str]:
+    """Returns every string recorded in the current bootstrap file, which
+    includes the IDs, names and ARNs of the bootstrapped resources."""
+    if not Snapshot.exists(directory):
+        return set()
+    found = set()
+
+    def walk(value):
+        if isinstance(value, dict):
+            for v in value.values():
+                walk(v)
+        elif isinstance(value, list):
+            for v in value:
+                walk(v)
+        elif isinstance(value, str):
+            found.add(value)
+
+    walk(Snapshot.load(directory).document)
+    return found
+
+
+def matches(item: inventory.Item, prefixes: Iterable[str]) -> bool:
+    return any(
+        candidate.startswith(prefix)
+        for candidate in [item.name] + item.labels
+        for prefix in prefixes
+    )
+
+
+def old_enough(item: inventory.Item, min_age: datetime.timedelta, now: datetime.datetime) -> bool:
+    """Returns whether a resource is older than `min_age`. Kinds without
+    timestamps are always old enough."""
+    if item.timestamp is None:
+        return True
+    return now - item.timestamp >= min_age
+
+
+def find_leaks(
+    prefixes: Iterable[str] = DEFAULT_PREFIXES,
+    min_age_hours: float = DEFAULT_MIN_AGE_HOURS,
+    kinds: Iterable[str] = inventory.KINDS,
+    protected: Optional[Set[str]] = None,
+    report: Optional[Report] = None,
+) -> Iterator[inventory.Item]:
+    """Yields the leaked resources, as the inventory streams in."""
+    prefixes = tuple(prefixes)
+    protected = protected_identifiers() if protected is None else protected
+    min_age = datetime.timedelta(hours=min_age_hours)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for item in inventory.stream(kinds):
+        if report is not None:
+            report.scanned += 1
+        if {item.id, item.name, item.arn} & protected:
+            continue
+        if matches(item, prefixes) and old_enough(item, min_age, now):
+            yield item
+
+
+def plan(item: inventory.Item) -> List[str]:
+    """Returns the steps that sweeping a resource takes."""
+    steps = []
+    if item.kind in DISABLED_KINDS and item.summary.get("Enabled", True):
+        steps.append("disable")
+    if item.kind in DEPLOYED_KINDS:
+        steps.append("wait")
+    steps.append("delete")
+    return steps
+
+
+def _error_code(ex: Exception) -> Optional[str]:
+    return getattr(ex, "response", {}).get("Error", {}).get("Code")
+
+
+class Sweeper:
+    def __init__(self, workers: int = DEFAULT_WORKERS):
+        self.workers = workers
+
+    @property
+    def cf_client(self):
+        return get_cloudfront_client()
+
+    # Each kind's get returns the resource and its ETag
+
+    def _get(self, item: inventory.Item):
+        c = self.cf_client
+        if item.kind == "Distribution":
+            resp = c.get_distribution_config(Id=item.id)
+            return resp["DistributionConfig"], resp["ETag"]
+        if item.kind == "ConnectionGroup":
+            resp = c.get_connection_group(Identifier=item.id)
+            return resp["ConnectionGroup"], resp["ETag"]
+        if item.kind == "DistributionTenant":
+            resp = c.get_distribution_tenant(Identifier=item.id)
+            return resp["DistributionTenant"], resp["ETag"]
+        if item.kind == "VpcOrigin":
+            resp = c.get_vpc_origin(Id=item.id)
+            return resp["VpcOrigin"], resp["ETag"]
+        if item.kind == "Function":
+            resp = c.describe_function(Name=item.id)
+            return resp["FunctionSummary"], resp["ETag"]
+        resp = getattr(c, f"get_{_snake(item.kind)}")(Id=item.id)
+        return resp[item.kind], resp["ETag"]
+
+    def _status(self, item: inventory.Item) -> Optional[str]:
+        c = self.cf_client
+        if item.kind == "Distribution":
+            return c.get_distribution(Id=item.id)["Distribution"]["Status"]
+        return self._get(item)[0].get("Status")
+
+    def _disable(self, item: inventory.Item):
+        resource, etag = self._get(item)
+        if not resource.get("Enabled", False):
+            return
+        logging.info(f"Disabling {item.key}")
+        c = self.cf_client
+        if item.kind == "Distribution":
+            c.update_distribution(
+                Id=item.id, IfMatch=etag, DistributionConfig=dict(resource, Enabled=False),
+            )
+        elif item.kind == "ConnectionGroup":
+            c.update_connection_group(Id=item.id, IfMatch=etag, Enabled=False)
+        else:
+            c.update_distribution_tenant(Id=item.id, IfMatch=etag, Enabled=False)
+
+    def _wait_until_deployed(self, item: inventory.Item):
+        waiter.wait_for(
+            lambda: self._status(item),
+            lambda status: status in (None, "Deployed"),
+            f"{item.key} to be deployed",
+            timeout_seconds=DEPLOY_TIMEOUT_SECONDS,
+            max_interval_seconds=DEPLOY_INTERVAL_SECONDS,
+        )
+
+    def prepare(self, item: inventory.Item):
+        """Disables a resource if needed, and waits until it can be
+        deleted."""
+        if item.kind in DISABLED_KINDS:
+            self._disable(item)
+        if item.kind in DEPLOYED_KINDS:
+            self._wait_until_deployed(item)
+
+    def delete(self, item: inventory.Item):
+        _, etag = self._get(item)
+        logging.info(f"Deleting {item.key} ({item.name})")
+        c = self.cf_client
+        if item.kind == "Function":
+            c.delete_function(Name=item.id, IfMatch=etag)
+        else:
+            getattr(c, f"delete_{_snake(item.kind)}")(Id=item.id, IfMatch=etag)
+
+    def _sweep_one(self, item: inventory.Item, result: Result, prepared: Future):
+        try:
+            prepared.result()
+            self.delete(item)
+            result.outcome = DELETED
+        except Exception as ex:
+            if _error_code(ex) in NOT_FOUND_CODES:
+                result.outcome = GONE
+            else:
+                result.outcome = FAILED
+                result.error = str(ex)
+                logging.warning(f"Could not sweep {item.key}: {ex}")
+
+    def sweep(self, items: Iterable[inventory.Item], dry_run: bool = False, report: Optional[Report] = None) -> Report:
+        """Deletes the given resources, or only plans it on a dry run.
+
+        Preparing a resource starts as soon as it is streamed in.
+        """
+        report = report or Report(dry_run=dry_run)
+        swept = []
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="sweep-prepare") as prepare_pool:
+            for item in items:
+                result = Result(item.kind, item.id, item.name, plan(item))
+                report.results.append(result)
+                if not dry_run:
+                    swept.append((item, result, prepare_pool.submit(self.prepare, item)))
+            with ThreadPoolExecutor(self.workers, thread_name_prefix="sweep-delete") as delete_pool:
+                for phase in PHASES:
+                    wait([
+                        delete_pool.submit(self._sweep_one, item, result, prepared)
+                        for item, result, prepared in swept
+                        if item.kind in phase
+                    ])
+        return report
+
+
+def _snake(name: str) -> str:
+    return "".join(f"_{c.lower()}" if c.isupper() else c for c in name).lstrip("_")
+
+
+def format_report(report: Report) -> str:
+    lines = [f"Scanned {report.scanned} resources, {len(report.results)} leaked"]
+    for kind, counts in sorted(report.counts().items()):
+        lines.append(f"  {kind:<24} " + ", ".join(f"{n} {outcome}" for outcome, n in sorted(counts.items())))
+    if report.dry_run:
+        for r in report.results:
+            lines.append(f"  would {' -> '.join(r.plan)}: {r.kind} {r.id} ({r.name})")
+    for r in report.results:
+        if r.outcome == FAILED:
+            lines.append(f"  FAILED {r.kind} {r.id} ({r.name}): {r.error}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep leaked e2e resources from CloudFront")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be deleted")
+    parser.add_argument("--prefix", action="append", default=None,
+                        help="name prefix to sweep, repeatable (default: the e2e prefixes)")
+    parser.add_argument("--min-age-hours", type=float, default=DEFAULT_MIN_AGE_HOURS)
+    parser.add_argument("--kind", action="append", choices=inventory.KINDS, default=None)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--no-rate-limit", action="store_true")
+    parser.add_argument("--json", default=None, help="also write the report to this file")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.INFO)
+    if not args.no_rate_limit:
+        rate_limit.install()
+
+    report = Report(dry_run=args.dry_run)
+    leaks = find_leaks(
+        prefixes=args.prefix or DEFAULT_PREFIXES,
+        min_age_hours=args.min_age_hours,
+        kinds=args.kind or inventory.KINDS,
+        report=report,
+    )
+    Sweeper(args.workers).sweep(leaks, dry_run=args.dry_run, report=report)
+
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(asdict(report), f, indent=2)
+    if any(r.outcome == FAILED for r in report.results):
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Versioned JSON snapshot of the bootstrapped resources.
+
+A snapshot records the public state of every bootstrappable, tagged with its
+type, so that it can be read back without unpickling:
+
+    {
+      "version": 1,
+      "bootstrapped": ["PublicBucket", ...],
+      "resources": {
+        "PublicBucket": {"__type__": "acktest.bootstrapping.s3:Bucket",
+                         "state": {"name": "...", ...}},
+        ...
+      }
+    }
+
+Reading is lazy. `Snapshot.<resource>.<field>` only decodes the JSON of that
+resource and never imports its type, so test workers can read e.g.
+`TenantDistribution.distribution_id` without loading the bootstrapping stack.
+`Snapshot.materialize()` rebuilds the actual objects for bootstrap and
+cleanup.
+
+Older snapshots are upgraded through `MIGRATIONS` on load, and a bootstrap.pkl
+left by a previous version of these scripts is converted on first read.
+Snapshots written by a newer version are read as-is, since fields unknown to
+this version are ignored.
+"""
+
+import dataclasses
+import fcntl
+import importlib
+import json
+import logging
+import os
+import pickle
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from e2e import bootstrap_directory
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_FILE_NAME = "bootstrap.json"
+LEGACY_FILE_NAME = "bootstrap.pkl"
+LOCK_FILE_NAME = "bootstrap.lock"
+
+TYPE_KEY = "__type__"
+STATE_KEY = "state"
+
+# Maps a snapshot version to the function that upgrades a snapshot of that
+# version to the next one.
+MIGRATIONS: Dict[int, Callable[[dict], dict]] = {}
+
+
+def _type_name(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _import_type(name: str) -> type:
+    module_name, _, qualname = name.partition(":")
+    obj = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def encode(value: Any) -> Any:
+    """Encodes a dataclass (recursively) as JSON-compatible data.
+
+    The whole instance dictionary is recorded, including fields with
+    `init=False`, except private attributes.
+    """
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {
+            TYPE_KEY: _type_name(type(value)),
+            STATE_KEY: {
+                name: encode(attr)
+                for name, attr in vars(value).items()
+                if not name.startswith("_")
+            },
+        }
+    if isinstance(value, (list, tuple)):
+        return [encode(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): encode(item) for key, item in value.items()}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"Cannot snapshot value of type {type(value).__name__}")
+
+
+def decode(data: Any) -> Any:
+    """Rebuilds the values encoded by `encode`, importing their types.
+
+    Fields that the type declares but the snapshot lacks, e.g. because they
+    were added after the snapshot was written, get their default values.
+    """
+    if isinstance(data, list):
+        return [decode(item) for item in data]
+    if not isinstance(data, dict):
+        return data
+    if TYPE_KEY not in data:
+        return {key: decode(item) for key, item in data.items()}
+
+    cls = _import_type(data[TYPE_KEY])
+    obj = cls.__new__(cls)
+    state = {name: decode(item) for name, item in data[STATE_KEY].items()}
+    for f in dataclasses.fields(cls):
+        if f.name in state:
+            continue
+        if f.default is not dataclasses.MISSING:
+            state[f.name] = f.default
+        elif f.default_factory is not dataclasses.MISSING:
+            state[f.name] = f.default_factory()
+    obj.__dict__.update(state)
+    return obj
+
+
+class View:
+    """Read-only attribute access to an encoded resource, without importing
+    its type."""
+
+    def __init__(self, data: dict):
+        self._data = data
+
+    @property
+    def type_name(self) -> str:
+        return self._data[TYPE_KEY]
+
+    def __getattr__(self, name: str):
+        state = self.__dict__["_data"][STATE_KEY]
+        if name not in state:
+            raise AttributeError(f"{self.type_name} snapshot has no field {name}")
+        return _view(state[name])
+
+    def __repr__(self):
+        return f"View({self.type_name})"
+
+
+def _view(data: Any) -> Any:
+    if isinstance(data, dict) and TYPE_KEY in data:
+        return View(data)
+    if isinstance(data, list):
+        return [_view(item) for item in data]
+    return data
+
+
+def _migrate(document: dict) -> dict:
+    version = document.get("version", 0)
+    while version < SNAPSHOT_VERSION:
+        if version not in MIGRATIONS:
+            raise ValueError(f"No migration from snapshot version {version}")
+        document = MIGRATIONS[version](document)
+        version = document["version"]
+    if version > SNAPSHOT_VERSION:
+        logging.warning(
+            f"Snapshot version {version} is newer than {SNAPSHOT_VERSION}; "
+            "unknown fields are ignored"
+        )
+    return document
+
+
+def dump(resources) -> dict:
+    """Returns the snapshot document of a `Resources` dataclass."""
+    return {
+        "version": SNAPSHOT_VERSION,
+        "bootstrapped": getattr(resources, "bootstrapped", None),
+        "resources": {
+            f.name: encode(getattr(resources, f.name))
+            for f in dataclasses.fields(resources)
+        },
+        TYPE_KEY: _type_name(type(resources)),
+    }
+
+
+def write(resources, directory: Path, file_name: str = SNAPSHOT_FILE_NAME):
+    """Atomically writes the snapshot of `resources` to `directory`."""
+    path = Path(directory) / file_name
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(dump(resources), f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def lock(directory: Path = bootstrap_directory, shared: bool = False):
+    """Holds the bootstrap file lock, across processes.
+
+    Bootstrapping holds it exclusively, so readers holding it shared never
+    observe a bootstrap in progress.
+    """
+    with open(Path(directory) / LOCK_FILE_NAME, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class Snapshot:
+    def __init__(self, document: dict):
+        self.document = _migrate(document)
+        self._views = {}
+
+    @classmethod
+    def load(
+        cls,
+        directory: Path = bootstrap_directory,
+        file_name: str = SNAPSHOT_FILE_NAME,
+    ) -> "Snapshot":
+        """Reads a snapshot, falling back to converting the bootstrap.pkl of
+        a previous version of these scripts."""
+        path = Path(directory) / file_name
+        legacy_path = Path(directory) / LEGACY_FILE_NAME
+        if not path.exists() and legacy_path.exists():
+            logging.info(f"Converting {legacy_path} to {file_name}")
+            with open(legacy_path, "rb") as f:
+                resources = pickle.load(f)
+            write(resources, directory, file_name)
+        with open(path) as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def exists(
+        directory: Path = bootstrap_directory,
+        file_name: str = SNAPSHOT_FILE_NAME,
+    ) -> bool:
+        return (Path(directory) / file_name).exists() or (
+            Path(directory) / LEGACY_FILE_NAME
+        ).exists()
+
+    @property
+    def bootstrapped(self) -> Optional[list]:
+        return self.document.get("bootstrapped")
+
+    @property
+    def complete(self) -> bool:
+        return self.bootstrapped is None or set(self.bootstrapped) >= set(self.document["resources"])
+
+    def __getattr__(self, name: str) -> View:
+        resources = self.__dict__["document"]["resources"]
+        if name not in resources:
+            raise AttributeError(f"Snapshot has no resource {name}")
+        views = self.__dict__["_views"]
+        if name not in views:
+            views[name] = _view(resources[name])
+        return views[name]
+
+    def materialize(self, cls: Optional[type] = None):
+        """Rebuilds the `Resources` dataclass, importing every resource
+        type."""
+        cls = cls or _import_type(self.document[TYPE_KEY])
+        known = {f.name for f in dataclasses.fields(cls)}
+        resources = cls(**{
+            name: decode(data)
+            for name, data in self.document["resources"].items()
+            if name in known
+        })
+        resources.bootstrapped = self.bootstrapped
+        return resources
+
+
+_snapshot = None
+
+def get_bootstrap_snapshot(file_name: str = SNAPSHOT_FILE_NAME) -> Snapshot:
+    """Returns the lazily-read snapshot of the bootstrapped resources."""
+    global _snapshot
+    if _snapshot is None:
+        with lock(bootstrap_directory, shared=True):
+            _snapshot = Snapshot.load(bootstrap_directory, file_name)
+    return _snapshot
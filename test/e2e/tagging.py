@@ -0,0 +1,94 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Fetches and verifies the tags of many CloudFront resources at once.
+
+CloudFront has no batch tagging API, so the tags of each ARN are listed
+with one ListTagsForResource call. Here those calls run concurrently, paced
+by the shared ListTagsForResource budget of `e2e.rate_limit` so that
+verifying hundreds of resources does not get throttled.
+
+Usage:
+    from e2e import tagging
+
+    tagging.assert_cr_tags([cr1, cr2, ...])
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from acktest import tags
+
+from e2e import api_profiler
+from e2e.clients import get_cloudfront_client
+
+DEFAULT_MAX_WORKERS = 16
+
+
+def get_tags(arn: str) -> Optional[List[dict]]:
+    """Returns the tags of a resource as a list of {"Key", "Value"} dicts.
+
+    If no such resource exists, returns None.
+    """
+    c = get_cloudfront_client()
+    try:
+        resp = c.list_tags_for_resource(Resource=arn)
+        return resp["Tags"]["Items"]
+    except c.exceptions.NoSuchResource:
+        return None
+
+
+def get_tags_many(
+    arns: Iterable[str],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> Dict[str, Optional[List[dict]]]:
+    """Returns the tags of each resource, keyed by ARN, fetching them
+    concurrently. Resources that do not exist map to None."""
+    arns = list(dict.fromkeys(arns))
+    if not arns:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(arns))) as pool:
+        get = api_profiler.in_current_scope(get_tags)
+        return dict(zip(arns, pool.map(get, arns)))
+
+
+def user_tags(cr: dict) -> List[dict]:
+    """Returns the tags in the spec of a CR, in the API's format."""
+    return [{"Key": t["key"], "Value": t["value"]} for t in cr["spec"].get("tags", [])]
+
+
+def assert_tags(expected: Dict[str, List[dict]]):
+    """Asserts that each resource has the ACK system tags and exactly the
+    expected user tags.
+
+    Args:
+        expected: the user tags of each resource, keyed by ARN
+    """
+    actual = get_tags_many(expected)
+    for arn, expected_tags in expected.items():
+        assert actual[arn] is not None, f"{arn} not found"
+        tags.assert_ack_system_tags(
+            tags=actual[arn],
+        )
+        tags.assert_equal_without_ack_tags(
+            expected=expected_tags,
+            actual=actual[arn],
+        )
+
+
+def assert_cr_tags(crs: Iterable[dict]):
+    """Asserts that the resource of each CR has the ACK system tags and
+    exactly the tags in the CR's spec."""
+    assert_tags(
+        {cr["status"]["ackResourceMetadata"]["arn"]: user_tags(cr) for cr in crs},
+    )
@@ -0,0 +1,154 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Precompiled resource templates.
+
+`acktest.resources.load_resource_file` substitutes `$VARIABLE` placeholders
+in the YAML text and parses the result on every call. A `Template` parses
+its file once instead, keeping a slot wherever a placeholder appears, so
+rendering only fills the slots into a fresh dict.
+
+Rendering yields the same result as substituting the text first: a plain
+scalar that is exactly one placeholder takes the YAML type of its value
+(`minTTL: $MIN_TTL` renders as an int), while quoted scalars and scalars
+with surrounding text stay strings. Placeholders without a value are left
+as-is.
+
+Usage:
+    from e2e import templates
+
+    template = templates.get_template(resource_directory, "cache_policy")
+    for cr in template.render_variants(
+        1000, {"CACHE_POLICY_NAME": "bench", ...}, unique=["CACHE_POLICY_NAME"],
+    ):
+        ...
+"""
+
+import functools
+import os
+import re
+import threading
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Mapping, Tuple
+
+import yaml
+from acktest.resources import random_suffix_name
+
+PLACEHOLDER = re.compile(r"\$([A-Za-z0-9_]+)")
+
+# Kinds of compiled nodes
+_CONST, _MAP, _SEQ, _TYPED, _TEXT = range(5)
+
+
+@functools.lru_cache(maxsize=4096)
+def _typed_value(value: str) -> Any:
+    """Returns what YAML makes of `value` as a plain scalar."""
+    if "\n" in value:
+        return value
+    try:
+        typed = yaml.safe_load(value)
+    except yaml.YAMLError:
+        return value
+    if isinstance(typed, (dict, list)):
+        return value
+    return typed
+
+
+class Template:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path) as f:
+            node = yaml.compose(f, Loader=yaml.SafeLoader)
+        self._loader = yaml.SafeLoader("")
+        self.variables = set()
+        self._compiled = self._compile(node)
+
+    def _compile(self, node: yaml.Node) -> Tuple:
+        if isinstance(node, yaml.MappingNode):
+            return (_MAP, [(self._compile(k), self._compile(v)) for k, v in node.value])
+        if isinstance(node, yaml.SequenceNode):
+            return (_SEQ, [self._compile(item) for item in node.value])
+
+        names = PLACEHOLDER.findall(node.value) if isinstance(node.value, str) else []
+        if not names:
+            return (_CONST, self._loader.construct_object(node, deep=True))
+        self.variables.update(names)
+        whole = PLACEHOLDER.fullmatch(node.value)
+        if whole and node.style is None:
+            return (_TYPED, whole.group(1))
+        return (_TEXT, node.value)
+
+    def _fill(self, compiled: Tuple, values: Mapping[str, Any]) -> Any:
+        kind, payload = compiled
+        if kind == _CONST:
+            return payload
+        if kind == _MAP:
+            return {self._fill(k, values): self._fill(v, values) for k, v in payload}
+        if kind == _SEQ:
+            return [self._fill(item, values) for item in payload]
+        if kind == _TYPED:
+            if payload not in values:
+                return f"${payload}"
+            return _typed_value(str(values[payload]))
+        return PLACEHOLDER.sub(
+            lambda m: str(values[m.group(1)]) if m.group(1) in values else m.group(0),
+            payload,
+        )
+
+    def render(self, replacements: Mapping[str, Any] = {}) -> dict:
+        """Returns a fresh dict with the placeholders replaced."""
+        return self._fill(self._compiled, replacements)
+
+    def render_each(self, replacements: Iterable[Mapping[str, Any]]) -> Iterator[dict]:
+        """Lazily renders the template once for each set of replacements."""
+        for values in replacements:
+            yield self.render(values)
+
+    def render_variants(
+        self,
+        count: int,
+        replacements: Mapping[str, Any],
+        unique: Iterable[str] = (),
+        max_length: int = 63,
+    ) -> Iterator[dict]:
+        """Lazily renders `count` variants of the template.
+
+        Every variant gets a fresh random-suffixed value for each variable in
+        `unique`, prefixed by that variable's value in `replacements`.
+        """
+        unique = list(unique)
+        for _ in range(count):
+            values = dict(replacements)
+            for name in unique:
+                values[name] = random_suffix_name(str(replacements[name]), max_length)
+            yield self.render(values)
+
+
+_lock = threading.Lock()
+_templates: Dict[Tuple[Path, int], Template] = {}
+
+
+def get_template(directory: Path, resource_name: str) -> Template:
+    """Returns the compiled template of a resource file, compiling it on first
+    use or when the file has changed."""
+    path = Path(directory) / f"{resource_name}.yaml"
+    key = (path, os.stat(path).st_mtime_ns)
+    template = _templates.get(key)
+    if template is None:
+        with _lock:
+            template = _templates.get(key)
+            if template is None:
+                template = Template(path)
+                _templates[key] = template
+    return template
@@ -0,0 +1,92 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+#	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Offline tests of bootstrapping and resuming with fake resources, which
+need no cluster and no AWS account"""
+
+from dataclasses import dataclass, fields
+
+import pytest
+
+from acktest.bootstrapping import Bootstrappable, BootstrapFailureException
+
+from e2e.bootstrap_resources import BootstrapResources
+
+# Names of the fake resources that currently exist
+live = set()
+
+
+@dataclass
+class FakeResource(Bootstrappable):
+    name: str
+    fail_bootstrap: bool = False
+    fail_cleanup: bool = False
+
+    def bootstrap(self):
+        live.add(self.name)
+        if self.fail_bootstrap:
+            raise RuntimeError(f"{self.name} failed to bootstrap")
+
+    def cleanup(self):
+        if self.fail_cleanup:
+            raise RuntimeError(f"{self.name} failed to clean up")
+        live.discard(self.name)
+
+
+@pytest.fixture(autouse=True)
+def clear_live():
+    live.clear()
+    yield
+    live.clear()
+
+
+def fake_resources() -> BootstrapResources:
+    return BootstrapResources(**{
+        f.name: FakeResource(f.name) for f in fields(BootstrapResources)
+    })
+
+
+def test_resume_recreates_resources_cleaned_up_after_a_failure(tmp_path):
+    resources = fake_resources()
+    resources.TenantDistribution.fail_bootstrap = True
+    resources.TenantDistribution.fail_cleanup = True
+    resources.enable_checkpoints(tmp_path)
+
+    with pytest.raises(BootstrapFailureException):
+        resources.bootstrap()
+    # The bucket's cleanup waits for the distribution's, which failed
+    assert live == {"PublicBucket", "TenantDistribution"}
+
+    resumed = BootstrapResources.deserialize(tmp_path)
+    assert not resumed.complete
+    assert resumed.bootstrapped == ["PublicBucket"]
+
+    resumed.TenantDistribution.fail_bootstrap = False
+    resumed.TenantDistribution.fail_cleanup = False
+    resumed.enable_checkpoints(tmp_path)
+    resumed.resume()
+
+    assert live == set(resumed.bootstrappables())
+    assert BootstrapResources.deserialize(tmp_path).complete
+
+
+def test_failure_without_earlier_resources_removes_the_checkpoint(tmp_path):
+    resources = fake_resources()
+    resources.DistributionPool.fail_bootstrap = True
+    resources.enable_checkpoints(tmp_path)
+
+    with pytest.raises(BootstrapFailureException):
+        resources.bootstrap()
+
+    assert live == set()
+    assert list(tmp_path.iterdir()) == []
@@ -13,16 +13,15 @@
 
 """Integration tests for the CloudFront CachePolicy resource"""
 
-import time
-
 import pytest
 
 from acktest.k8s import condition
 from acktest.k8s import resource as k8s
-from acktest.resources import random_suffix_name
-from e2e import service_marker, CRD_GROUP, CRD_VERSION, load_resource
+from e2e import parallel, service_marker, CRD_GROUP, CRD_VERSION, load_resource
 from e2e.replacement_values import REPLACEMENT_VALUES
 from e2e import cache_policy
+from e2e import cr_watch
+from e2e import reaper
 
 CACHE_POLICY_RESOURCE_PLURAL = "cachepolicies"
 DELETE_WAIT_AFTER_SECONDS = 10
@@ -31,9 +30,20 @@ MODIFY_WAIT_AFTER_SECONDS = 10
 MIN_TTL = 600
 
 
+def delete_simple_cache_policy(value):
+    ref, _, cache_policy_id = value
+    _, deleted = k8s.delete_custom_resource(
+        ref,
+        period_length=DELETE_WAIT_AFTER_SECONDS,
+    )
+    assert deleted
+
+    cache_policy.wait_until_deleted(cache_policy_id)
+
+
 @pytest.fixture(scope="module")
 def simple_cache_policy():
-    cache_policy_name = random_suffix_name("my-cache-policy", 24)
+    cache_policy_name = parallel.random_name("my-cache-policy", 24)
     cache_policy_comment = "a simple cache_policy"
 
     replacements = REPLACEMENT_VALUES.copy()
@@ -48,7 +58,7 @@ def simple_cache_policy():
 
     ref = k8s.CustomResourceReference(
         CRD_GROUP, CRD_VERSION, CACHE_POLICY_RESOURCE_PLURAL,
-        cache_policy_name, namespace="default",
+        cache_policy_name, namespace=parallel.namespace(),
     )
     k8s.create_custom_resource(ref, resource_data)
     cr = k8s.wait_resource_consumed_by_controller(ref)
@@ -63,13 +73,7 @@ def simple_cache_policy():
 
     yield (ref, cr, cache_policy_id)
 
-    _, deleted = k8s.delete_custom_resource(
-        ref,
-        period_length=DELETE_WAIT_AFTER_SECONDS,
-    )
-    assert deleted
-
-    cache_policy.wait_until_deleted(cache_policy_id)
+    reaper.reap(f"CachePolicy {ref.name}", delete_simple_cache_policy, (ref, cr, cache_policy_id))
 
 
 @service_marker
@@ -78,7 +82,7 @@ class TestCachePolicy:
     def test_crud(self, simple_cache_policy):
         ref, res, cache_policy_id = simple_cache_policy
 
-        time.sleep(CHECK_STATUS_WAIT_SECONDS)
+        cr_watch.wait_until_synced(ref, timeout_seconds=CHECK_STATUS_WAIT_SECONDS)
 
         # Before we update the CachePolicy CR below, let's check to see that
         # the MinTTL field in the CR is still what we set in the original
@@ -110,10 +114,11 @@ class TestCachePolicy:
                 }
             },
         }
+        etag = cache_policy.get(cache_policy_id)['ETag']
         k8s.patch_custom_resource(ref, updates)
-        time.sleep(MODIFY_WAIT_AFTER_SECONDS)
-
-        latest = cache_policy.get(cache_policy_id)
+        latest = cache_policy.wait_until_changed(
+            cache_policy_id, etag, timeout_seconds=MODIFY_WAIT_AFTER_SECONDS,
+        ).value
         assert latest is not None
         assert 'CachePolicyConfig' in latest
         assert 'MinTTL' in latest['CachePolicyConfig']
@@ -0,0 +1,147 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+#	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Offline tests of the CloudFront stand-in, which need no cluster and no
+AWS account"""
+
+import boto3
+import pytest
+
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from e2e.cloudfront_standin import CloudFrontStandIn, MANAGED_CACHE_POLICIES
+
+
+def cache_policy_config(name: str) -> dict:
+    return {
+        "Name": name,
+        "MinTTL": 1,
+        "ParametersInCacheKeyAndForwardedToOrigin": {
+            "EnableAcceptEncodingGzip": False,
+            "HeadersConfig": {"HeaderBehavior": "none"},
+            "CookiesConfig": {"CookieBehavior": "none"},
+            "QueryStringsConfig": {"QueryStringBehavior": "none"},
+        },
+    }
+
+
+@pytest.fixture(scope="module")
+def standin():
+    with CloudFrontStandIn(deploy_seconds=0, delete_seconds=0) as s:
+        yield s
+
+
+@pytest.fixture
+def client(standin):
+    return boto3.client(
+        "cloudfront",
+        endpoint_url=standin.endpoint_url,
+        region_name="us-east-1",
+        aws_access_key_id="standin",
+        aws_secret_access_key="standin",
+        config=Config(retries={"mode": "standard", "total_max_attempts": 1}),
+    )
+
+
+def error_code(ex: ClientError) -> str:
+    return ex.response["Error"]["Code"]
+
+
+class TestRouting:
+    def test_literal_segment_wins_over_placeholder(self, client):
+        policy_id = MANAGED_CACHE_POLICIES["Managed-CachingOptimized"]
+
+        policy = client.get_cache_policy(Id=policy_id)
+        assert policy["CachePolicy"]["Id"] == policy_id
+
+        config = client.get_cache_policy_config(Id=policy_id)
+        assert config["CachePolicyConfig"]["Name"] == "Managed-CachingOptimized"
+
+    def test_not_found_code(self, client):
+        with pytest.raises(ClientError) as ex:
+            client.get_cache_policy(Id="missing")
+        assert error_code(ex.value) == "NoSuchCachePolicy"
+
+    def test_unknown_route(self, standin):
+        status, _, body = standin.handle("GET", "/2020-05-31/no-such-thing", {}, b"")
+        assert status == 404
+        assert b"<Code>UnknownOperation</Code>" in body
+
+    def test_unexpected_exception_is_an_internal_error(self, standin, client, monkeypatch):
+        def broken(params):
+            raise KeyError("boom")
+
+        for route in standin._routes:
+            if route.operation.name == "ListCachePolicies":
+                monkeypatch.setattr(route, "handler", broken)
+
+        with pytest.raises(ClientError) as ex:
+            client.list_cache_policies()
+        assert error_code(ex.value) == "InternalError"
+        assert ex.value.response["ResponseMetadata"]["HTTPStatusCode"] == 500
+
+
+class TestPagination:
+    def test_pages_cover_every_item_once(self, client):
+        for i in range(5):
+            client.create_cache_policy(CachePolicyConfig=cache_policy_config(f"page-{i}"))
+
+        ids, marker = [], None
+        while True:
+            params = {"Type": "custom", "MaxItems": "2"}
+            if marker:
+                params["Marker"] = marker
+            page = client.list_cache_policies(**params)["CachePolicyList"]
+            ids += [item["CachePolicy"]["Id"] for item in page.get("Items", [])]
+            marker = page.get("NextMarker")
+            if not marker:
+                break
+
+        assert len(ids) == len(set(ids)) >= 5
+
+    def test_unknown_marker_is_rejected(self, client):
+        with pytest.raises(ClientError) as ex:
+            client.list_cache_policies(Marker="gone")
+        assert error_code(ex.value) == "InvalidArgument"
+
+
+class TestETags:
+    def test_update_requires_current_etag(self, client):
+        created = client.create_cache_policy(CachePolicyConfig=cache_policy_config("etag"))
+        policy_id = created["CachePolicy"]["Id"]
+        etag = created["ETag"]
+
+        with pytest.raises(ClientError) as ex:
+            client.update_cache_policy(
+                Id=policy_id, IfMatch="stale", CachePolicyConfig=cache_policy_config("etag"),
+            )
+        assert error_code(ex.value) == "PreconditionFailed"
+
+        updated = client.update_cache_policy(
+            Id=policy_id, IfMatch=etag, CachePolicyConfig=cache_policy_config("etag"),
+        )
+        assert updated["ETag"] != etag
+        assert client.get_cache_policy(Id=policy_id)["ETag"] == updated["ETag"]
+
+        with pytest.raises(ClientError) as ex:
+            client.delete_cache_policy(Id=policy_id, IfMatch=etag)
+        assert error_code(ex.value) == "PreconditionFailed"
+
+        client.delete_cache_policy(Id=policy_id, IfMatch=updated["ETag"])
+
+    def test_delete_requires_if_match(self, client):
+        created = client.create_cache_policy(CachePolicyConfig=cache_policy_config("no-if-match"))
+        with pytest.raises(ClientError) as ex:
+            client.delete_cache_policy(Id=created["CachePolicy"]["Id"])
+        assert error_code(ex.value) == "InvalidIfMatchVersion"
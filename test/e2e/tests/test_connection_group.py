@@ -13,17 +13,16 @@
 
 """Integration tests for the CloudFront ConnectionGroup resource"""
 
-import time
-
 import pytest
 
 from acktest.k8s import condition
 from acktest.k8s import resource as k8s
-from acktest import tags
-from acktest.resources import random_suffix_name
-from e2e import service_marker, CRD_GROUP, CRD_VERSION, load_resource
+from e2e import parallel, service_marker, CRD_GROUP, CRD_VERSION, load_resource
 from e2e.replacement_values import REPLACEMENT_VALUES
 from e2e import connection_group
+from e2e import tagging
+from e2e import cr_watch
+from e2e import reaper
 
 CONNECTION_GROUP_RESOURCE_PLURAL = "connectiongroups"
 DELETE_WAIT_AFTER_SECONDS = 10
@@ -32,9 +31,28 @@ CHECK_STATUS_WAIT_PERIODS = 20
 MODIFY_WAIT_AFTER_SECONDS = 10
 
 
+def delete_simple_connection_group(value):
+    ref, _, connection_group_id = value
+    # A connection group must be disabled before it can be deleted, otherwise
+    # the CloudFront API returns a ResourceNotDisabled error. Disable it here so
+    # teardown succeeds regardless of the test outcome (idempotent if the test
+    # body already disabled it).
+    before = k8s.get_resource(ref)
+    k8s.patch_custom_resource(ref, {"spec": {"enabled": False}})
+    cr_watch.wait_until_updated(ref, before, timeout_seconds=MODIFY_WAIT_AFTER_SECONDS)
+
+    _, deleted = k8s.delete_custom_resource(
+        ref,
+        period_length=DELETE_WAIT_AFTER_SECONDS,
+    )
+    assert deleted
+
+    connection_group.wait_until_deleted(connection_group_id)
+
+
 @pytest.fixture(scope="module")
 def simple_connection_group():
-    connection_group_name = random_suffix_name("cloudfront-test-cg", 24)
+    connection_group_name = parallel.random_name("cloudfront-test-cg", 24)
 
     replacements = REPLACEMENT_VALUES.copy()
     replacements["CONNECTION_GROUP_NAME"] = connection_group_name
@@ -48,7 +66,7 @@ def simple_connection_group():
 
     ref = k8s.CustomResourceReference(
         CRD_GROUP, CRD_VERSION, CONNECTION_GROUP_RESOURCE_PLURAL,
-        connection_group_name, namespace="default",
+        connection_group_name, namespace=parallel.namespace(),
     )
     k8s.create_custom_resource(ref, resource_data)
     cr = k8s.wait_resource_consumed_by_controller(ref)
@@ -63,20 +81,7 @@ def simple_connection_group():
 
     yield (ref, cr, connection_group_id)
 
-    # A connection group must be disabled before it can be deleted, otherwise
-    # the CloudFront API returns a ResourceNotDisabled error. Disable it here so
-    # teardown succeeds regardless of the test outcome (idempotent if the test
-    # body already disabled it).
-    k8s.patch_custom_resource(ref, {"spec": {"enabled": False}})
-    time.sleep(MODIFY_WAIT_AFTER_SECONDS)
-
-    _, deleted = k8s.delete_custom_resource(
-        ref,
-        period_length=DELETE_WAIT_AFTER_SECONDS,
-    )
-    assert deleted
-
-    connection_group.wait_until_deleted(connection_group_id)
+    reaper.reap(f"ConnectionGroup {ref.name}", delete_simple_connection_group, (ref, cr, connection_group_id))
 
 
 @service_marker
@@ -113,17 +118,7 @@ class TestConnectionGroup:
         arn = cr['status']['ackResourceMetadata']['arn']
 
         assert 'tags' in cr['spec']
-        user_tags = [{"Key": t["key"], "Value": t["value"]} for t in cr['spec']['tags']]
-
-        response_tags = connection_group.get_tags(arn)
-        tags.assert_ack_system_tags(
-            tags=response_tags,
-        )
-
-        tags.assert_equal_without_ack_tags(
-            expected=user_tags,
-            actual=response_tags,
-        )
+        tagging.assert_cr_tags([cr])
 
         # Test update: disable the connection group and change its tags.
         updates = {
@@ -137,10 +132,11 @@ class TestConnectionGroup:
                 ]
             },
         }
+        etag = connection_group.get(connection_group_id)['ETag']
         k8s.patch_custom_resource(ref, updates)
-        time.sleep(MODIFY_WAIT_AFTER_SECONDS)
-
-        latest = connection_group.get(connection_group_id)
+        latest = connection_group.wait_until_changed(
+            connection_group_id, etag, timeout_seconds=MODIFY_WAIT_AFTER_SECONDS,
+        ).value
         assert latest is not None
         assert latest['Enabled'] is False
 
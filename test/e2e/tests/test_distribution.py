@@ -13,19 +13,19 @@
 
 """Integration tests for the CloudFront Distribution resource"""
 
-import time
-
 import pytest
 
 from acktest.k8s import condition
 from acktest.k8s import resource as k8s
 from acktest.aws import identity
-from acktest import tags
-from acktest.resources import random_suffix_name
-from e2e import service_marker, CRD_GROUP, CRD_VERSION, load_resource
-from e2e.bootstrap_resources import get_bootstrap_resources
+from e2e import parallel, service_marker, CRD_GROUP, CRD_VERSION, load_resource
+from e2e.snapshot import get_bootstrap_snapshot
 from e2e.replacement_values import REPLACEMENT_VALUES
 from e2e import distribution
+from e2e import distribution_pool
+from e2e import prefetch
+from e2e import tagging
+from e2e import cr_watch
 
 DISTRIBUTION_RESOURCE_PLURAL = "distributions"
 DELETE_WAIT_AFTER_SECONDS = 600
@@ -33,14 +33,13 @@ CHECK_STATUS_WAIT_SECONDS = 300
 MODIFY_WAIT_AFTER_SECONDS = 300
 
 
-@pytest.fixture(scope="module")
-def simple_distribution():
-    distribution_name = random_suffix_name("my-distribution", 24)
-    origin_id = random_suffix_name("origin", 12)
+def create_simple_distribution(pooled: bool = True):
+    distribution_name = parallel.random_name("my-distribution", 24)
+    origin_id = parallel.random_name("origin", 12)
     distribution_comment = "a simple distribution"
 
     region = identity.get_region()
-    resources = get_bootstrap_resources()
+    resources = get_bootstrap_snapshot()
     bucket_name = resources.PublicBucket.name
     bucket_domain_name = f"{bucket_name}.s3.amazonaws.com"
 
@@ -57,8 +56,13 @@ def simple_distribution():
 
     ref = k8s.CustomResourceReference(
         CRD_GROUP, CRD_VERSION, DISTRIBUTION_RESOURCE_PLURAL,
-        distribution_name, namespace="default",
+        distribution_name, namespace=parallel.namespace(),
     )
+    # Adopt a pre-deployed distribution from the pool if one is available,
+    # so that only the update to this spec has to deploy
+    pooled_id = distribution_pool.lease() if pooled else None
+    if pooled_id is not None:
+        distribution_pool.adopt(resource_data, pooled_id)
     k8s.create_custom_resource(ref, resource_data)
     cr = k8s.wait_resource_consumed_by_controller(ref)
 
@@ -70,23 +74,50 @@ def simple_distribution():
 
     distribution.wait_until_exists(distribution_id)
 
-    yield (ref, cr, distribution_id)
+    return (ref, cr, distribution_id)
+
 
+def delete_simple_distribution(value):
+    ref, _, distribution_id = value
     _, deleted = k8s.delete_custom_resource(
         ref,
         period_length=DELETE_WAIT_AFTER_SECONDS,
     )
     assert deleted
+    if distribution_pool.release(distribution_id):
+        return
     distribution.wait_until_deleted(distribution_id)
 
 
+prefetch.register("simple_distribution", create_simple_distribution, delete_simple_distribution)
+# Created and deleted through the controller, never leased from the pool, so
+# that its delete goes through disabling the distribution first
+prefetch.register(
+    "created_distribution",
+    lambda: create_simple_distribution(pooled=False),
+    delete_simple_distribution,
+)
+
+
+@pytest.fixture(scope="module")
+def simple_distribution():
+    with prefetch.claim("simple_distribution") as value:
+        yield value
+
+
+@pytest.fixture(scope="module")
+def created_distribution():
+    with prefetch.claim("created_distribution") as value:
+        yield value
+
+
 @service_marker
 @pytest.mark.canary
 class TestDistribution:
     def test_crud(self, simple_distribution):
         ref, res, distribution_id = simple_distribution
 
-        time.sleep(CHECK_STATUS_WAIT_SECONDS)
+        cr_watch.wait_until_synced(ref, timeout_seconds=CHECK_STATUS_WAIT_SECONDS)
 
         # Before we update the Distribution CR below, let's check to see that
         # the MinTTL field in the CR is still what we set in the original
@@ -114,22 +145,8 @@ class TestDistribution:
         assert 'status' in cr
         assert 'ackResourceMetadata' in cr['status']
         assert 'arn' in cr['status']['ackResourceMetadata']
-        arn = cr['status']['ackResourceMetadata']['arn']
-
         assert 'tags' in cr['spec']
-        user_tags = cr['spec']['tags']
-
-        response_tags = distribution.get_tags(arn)
-
-        tags.assert_ack_system_tags(
-            tags=response_tags,
-        )
-
-        user_tags = [{"Key": d["key"], "Value": d["value"]} for d in user_tags]
-        tags.assert_equal_without_ack_tags(
-            expected=user_tags,
-            actual=response_tags,
-        )
+        tagging.assert_cr_tags([cr])
 
         # We're now going to modify the enabled field of the Distribution, wait
         # some time and verify that the CloudFront server-side resource shows
@@ -150,10 +167,11 @@ class TestDistribution:
                 ]
             },
         }
+        etag = distribution.get(distribution_id)['ETag']
         k8s.patch_custom_resource(ref, updates)
-        time.sleep(MODIFY_WAIT_AFTER_SECONDS)
-
-        latest = distribution.get(distribution_id)
+        latest = distribution.wait_until_changed(
+            distribution_id, etag, timeout_seconds=MODIFY_WAIT_AFTER_SECONDS,
+        ).value
         assert latest is not None
         assert 'DistributionConfig' in latest
         assert 'Enabled' in latest['DistributionConfig']
@@ -164,25 +182,11 @@ class TestDistribution:
         assert 'status' in cr
         assert 'ackResourceMetadata' in cr['status']
         assert 'arn' in cr['status']['ackResourceMetadata']
-        arn = cr['status']['ackResourceMetadata']['arn']
-
         assert 'tags' in cr['spec']
-        user_tags = cr['spec']['tags']
-
-        response_tags = distribution.get_tags(arn)
-
-        tags.assert_ack_system_tags(
-            tags=response_tags,
-        )
+        tagging.assert_cr_tags([cr])
 
-        user_tags = [{"Key": d["key"], "Value": d["value"]} for d in user_tags]
-        tags.assert_equal_without_ack_tags(
-            expected=user_tags,
-            actual=response_tags,
-        )
-
-    def test_disable_pre_delete(self, simple_distribution):
-        ref, res, distribution_id = simple_distribution
+    def test_disable_pre_delete(self, created_distribution):
+        ref, res, distribution_id = created_distribution
         assert k8s.wait_on_condition(
             ref,
             "ACK.ResourceSynced",
@@ -17,21 +17,25 @@ import pytest
 
 from acktest.k8s import resource as k8s
 from acktest.k8s import condition
-from acktest.resources import random_suffix_name
-from e2e import service_marker, CRD_GROUP, CRD_VERSION, load_resource
+from e2e import parallel, reaper, service_marker, CRD_GROUP, CRD_VERSION, load_resource
 from e2e.replacement_values import REPLACEMENT_VALUES
-from e2e.bootstrap_resources import get_bootstrap_resources
+from e2e.snapshot import get_bootstrap_snapshot
 
 DISTRIBUTION_TENANT_RESOURCE_PLURAL = "distributiontenants"
 
 
+def delete_simple_distribution_tenant(ref):
+    _, deleted = k8s.delete_custom_resource(ref)
+    assert deleted
+
+
 @pytest.fixture(scope="module")
 def simple_distribution_tenant():
-    resources = get_bootstrap_resources()
+    resources = get_bootstrap_snapshot()
     dist_id = resources.TenantDistribution.distribution_id
     cg_id = resources.TenantConnectionGroup.connection_group_id
 
-    tenant_name = random_suffix_name("dt-test-tenant", 24)
+    tenant_name = parallel.random_name("dt-test-tenant", 24)
 
     replacements = REPLACEMENT_VALUES.copy()
     replacements["DISTRIBUTION_TENANT_NAME"] = tenant_name
@@ -46,7 +50,7 @@ def simple_distribution_tenant():
 
     ref = k8s.CustomResourceReference(
         CRD_GROUP, CRD_VERSION, DISTRIBUTION_TENANT_RESOURCE_PLURAL,
-        tenant_name, namespace="default",
+        tenant_name, namespace=parallel.namespace(),
     )
 
     k8s.create_custom_resource(ref, resource_data)
@@ -54,8 +58,7 @@ def simple_distribution_tenant():
 
     yield ref
 
-    _, deleted = k8s.delete_custom_resource(ref)
-    assert deleted
+    reaper.reap(f"DistributionTenant {ref.name}", delete_simple_distribution_tenant, ref)
 
 
 @service_marker
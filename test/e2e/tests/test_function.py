@@ -14,16 +14,15 @@
 """Integration tests for the CloudFront Function resource"""
 
 import logging
-import time
 
 import pytest
 from acktest.aws import identity
 from acktest.k8s import condition
 from acktest.k8s import resource as k8s
-from acktest.resources import random_suffix_name
-from e2e import CRD_GROUP, CRD_VERSION, function, load_resource, service_marker
-from e2e.bootstrap_resources import get_bootstrap_resources
+from e2e import CRD_GROUP, CRD_VERSION, function, load_resource, parallel, reaper, service_marker
+from e2e.snapshot import get_bootstrap_snapshot
 from e2e.replacement_values import REPLACEMENT_VALUES
+from e2e import cr_watch
 
 FUNCTIONS_RESOURCE_PLURAL = "functions"
 DELETE_WAIT_AFTER_SECONDS = 10
@@ -31,11 +30,22 @@ CHECK_STATUS_WAIT_SECONDS = 30
 MODIFY_WAIT_AFTER_SECONDS = 30
 
 
+def delete_simple_function(value):
+    ref, _, function_name = value
+    _, deleted = k8s.delete_custom_resource(
+        ref,
+        period_length=DELETE_WAIT_AFTER_SECONDS,
+    )
+    assert deleted
+
+    function.wait_until_deleted(function_name)
+
+
 @pytest.fixture
 def simple_function(request):
-    function_name = random_suffix_name("my-function", 24)
+    function_name = parallel.random_name("my-function", 24)
 
-    # resources = get_bootstrap_resources()
+    # resources = get_bootstrap_snapshot()
     # TODO(a-hilaly) replace example.com with bucket domain name
     # bucket_name = resources.PublicBucket.name
     # bucket_domain_name = f"{bucket_name}.s3.amazonaws.com"
@@ -65,7 +75,7 @@ def simple_function(request):
 
     ref = k8s.CustomResourceReference(
         CRD_GROUP, CRD_VERSION, FUNCTIONS_RESOURCE_PLURAL,
-        function_name, namespace="default",
+        function_name, namespace=parallel.namespace(),
     )
     k8s.create_custom_resource(ref, resource_data)
     cr = k8s.wait_resource_consumed_by_controller(ref)
@@ -79,13 +89,7 @@ def simple_function(request):
 
     yield (ref, cr, function_name)
 
-    _, deleted = k8s.delete_custom_resource(
-        ref,
-        period_length=DELETE_WAIT_AFTER_SECONDS,
-    )
-    assert deleted
-
-    function.wait_until_deleted(function_name)
+    reaper.reap(f"Function {ref.name}", delete_simple_function, (ref, cr, function_name))
 
 
 @service_marker
@@ -94,7 +98,7 @@ class TestFunction:
     def test_crud(self, simple_function):
         ref, res, function_name = simple_function
 
-        time.sleep(CHECK_STATUS_WAIT_SECONDS)
+        cr_watch.wait_until_synced(ref, timeout_seconds=CHECK_STATUS_WAIT_SECONDS)
 
         # Check that function exists
         cr = k8s.get_resource(ref)
@@ -114,10 +118,11 @@ class TestFunction:
                 }
             },
         }
+        etag = function.get(function_name)['ETag']
         k8s.patch_custom_resource(ref, updates)
-        time.sleep(MODIFY_WAIT_AFTER_SECONDS)
-
-        latest = function.get(function_name)
+        latest = function.wait_until_changed(
+            function_name, etag, timeout_seconds=MODIFY_WAIT_AFTER_SECONDS,
+        ).value
         assert latest is not None
         assert latest['Status'] == "UNPUBLISHED"
         assert latest['FunctionConfig']['Comment'] == "New comment"
@@ -128,7 +133,7 @@ class TestFunction:
     def test_auto_publish(self, simple_function):
         ref, res, function_name = simple_function
 
-        time.sleep(CHECK_STATUS_WAIT_SECONDS)
+        cr_watch.wait_until_synced(ref, timeout_seconds=CHECK_STATUS_WAIT_SECONDS)
 
         # Check that function exists
         cr = k8s.get_resource(ref)
@@ -152,8 +157,9 @@ class TestFunction:
                 }
             },
         }
+        before = k8s.get_resource(ref)
         k8s.patch_custom_resource(ref, updates)
-        time.sleep(MODIFY_WAIT_AFTER_SECONDS)
+        cr_watch.wait_until_updated(ref, before, timeout_seconds=MODIFY_WAIT_AFTER_SECONDS)
 
         condition.assert_synced(ref)
 
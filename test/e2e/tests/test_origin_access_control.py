@@ -13,16 +13,15 @@
 
 """Integration tests for the CloudFront OriginAccessControl resource"""
 
-import time
-
 import pytest
 
 from acktest.k8s import condition
 from acktest.k8s import resource as k8s
-from acktest.resources import random_suffix_name
-from e2e import service_marker, CRD_GROUP, CRD_VERSION, load_resource
+from e2e import parallel, service_marker, CRD_GROUP, CRD_VERSION, load_resource
 from e2e.replacement_values import REPLACEMENT_VALUES
 from e2e import origin_access_control
+from e2e import cr_watch
+from e2e import reaper
 
 ORIGIN_ACCESS_CONTROL_RESOURCE_PLURAL = "originaccesscontrols"
 DELETE_WAIT_AFTER_SECONDS = 10
@@ -30,9 +29,20 @@ CHECK_STATUS_WAIT_SECONDS = 10
 MODIFY_WAIT_AFTER_SECONDS = 10
 
 
+def delete_simple_origin_access_control(value):
+    ref, _, origin_access_control_id = value
+    _, deleted = k8s.delete_custom_resource(
+        ref,
+        period_length=DELETE_WAIT_AFTER_SECONDS,
+    )
+    assert deleted
+
+    origin_access_control.wait_until_deleted(origin_access_control_id)
+
+
 @pytest.fixture(scope="module")
 def simple_origin_access_control():
-    origin_access_control_name = random_suffix_name("my-oac", 24)
+    origin_access_control_name = parallel.random_name("my-oac", 24)
     origin_access_control_description = "a simple origin_access_control"
 
     replacements = REPLACEMENT_VALUES.copy()
@@ -51,7 +61,7 @@ def simple_origin_access_control():
         CRD_VERSION,
         ORIGIN_ACCESS_CONTROL_RESOURCE_PLURAL,
         origin_access_control_name,
-        namespace="default",
+        namespace=parallel.namespace(),
     )
     k8s.create_custom_resource(ref, resource_data)
     cr = k8s.wait_resource_consumed_by_controller(ref)
@@ -66,13 +76,7 @@ def simple_origin_access_control():
 
     yield (ref, cr, origin_access_control_id)
 
-    _, deleted = k8s.delete_custom_resource(
-        ref,
-        period_length=DELETE_WAIT_AFTER_SECONDS,
-    )
-    assert deleted
-
-    origin_access_control.wait_until_deleted(origin_access_control_id)
+    reaper.reap(f"OriginAccessControl {ref.name}", delete_simple_origin_access_control, (ref, cr, origin_access_control_id))
 
 
 @service_marker
@@ -81,7 +85,7 @@ class TestOriginAccessControl:
     def test_crud(self, simple_origin_access_control):
         ref, res, origin_access_control_id = simple_origin_access_control
 
-        time.sleep(CHECK_STATUS_WAIT_SECONDS)
+        cr_watch.wait_until_synced(ref, timeout_seconds=CHECK_STATUS_WAIT_SECONDS)
 
         cr = k8s.get_resource(ref)
         assert cr is not None
@@ -107,10 +111,11 @@ class TestOriginAccessControl:
         updates = {
             "spec": {"originAccessControlConfig": {"description": "new description"}},
         }
+        etag = origin_access_control.get(origin_access_control_id)["ETag"]
         k8s.patch_custom_resource(ref, updates)
-        time.sleep(MODIFY_WAIT_AFTER_SECONDS)
-
-        latest = origin_access_control.get(origin_access_control_id)
+        latest = origin_access_control.wait_until_changed(
+            origin_access_control_id, etag, timeout_seconds=MODIFY_WAIT_AFTER_SECONDS,
+        ).value
         assert latest is not None
         assert "OriginAccessControlConfig" in latest
         assert "Description" in latest["OriginAccessControlConfig"]
@@ -13,16 +13,15 @@
 
 """Integration tests for the CloudFront OriginRequestPolicy resource"""
 
-import time
-
 import pytest
 
 from acktest.k8s import condition
 from acktest.k8s import resource as k8s
-from acktest.resources import random_suffix_name
-from e2e import service_marker, CRD_GROUP, CRD_VERSION, load_resource
+from e2e import parallel, service_marker, CRD_GROUP, CRD_VERSION, load_resource
 from e2e.replacement_values import REPLACEMENT_VALUES
 from e2e import origin_request_policy
+from e2e import cr_watch
+from e2e import reaper
 
 ORIGIN_REQUEST_POLICY_RESOURCE_PLURAL = "originrequestpolicies"
 DELETE_WAIT_AFTER_SECONDS = 10
@@ -31,9 +30,20 @@ MODIFY_WAIT_AFTER_SECONDS = 10
 MIN_TTL = 600
 
 
+def delete_simple_origin_request_policy(value):
+    ref, _, origin_request_policy_id = value
+    _, deleted = k8s.delete_custom_resource(
+        ref,
+        period_length=DELETE_WAIT_AFTER_SECONDS,
+    )
+    assert deleted
+
+    origin_request_policy.wait_until_deleted(origin_request_policy_id)
+
+
 @pytest.fixture(scope="module")
 def simple_origin_request_policy():
-    origin_request_policy_name = random_suffix_name("my-orp", 24)
+    origin_request_policy_name = parallel.random_name("my-orp", 24)
     origin_request_policy_comment = "a simple origin_request_policy"
 
     replacements = REPLACEMENT_VALUES.copy()
@@ -47,7 +57,7 @@ def simple_origin_request_policy():
 
     ref = k8s.CustomResourceReference(
         CRD_GROUP, CRD_VERSION, ORIGIN_REQUEST_POLICY_RESOURCE_PLURAL,
-        origin_request_policy_name, namespace="default",
+        origin_request_policy_name, namespace=parallel.namespace(),
     )
     k8s.create_custom_resource(ref, resource_data)
     cr = k8s.wait_resource_consumed_by_controller(ref)
@@ -62,13 +72,7 @@ def simple_origin_request_policy():
 
     yield (ref, cr, origin_request_policy_id)
 
-    _, deleted = k8s.delete_custom_resource(
-        ref,
-        period_length=DELETE_WAIT_AFTER_SECONDS,
-    )
-    assert deleted
-
-    origin_request_policy.wait_until_deleted(origin_request_policy_id)
+    reaper.reap(f"OriginRequestPolicy {ref.name}", delete_simple_origin_request_policy, (ref, cr, origin_request_policy_id))
 
 
 @service_marker
@@ -77,7 +81,7 @@ class TestOriginRequestPolicy:
     def test_crud(self, simple_origin_request_policy):
         ref, res, origin_request_policy_id = simple_origin_request_policy
 
-        time.sleep(CHECK_STATUS_WAIT_SECONDS)
+        cr_watch.wait_until_synced(ref, timeout_seconds=CHECK_STATUS_WAIT_SECONDS)
 
         cr = k8s.get_resource(ref)
         assert cr is not None
@@ -101,10 +105,11 @@ class TestOriginRequestPolicy:
                 }
             },
         }
+        etag = origin_request_policy.get(origin_request_policy_id)['ETag']
         k8s.patch_custom_resource(ref, updates)
-        time.sleep(MODIFY_WAIT_AFTER_SECONDS)
-
-        latest = origin_request_policy.get(origin_request_policy_id)
+        latest = origin_request_policy.wait_until_changed(
+            origin_request_policy_id, etag, timeout_seconds=MODIFY_WAIT_AFTER_SECONDS,
+        ).value
         assert latest is not None
         assert 'OriginRequestPolicyConfig' in latest
         assert 'Comment' in latest['OriginRequestPolicyConfig']
@@ -13,16 +13,15 @@
 
 """Integration tests for the CloudFront ResponseHeadersPolicy resource"""
 
-import time
-
 import pytest
 
 from acktest.k8s import condition
 from acktest.k8s import resource as k8s
-from acktest.resources import random_suffix_name
-from e2e import service_marker, CRD_GROUP, CRD_VERSION, load_resource
+from e2e import parallel, service_marker, CRD_GROUP, CRD_VERSION, load_resource
 from e2e.replacement_values import REPLACEMENT_VALUES
 from e2e import response_headers_policy
+from e2e import cr_watch
+from e2e import reaper
 
 RESPONSE_HEADERS_POLICY_RESOURCE_PLURAL = "responseheaderspolicies"
 DELETE_WAIT_AFTER_SECONDS = 10
@@ -31,9 +30,20 @@ MODIFY_WAIT_AFTER_SECONDS = 10
 MIN_TTL = 600
 
 
+def delete_simple_response_headers_policy(value):
+    ref, _, response_headers_policy_id = value
+    _, deleted = k8s.delete_custom_resource(
+        ref,
+        period_length=DELETE_WAIT_AFTER_SECONDS,
+    )
+    assert deleted
+
+    response_headers_policy.wait_until_deleted(response_headers_policy_id)
+
+
 @pytest.fixture(scope="module")
 def simple_response_headers_policy():
-    response_headers_policy_name = random_suffix_name("my-rhp", 24)
+    response_headers_policy_name = parallel.random_name("my-rhp", 24)
     response_headers_policy_comment = "a simple response_headers_policy"
 
     replacements = REPLACEMENT_VALUES.copy()
@@ -47,7 +57,7 @@ def simple_response_headers_policy():
 
     ref = k8s.CustomResourceReference(
         CRD_GROUP, CRD_VERSION, RESPONSE_HEADERS_POLICY_RESOURCE_PLURAL,
-        response_headers_policy_name, namespace="default",
+        response_headers_policy_name, namespace=parallel.namespace(),
     )
     k8s.create_custom_resource(ref, resource_data)
     cr = k8s.wait_resource_consumed_by_controller(ref)
@@ -62,13 +72,7 @@ def simple_response_headers_policy():
 
     yield (ref, cr, response_headers_policy_id)
 
-    _, deleted = k8s.delete_custom_resource(
-        ref,
-        period_length=DELETE_WAIT_AFTER_SECONDS,
-    )
-    assert deleted
-
-    response_headers_policy.wait_until_deleted(response_headers_policy_id)
+    reaper.reap(f"ResponseHeadersPolicy {ref.name}", delete_simple_response_headers_policy, (ref, cr, response_headers_policy_id))
 
 
 @service_marker
@@ -77,7 +81,7 @@ class TestResponseHeadersPolicy:
     def test_crud(self, simple_response_headers_policy):
         ref, res, response_headers_policy_id = simple_response_headers_policy
 
-        time.sleep(CHECK_STATUS_WAIT_SECONDS)
+        cr_watch.wait_until_synced(ref, timeout_seconds=CHECK_STATUS_WAIT_SECONDS)
 
         cr = k8s.get_resource(ref)
         assert cr is not None
@@ -115,10 +119,11 @@ class TestResponseHeadersPolicy:
                 }
             },
         }
+        etag = response_headers_policy.get(response_headers_policy_id)['ETag']
         k8s.patch_custom_resource(ref, updates)
-        time.sleep(MODIFY_WAIT_AFTER_SECONDS)
-
-        latest = response_headers_policy.get(response_headers_policy_id)
+        latest = response_headers_policy.wait_until_changed(
+            response_headers_policy_id, etag, timeout_seconds=MODIFY_WAIT_AFTER_SECONDS,
+        ).value
         assert latest is not None
         assert 'ResponseHeadersPolicyConfig' in latest
         assert 'Comment' in latest['ResponseHeadersPolicyConfig']
@@ -0,0 +1,111 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+#	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Offline tests of recording and replaying CloudFront API traffic against
+the CloudFront stand-in"""
+
+import boto3
+import pytest
+
+from e2e import vcr
+from e2e.cloudfront_standin import CloudFrontStandIn
+
+
+def cache_policy_config(name: str, comment: str = "") -> dict:
+    return {
+        "Name": name,
+        "Comment": comment,
+        "MinTTL": 1,
+        "ParametersInCacheKeyAndForwardedToOrigin": {
+            "EnableAcceptEncodingGzip": False,
+            "HeadersConfig": {"HeaderBehavior": "none"},
+            "CookiesConfig": {"CookieBehavior": "none"},
+            "QueryStringsConfig": {"QueryStringBehavior": "none"},
+        },
+    }
+
+
+def new_client(standin: CloudFrontStandIn):
+    return boto3.client(
+        "cloudfront",
+        endpoint_url=standin.endpoint_url,
+        region_name="us-east-1",
+        aws_access_key_id="standin",
+        aws_secret_access_key="standin",
+    )
+
+
+def run_scenario(standin: CloudFrontStandIn, recorder: vcr.Recorder, name: str) -> dict:
+    """Creates a CachePolicy the way the controller would, without being
+    recorded, then reads, updates and deletes it through a recorded client,
+    starting from its ID as if taken from the CR's status."""
+    c = new_client(standin)
+    recorder.attach(c)
+    with recorder.use_cassette("roundtrip"):
+        # As `parallel.random_name` does
+        recorder.learn(name)
+        policy_id = new_client(standin).create_cache_policy(
+            CachePolicyConfig=cache_policy_config(name),
+        )["CachePolicy"]["Id"]
+
+        latest = c.get_cache_policy(Id=policy_id)
+        updated = c.update_cache_policy(
+            Id=policy_id,
+            IfMatch=latest["ETag"],
+            CachePolicyConfig=cache_policy_config(name, f"updated {name}"),
+        )
+        final = c.get_cache_policy(Id=policy_id)
+        c.delete_cache_policy(Id=policy_id, IfMatch=final["ETag"])
+    return {"id": policy_id, "updated": updated, "final": final}
+
+
+def test_replay_uses_the_values_of_the_replaying_run(tmp_path):
+    with CloudFrontStandIn(deploy_seconds=0) as standin:
+        recorded = run_scenario(standin, vcr.Recorder(vcr.RECORD, tmp_path), "my-cache-policy-a1b2c3d4")
+
+    # A new stand-in issues other IDs and ETags, and the replayed run's
+    # random suffix is all letters
+    with CloudFrontStandIn(deploy_seconds=0) as standin:
+        replayed = run_scenario(standin, vcr.Recorder(vcr.REPLAY, tmp_path, time_compression=1000), "my-cache-policy-qwertyui")
+        # Only the unrecorded create reached the stand-in
+        assert set(standin.calls) == {"CreateCachePolicy"}
+
+    assert replayed["id"] != recorded["id"]
+    assert replayed["final"]["CachePolicy"]["Id"] == replayed["id"]
+    config = replayed["final"]["CachePolicy"]["CachePolicyConfig"]
+    assert config["Name"] == "my-cache-policy-qwertyui"
+    assert config["Comment"] == "updated my-cache-policy-qwertyui"
+    assert replayed["updated"]["ETag"] == replayed["final"]["ETag"]
+
+
+@pytest.mark.parametrize("recorded, replayed", [
+    ("my-function-a1b2c3d4", "my-function-abcdefgh"),
+    ("my-function-gw0-a1b2c3d4", "my-function-gw3-12345678"),
+    ("origin-abc12", "origin-zyxwv"),
+    ("6bc5bfa8-5c8f-4a51-a7c6-4b6a3f2f8b1e", "0e7f84f3-3e54-4c11-a3b0-7f7d2c3e9a10"),
+    ("arn:aws:cloudfront::123456789012:distribution/E2QWRUHAPOMQZL", "arn:aws:cloudfront::123456789012:distribution/EDFDVBD6EXAMPLE"),
+    ("cg_2wjDWTBKTlRB87cAaUQFaakFgxA", "cg_7hQmZ1uY3pLxQ0cN5bVdR2aKsTe"),
+    ("d111111abcdef8.cloudfront.net", "d2222222bcdefg.cloudfront.net"),
+])
+def test_volatile_values_share_an_index(recorded, replayed):
+    assert (
+        vcr.interaction_key("GetThing", vcr.Aliases().alias({"Id": recorded}))
+        == vcr.interaction_key("GetThing", vcr.Aliases().alias({"Id": replayed}))
+    )
+
+
+def test_constant_values_keep_their_index():
+    aliases = vcr.Aliases()
+    assert aliases.alias({"Type": "managed", "Name": "Managed-CachingOptimized"}) == {
+        "Type": "managed", "Name": "Managed-CachingOptimized",
+    }
@@ -13,15 +13,14 @@
 
 """Integration tests for the CloudFront VpcOrigin resource"""
 
-import time
 import pytest
 
 from acktest.k8s import condition
 from acktest.k8s import resource as k8s
-from acktest.resources import random_suffix_name
-from e2e import service_marker, CRD_GROUP, CRD_VERSION, load_resource
+from e2e import parallel, service_marker, CRD_GROUP, CRD_VERSION, load_resource
 from e2e.replacement_values import REPLACEMENT_VALUES
-from e2e.bootstrap_resources import get_bootstrap_resources
+from e2e.snapshot import get_bootstrap_snapshot
+from e2e import prefetch
 from e2e import vpc_origin
 from logging import getLogger
 
@@ -36,9 +35,8 @@ MODIFY_WAIT_AFTER_SECONDS = 30
 logger = getLogger(__name__)
 
 
-@pytest.fixture(scope="module")
-def simple_vpc_origin():
-    vpc_origin_name = random_suffix_name("cloudfront-test-vpc-origin", 32)
+def create_simple_vpc_origin():
+    vpc_origin_name = parallel.random_name("cloudfront-test-vpc-origin", 32)
     vpc_origin_protocol_policy = "http-only"
     vpc_origin_ssl_protocols_1 = "TLSv1.2"
     vpc_origin_http_port = "80"
@@ -48,7 +46,7 @@ def simple_vpc_origin():
 
     replacements = REPLACEMENT_VALUES.copy()
     replacements["VPC_ORIGIN_NAME"] = vpc_origin_name
-    replacements["VPC_ORIGIN_ENDPOINT_ARN"] = get_bootstrap_resources().NetworkLoadBalancer.arn
+    replacements["VPC_ORIGIN_ENDPOINT_ARN"] = get_bootstrap_snapshot().NetworkLoadBalancer.arn
     replacements["VPC_ORIGIN_HTTP_PORT"] = vpc_origin_http_port
     replacements["VPC_ORIGIN_HTTPS_PORT"] = vpc_origin_https_port
     replacements["VPC_ORIGIN_PROTOCOL_POLICY"] = vpc_origin_protocol_policy
@@ -66,7 +64,7 @@ def simple_vpc_origin():
         CRD_VERSION,
         VPC_ORIGIN_RESOURCE_PLURAL,
         vpc_origin_name,
-        namespace="default",
+        namespace=parallel.namespace(),
     )
 
     logger.info("Creating VPCOrigin %s", vpc_origin_name)
@@ -82,9 +80,12 @@ def simple_vpc_origin():
     vpc_origin.wait_until_exists(vpc_origin_id)
     logger.info("VPCOrigin %s exists in cluster", vpc_origin_name)
 
-    yield (ref, cr, vpc_origin_id)
+    return (ref, cr, vpc_origin_id)
+
 
-    logger.info("Deleting VPCOrigin %s", vpc_origin_name)
+def delete_simple_vpc_origin(value):
+    ref, _, vpc_origin_id = value
+    logger.info("Deleting VPCOrigin %s", ref.name)
     _, deleted = k8s.delete_custom_resource(
         ref,
         wait_periods=DELETE_WAIT_PERIODS,
@@ -95,6 +96,15 @@ def simple_vpc_origin():
     vpc_origin.wait_until_deleted(vpc_origin_id)
 
 
+prefetch.register("simple_vpc_origin", create_simple_vpc_origin, delete_simple_vpc_origin)
+
+
+@pytest.fixture(scope="module")
+def simple_vpc_origin():
+    with prefetch.claim("simple_vpc_origin") as value:
+        yield value
+
+
 @service_marker
 @pytest.mark.canary
 class TestVpcOrigin:
@@ -126,10 +136,11 @@ class TestVpcOrigin:
         updates = {
             "spec": {"vpcOriginEndpointConfig": {"originProtocolPolicy": "https-only"}},
         }
+        etag = vpc_origin.get(vpc_origin_id)["ETag"]
         k8s.patch_custom_resource(ref, updates)
-        time.sleep(MODIFY_WAIT_AFTER_SECONDS)
-
-        latest = vpc_origin.get(vpc_origin_id)
+        latest = vpc_origin.wait_until_changed(
+            vpc_origin_id, etag, timeout_seconds=MODIFY_WAIT_AFTER_SECONDS,
+        ).value
         assert latest is not None
         assert "VpcOriginEndpointConfig" in latest
         assert "OriginProtocolPolicy" in latest["VpcOriginEndpointConfig"]
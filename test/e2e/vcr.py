@@ -0,0 +1,489 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Records the CloudFront API traffic of the e2e harness, and replays it.
+
+In record mode, every call made by a client from `e2e.clients` is stored in
+the active cassette. In replay mode, calls are answered from the cassette
+without reaching CloudFront, and the waiters sleep `time_compression` times
+less, so a run that took an hour against CloudFront replays in seconds.
+Only CloudFront traffic is replayed: the tests still need a cluster.
+
+Calls are indexed by operation and parameters. Values that change from run
+to run, such as CloudFront IDs and ETags, UUIDs, the suffixes of
+`random_suffix_name` and the xdist worker tags, are replaced by
+placeholders, numbered in the order each value is first seen in a
+cassette: in a response, in a parameter the harness learned elsewhere,
+e.g. from a CR's status, or when the harness generates it (see `learn`). Both the index and the stored
+responses use the placeholders, and the cassette keeps the value each
+placeholder stood for. A replayed run numbers its own values the same
+way, so its calls find their recorded counterparts, and the recorded
+responses are answered with its own values in place of the placeholders.
+Calls with the same index are answered in the order they were recorded;
+once they run out, the last response repeats, so a waiter may poll more or
+less often than when recording. Identical consecutive responses are stored
+once, with a count.
+
+Cassettes are gzipped JSON files, one per test module plus one for the
+bootstrap, in `--vcr-dir`:
+
+    pytest --vcr=record tests/
+    pytest --vcr=replay --vcr-time-compression=100 tests/
+
+Outside of pytest, e.g. for `service_bootstrap.py`, set `E2E_VCR_MODE` and
+`E2E_VCR_DIR` instead.
+"""
+
+import base64
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pytest
+from botocore.response import StreamingBody
+
+from e2e import bootstrap_directory, clients, waiter
+from e2e.snapshot import Snapshot
+
+CASSETTE_VERSION = 2
+CASSETTE_SUFFIX = ".json.gz"
+BOOTSTRAP_CASSETTE = "bootstrap"
+DEFAULT_DIRECTORY = bootstrap_directory / "cassettes"
+DEFAULT_TIME_COMPRESSION = 100.0
+
+RECORD = "record"
+REPLAY = "replay"
+MODES = (RECORD, REPLAY)
+
+MODE_ENV_VAR = "E2E_VCR_MODE"
+DIRECTORY_ENV_VAR = "E2E_VCR_DIR"
+TIME_COMPRESSION_ENV_VAR = "E2E_VCR_TIME_COMPRESSION"
+
+# Services whose traffic is recorded
+SERVICES = ("cloudfront",)
+
+# Parts of values that change from run to run. Where several match, the
+# leftmost wins, e.g. a UUID over its last group.
+VOLATILE_PATTERNS = [
+    # UUIDs, e.g. the IDs of policies
+    r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b",
+    # Distribution, OriginAccessControl and similar IDs, and ETags
+    r"\bE[A-Z0-9]{11,15}\b",
+    # ConnectionGroup, VpcOrigin and DistributionTenant IDs
+    r"\b(?:cg|vo|dt)_[A-Za-z0-9]{10,}\b",
+    # The host of a CloudFront domain name
+    r"\b[a-z0-9]{10,16}(?=\.cloudfront\.net\b)",
+    # The xdist worker tag of `parallel.random_name`
+    r"(?<=-)gw\d+(?=-)",
+    # The suffix of `random_suffix_name`: the last segment of a name, at
+    # least as long as the shortest suffix the tests generate, whatever
+    # its characters
+    r"(?<=-)[a-z0-9]{5,}(?![a-z0-9-])",
+]
+VOLATILE_PATTERN = re.compile("|".join(f"(?:{p})" for p in VOLATILE_PATTERNS))
+PLACEHOLDER_PATTERN = re.compile(r"<vcr:(\d+)>")
+# Keys of the encoded values that are kept as is
+ENCODED_KEYS = {"$datetime", "$bytes", "$stream"}
+# Parameters that are ignored altogether
+VOLATILE_PARAMETERS = {"CallerReference"}
+MASK = "*"
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode for a call that the cassette does not hold."""
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, datetime.datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, (bytes, bytearray)):
+        return {"$bytes": base64.b64encode(value).decode()}
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$datetime" in value:
+            return datetime.datetime.fromisoformat(value["$datetime"])
+        if "$bytes" in value:
+            return base64.b64decode(value["$bytes"])
+        if "$stream" in value:
+            data = base64.b64decode(value["$stream"])
+            return StreamingBody(io.BytesIO(data), len(data))
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+def _mask(value: Any) -> Any:
+    if isinstance(value, dict) and "$bytes" in value:
+        return hashlib.sha256(value["$bytes"].encode()).hexdigest()
+    if isinstance(value, dict):
+        return {k: MASK if k in VOLATILE_PARAMETERS else _mask(v) for k, v in sorted(value.items())}
+    if isinstance(value, list):
+        return [_mask(v) for v in value]
+    return value
+
+
+def interaction_key(operation: str, params: dict) -> str:
+    """Returns the index of a call in a cassette, given its encoded
+    parameters with placeholders in place of their volatile values."""
+    return f"{operation} {json.dumps(_mask(params), sort_keys=True, separators=(',', ':'))}"
+
+
+class Aliases:
+    """Numbers the volatile values of a cassette in the order they are first
+    seen, and replaces them with placeholders and back."""
+
+    def __init__(self, recorded: Optional[Dict[str, str]] = None):
+        # The value of each placeholder when the cassette was recorded
+        self.recorded: Dict[str, str] = dict(recorded or {})
+        # The value of each placeholder in this run, and the reverse
+        self.values: Dict[str, str] = {}
+        self._placeholders: Dict[str, str] = {}
+        self._next = 1
+
+    def _bind(self, placeholder: str, value: str):
+        self.values[placeholder] = value
+        self._placeholders.setdefault(value, placeholder)
+        self._next = max(self._next, int(PLACEHOLDER_PATTERN.fullmatch(placeholder).group(1)) + 1)
+
+    def _placeholder(self, value: str) -> str:
+        placeholder = self._placeholders.get(value)
+        if placeholder is None:
+            placeholder = f"<vcr:{self._next}>"
+            self._bind(placeholder, value)
+        return placeholder
+
+    def alias(self, value: Any) -> Any:
+        """Returns an encoded value with placeholders in place of its
+        volatile parts, numbering the ones not seen before."""
+        if isinstance(value, dict) and value.keys() & ENCODED_KEYS:
+            return value
+        if isinstance(value, dict):
+            return {k: self.alias(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.alias(v) for v in value]
+        if isinstance(value, str):
+            return VOLATILE_PATTERN.sub(lambda m: self._placeholder(m.group(0)), value)
+        return value
+
+    def unalias(self, value: Any) -> Any:
+        """Returns a recorded value with this run's values in place of its
+        placeholders. Placeholders that this run has not seen yet, e.g. the
+        ID of a resource that a replayed call created, stand for their
+        recorded value."""
+        if isinstance(value, dict):
+            return {k: self.unalias(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.unalias(v) for v in value]
+        if isinstance(value, str):
+            return PLACEHOLDER_PATTERN.sub(self._value, value)
+        return value
+
+    def _value(self, match) -> str:
+        placeholder = match.group(0)
+        if placeholder not in self.values:
+            if placeholder not in self.recorded:
+                raise CassetteMiss(f"{placeholder} is not in the cassette's aliases")
+            self._bind(placeholder, self.recorded[placeholder])
+        return self.values[placeholder]
+
+
+class Cassette:
+    def __init__(self, path: Path, mode: str):
+        self.path = Path(path)
+        self.mode = mode
+        self._lock = threading.Lock()
+        # Recorded calls by index: the parameters of the first call, and
+        # the responses as [count, status, latency_ms, parsed] runs, all
+        # with placeholders in place of their volatile values
+        self.interactions: Dict[str, dict] = {}
+        # Replay position by index: (run, count used in the run)
+        self._positions: Dict[str, List[int]] = {}
+        self.aliases = Aliases()
+        if mode == REPLAY:
+            self.load()
+
+    def load(self):
+        try:
+            with gzip.open(self.path, "rt") as f:
+                recorded = json.load(f)
+        except FileNotFoundError:
+            raise CassetteMiss(f"No cassette at {self.path}")
+        if recorded.get("version") != CASSETTE_VERSION:
+            raise CassetteMiss(f"Unsupported cassette version in {self.path}")
+        self.interactions = recorded["interactions"]
+        self.aliases = Aliases(recorded["aliases"])
+
+    def save(self):
+        if self.mode != RECORD or not self.interactions:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with gzip.open(tmp_path, "wt") as f:
+            json.dump(
+                {
+                    "version": CASSETTE_VERSION,
+                    "aliases": self.aliases.values,
+                    "interactions": self.interactions,
+                },
+                f,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, self.path)
+        logging.info(f"Recorded {len(self.interactions)} distinct API calls to {self.path}")
+
+    def record(self, operation: str, params: dict, status: int, latency_ms: float, parsed: dict):
+        with self._lock:
+            params = self.aliases.alias(params)
+            parsed = self.aliases.alias(parsed)
+            key = interaction_key(operation, params)
+            interaction = self.interactions.setdefault(key, {"params": params, "responses": []})
+            responses = interaction["responses"]
+            if responses and responses[-1][1] == status and responses[-1][3] == parsed:
+                responses[-1][0] += 1
+            else:
+                responses.append([1, status, round(latency_ms), parsed])
+
+    def learn(self, value: Any):
+        """Numbers the volatile parts of a value that the harness generated
+        or learned without a recorded call, e.g. a random resource name."""
+        with self._lock:
+            self.aliases.alias(_encode(value))
+
+    def play(self, operation: str, params: dict):
+        """Returns the status, latency and response of the next recorded
+        call of an operation with the given encoded parameters."""
+        with self._lock:
+            key = interaction_key(operation, self.aliases.alias(params))
+            interaction = self.interactions.get(key)
+            if interaction is None:
+                raise CassetteMiss(f"{key} is not in {self.path}")
+            responses = interaction["responses"]
+            position = self._positions.setdefault(key, [0, 0])
+            run, used = position
+            count, status, latency_ms, parsed = responses[run]
+            if used + 1 < count:
+                position[1] += 1
+            elif run + 1 < len(responses):
+                position[:] = [run + 1, 0]
+            return status, latency_ms, self.aliases.unalias(parsed)
+
+
+class _ReplayedResponse:
+    """Stands in for the HTTP response of a replayed call."""
+
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.headers = {}
+        self.content = b""
+
+
+class Recorder:
+    def __init__(self, mode: str, directory: Path, time_compression: float = DEFAULT_TIME_COMPRESSION):
+        if mode not in MODES:
+            raise ValueError(f"Unknown VCR mode {mode}, expected one of {MODES}")
+        self.mode = mode
+        self.directory = Path(directory)
+        self.time_compression = time_compression
+        self._lock = threading.Lock()
+        self._cassettes: List[Cassette] = []
+
+    @property
+    def cassette(self) -> Optional[Cassette]:
+        with self._lock:
+            return self._cassettes[-1] if self._cassettes else None
+
+    @contextmanager
+    def use_cassette(self, name: str):
+        """Records to, or replays from, the named cassette until exit."""
+        cassette = Cassette(self.directory / f"{name}{CASSETTE_SUFFIX}", self.mode)
+        with self._lock:
+            self._cassettes.append(cassette)
+        try:
+            yield cassette
+        finally:
+            with self._lock:
+                self._cassettes.remove(cassette)
+            cassette.save()
+
+    def learn(self, value: Any):
+        cassette = self.cassette
+        if cassette is not None:
+            cassette.learn(value)
+
+    def attach(self, client):
+        """Records or replays the calls of a botocore client. Registered as
+        a client hook."""
+        if client.meta.service_model.service_name not in SERVICES:
+            return
+        events = client.meta.events
+        events.register("before-parameter-build", self._before_parameter_build)
+        events.register("before-call", self._before_call)
+        events.register("after-call", self._after_call)
+
+    def _before_parameter_build(self, params, model, context, **kwargs):
+        context["vcr_params"] = _encode(params)
+
+    def _before_call(self, model, context, **kwargs):
+        context["vcr_started_at"] = time.monotonic()
+        cassette = self.cassette
+        if self.mode != REPLAY or cassette is None or "vcr_params" not in context:
+            return None
+        status, latency_ms, parsed = cassette.play(model.name, context["vcr_params"])
+        time.sleep(latency_ms / 1000 / self.time_compression)
+        context["vcr_replayed"] = True
+        parsed = _decode(parsed)
+        parsed["ResponseMetadata"] = {"HTTPStatusCode": status, "HTTPHeaders": {}, "RetryAttempts": 0}
+        return _ReplayedResponse(status), parsed
+
+    def _after_call(self, http_response, parsed, model, context, **kwargs):
+        cassette = self.cassette
+        if self.mode != RECORD or cassette is None or context.get("vcr_replayed"):
+            return
+        if "vcr_params" not in context:
+            return
+        latency_ms = (time.monotonic() - context["vcr_started_at"]) * 1000
+        recorded = {}
+        for name, value in parsed.items():
+            if name == "ResponseMetadata":
+                continue
+            if isinstance(value, StreamingBody):
+                # Read the body for the cassette and hand the caller a copy
+                data = value.read()
+                parsed[name] = StreamingBody(io.BytesIO(data), len(data))
+                recorded[name] = {"$stream": base64.b64encode(data).decode()}
+            else:
+                recorded[name] = _encode(value)
+        cassette.record(
+            model.name, context["vcr_params"], http_response.status_code, latency_ms, recorded,
+        )
+
+
+_recorder: Optional[Recorder] = None
+
+
+def install(mode: str, directory: Path = DEFAULT_DIRECTORY, time_compression: float = DEFAULT_TIME_COMPRESSION) -> Recorder:
+    """Records or replays the traffic of every client from `e2e.clients`."""
+    global _recorder
+    _recorder = Recorder(mode, directory, time_compression)
+    # Replays sleep for the recorded latency
+    clients.register_client_hook(_recorder.attach, blocking=True)
+    if mode == REPLAY:
+        waiter.set_time_compression(time_compression)
+    return _recorder
+
+
+def installed() -> Optional[Recorder]:
+    """Returns the recorder of the last `install`, if any."""
+    return _recorder
+
+
+def install_from_env() -> Optional[Recorder]:
+    """Installs the recorder configured by `E2E_VCR_MODE`, if any."""
+    mode = os.environ.get(MODE_ENV_VAR)
+    if not mode:
+        return None
+    return install(
+        mode,
+        Path(os.environ.get(DIRECTORY_ENV_VAR, DEFAULT_DIRECTORY)),
+        float(os.environ.get(TIME_COMPRESSION_ENV_VAR, DEFAULT_TIME_COMPRESSION)),
+    )
+
+
+def learn(value: Any):
+    """Numbers the volatile parts of a value in the active cassette, if a
+    recorder is installed. The harness calls it for the values that reach
+    CloudFront without going through a recorded call first, such as the
+    random names of the CRs, so that recorded responses revealing them are
+    answered with the replaying run's values."""
+    if _recorder is not None:
+        _recorder.learn(value)
+
+
+@contextmanager
+def use_cassette(name: str):
+    """Records to, or replays from, the named cassette, if a recorder is
+    installed."""
+    if _recorder is None:
+        yield None
+        return
+    with _recorder.use_cassette(name) as cassette:
+        yield cassette
+
+
+def cassette_name(nodeid: str) -> str:
+    return Path(nodeid.split("::", 1)[0]).stem
+
+
+class VcrPlugin:
+    """Switches to the cassette of each test module."""
+
+    def __init__(self):
+        self._module = None
+        self._context = None
+
+    def _close(self):
+        if self._context is not None:
+            self._context.__exit__(None, None, None)
+            self._context = None
+            self._module = None
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        module = cassette_name(item.nodeid)
+        if module != self._module:
+            self._close()
+            self._context = use_cassette(module)
+            self._context.__enter__()
+            self._module = module
+            # The tests pass bootstrapped names and IDs to the controller,
+            # and may first see them in a recorded response
+            if Snapshot.exists(bootstrap_directory):
+                learn(Snapshot.load(bootstrap_directory).document)
+        yield
+        if nextitem is None or cassette_name(nextitem.nodeid) != module:
+            self._close()
+
+    def pytest_sessionfinish(self, session):
+        self._close()
+
+
+def register(config):
+    """Enables recording or replaying if `--vcr` was given."""
+    mode = config.getoption("--vcr")
+    if not mode:
+        return
+    install(
+        mode,
+        Path(config.getoption("--vcr-dir")),
+        config.getoption("--vcr-time-compression"),
+    )
+    config.pluginmanager.register(VcrPlugin(), "e2e-vcr")
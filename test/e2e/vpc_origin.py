@@ -13,23 +13,22 @@
 
 """Utilities for working with VpcOrigin resources"""
 
-import datetime
-import time
-
-import boto3
-import pytest
+from e2e import waiter
+from e2e.clients import get_cloudfront_client
 
 DEFAULT_WAIT_UNTIL_EXISTS_TIMEOUT_SECONDS = 60 * 10
 DEFAULT_WAIT_UNTIL_EXISTS_INTERVAL_SECONDS = 15
 DEFAULT_WAIT_UNTIL_DELETED_TIMEOUT_SECONDS = 60 * 10
 DEFAULT_WAIT_UNTIL_DELETED_INTERVAL_SECONDS = 15
+DEFAULT_WAIT_UNTIL_CHANGED_TIMEOUT_SECONDS = 60 * 5
+DEFAULT_WAIT_UNTIL_CHANGED_INTERVAL_SECONDS = 5
 
 
 def wait_until_exists(
     vpc_origin_id: str,
     timeout_seconds: int = DEFAULT_WAIT_UNTIL_EXISTS_TIMEOUT_SECONDS,
     interval_seconds: int = DEFAULT_WAIT_UNTIL_EXISTS_INTERVAL_SECONDS,
-) -> None:
+) -> waiter.WaitResult:
     """Waits until a VpcOrigin with a supplied ID is returned from
     CloudFront GetVpcOrigin API.
 
@@ -38,30 +37,25 @@ def wait_until_exists(
 
         wait_until_exists(vpc_origin_id)
 
+    Returns:
+        a WaitResult with the number of polls and the seconds waited
+
     Raises:
         pytest.fail upon timeout
     """
-    now = datetime.datetime.now()
-    timeout = now + datetime.timedelta(seconds=timeout_seconds)
-
-    while True:
-        if datetime.datetime.now() >= timeout:
-            pytest.fail(
-                "Timed out waiting for VpcOrigin to exist "
-                "in CloudFront API"
-            )
-        time.sleep(interval_seconds)
-
-        latest = get(vpc_origin_id)
-        if latest is not None:
-            break
+    return waiter.wait_until_exists(
+        lambda: get(vpc_origin_id),
+        "VpcOrigin",
+        timeout_seconds=timeout_seconds,
+        max_interval_seconds=interval_seconds,
+    )
 
 
 def wait_until_deleted(
     vpc_origin_id: str,
     timeout_seconds: int = DEFAULT_WAIT_UNTIL_DELETED_TIMEOUT_SECONDS,
     interval_seconds: int = DEFAULT_WAIT_UNTIL_DELETED_INTERVAL_SECONDS,
-) -> None:
+) -> waiter.WaitResult:
     """Waits until a VpcOrigin with a supplied ID is no longer returned from
     the CloudFront API.
 
@@ -70,23 +64,48 @@ def wait_until_deleted(
 
         wait_until_deleted(vpc_origin_id)
 
+    Returns:
+        a WaitResult with the number of polls and the seconds waited
+
     Raises:
         pytest.fail upon timeout
     """
-    now = datetime.datetime.now()
-    timeout = now + datetime.timedelta(seconds=timeout_seconds)
+    return waiter.wait_until_deleted(
+        lambda: get(vpc_origin_id),
+        "VpcOrigin",
+        timeout_seconds=timeout_seconds,
+        max_interval_seconds=interval_seconds,
+    )
+
+
+def wait_until_changed(
+    vpc_origin_id: str,
+    since_etag: str,
+    timeout_seconds: int = DEFAULT_WAIT_UNTIL_CHANGED_TIMEOUT_SECONDS,
+    interval_seconds: int = DEFAULT_WAIT_UNTIL_CHANGED_INTERVAL_SECONDS,
+) -> waiter.WaitResult:
+    """Waits until the CloudFront API returns a version of a VpcOrigin
+    other than `since_etag`, i.e. until an update has been applied.
+
+    Usage:
+        from e2e.vpc_origin import wait_until_changed
+
+        wait_until_changed(vpc_origin_id, latest["ETag"])
 
-    while True:
-        if datetime.datetime.now() >= timeout:
-            pytest.fail(
-                "Timed out waiting for VpcOrigin to be "
-                "deleted in CloudFront API"
-            )
-        time.sleep(interval_seconds)
+    Returns:
+        a WaitResult with the new record, the number of polls and the
+        seconds waited
 
-        latest = get(vpc_origin_id)
-        if latest is None:
-            break
+    Raises:
+        pytest.fail upon timeout
+    """
+    return waiter.wait_until_changed(
+        lambda: get(vpc_origin_id),
+        "VpcOrigin",
+        since_etag,
+        timeout_seconds=timeout_seconds,
+        max_interval_seconds=interval_seconds,
+    )
 
 
 def get(vpc_origin_id):
@@ -95,9 +114,11 @@ def get(vpc_origin_id):
 
     If no such VpcOrigin exists, returns None.
     """
-    c = boto3.client("cloudfront")
+    c = get_cloudfront_client()
     try:
         resp = c.get_vpc_origin(Id=vpc_origin_id)
-        return resp["VpcOrigin"]
+        record = resp["VpcOrigin"]
+        record["ETag"] = resp["ETag"]
+        return record
     except c.exceptions.EntityNotFound:
         return None
\ No newline at end of file
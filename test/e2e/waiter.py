@@ -0,0 +1,231 @@
+# Copyright Amazon.com Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may
+# not use this file except in compliance with the License. A copy of the
+# License is located at
+#
+# 	 http://aws.amazon.com/apache2.0/
+#
+# or in the "license" file accompanying this file. This file is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied. See the License for the specific language governing
+# permissions and limitations under the License.
+
+"""Adaptive polling shared by the resource helper modules.
+
+Every waiter checks immediately, then backs off exponentially (with jitter)
+from `DEFAULT_INITIAL_INTERVAL_SECONDS` up to a per-kind maximum interval,
+until the condition holds or the deadline passes.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+import pytest
+
+DEFAULT_INITIAL_INTERVAL_SECONDS = 1
+DEFAULT_MAX_INTERVAL_SECONDS = 15
+DEFAULT_BACKOFF_MULTIPLIER = 2.0
+DEFAULT_JITTER = 0.2
+
+# Sleeps between polls are divided by this factor, see `set_time_compression`
+_time_compression = 1.0
+# Seconds each thread has skipped by sleeping less than requested
+_skipped = threading.local()
+
+
+def set_time_compression(factor: float):
+    """Makes every waiter sleep `factor` times less than it asks for, while
+    its deadlines and reported wait times still advance as if it had slept
+    in full. Used to replay recorded API traffic quickly."""
+    global _time_compression
+    _time_compression = factor
+
+
+def _now() -> float:
+    return time.monotonic() + getattr(_skipped, "seconds", 0.0)
+
+
+def _sleep(seconds: float):
+    real_seconds = seconds / _time_compression
+    time.sleep(real_seconds)
+    _skipped.seconds = getattr(_skipped, "seconds", 0.0) + seconds - real_seconds
+
+
+class WaitTimeoutError(Exception):
+    """Raised when a condition does not hold before the deadline."""
+
+    def __init__(self, description: str, result: "WaitResult"):
+        super().__init__(
+            f"Timed out waiting for {description} after {result.polls} polls "
+            f"({result.waited_seconds:.1f}s)"
+        )
+        self.result = result
+
+
+@dataclass
+class WaitResult:
+    # The last value returned by the check function
+    value: Any
+    # Number of times the check function was called
+    polls: int
+    # Wall-clock seconds spent in the waiter, including the checks
+    waited_seconds: float
+
+
+def wait_for(
+    check: Callable[[], Any],
+    condition: Callable[[Any], bool],
+    description: str,
+    timeout_seconds: float,
+    max_interval_seconds: float = DEFAULT_MAX_INTERVAL_SECONDS,
+    initial_interval_seconds: float = DEFAULT_INITIAL_INTERVAL_SECONDS,
+    multiplier: float = DEFAULT_BACKOFF_MULTIPLIER,
+    jitter: float = DEFAULT_JITTER,
+) -> WaitResult:
+    """Calls `check` until `condition(check())` is true.
+
+    The first check happens immediately. Subsequent checks are spaced by an
+    interval that starts at `initial_interval_seconds` and is multiplied by
+    `multiplier` after every poll, capped at `max_interval_seconds`. Each
+    sleep is randomized by +/- `jitter` and never overshoots the deadline.
+
+    Raises:
+        WaitTimeoutError if the condition does not hold before the deadline.
+    """
+    start = _now()
+    deadline = start + timeout_seconds
+    interval = min(initial_interval_seconds, max_interval_seconds)
+    polls = 0
+
+    while True:
+        value = check()
+        polls += 1
+        now = _now()
+        result = WaitResult(value=value, polls=polls, waited_seconds=now - start)
+        if condition(value):
+            logging.info(
+                f"{description}: done after {polls} polls "
+                f"({result.waited_seconds:.1f}s)"
+            )
+            return result
+        if now >= deadline:
+            raise WaitTimeoutError(description, result)
+
+        delay = max(0, min(interval * random.uniform(1 - jitter, 1 + jitter), deadline - now))
+        logging.debug(f"{description}: poll {polls} not satisfied, next in {delay:.1f}s")
+        _sleep(delay)
+        interval = min(interval * multiplier, max_interval_seconds)
+
+
+async def wait_for_async(
+    check: Callable[[], Awaitable[Any]],
+    condition: Callable[[Any], bool],
+    description: str,
+    timeout_seconds: float,
+    max_interval_seconds: float = DEFAULT_MAX_INTERVAL_SECONDS,
+    initial_interval_seconds: float = DEFAULT_INITIAL_INTERVAL_SECONDS,
+    multiplier: float = DEFAULT_BACKOFF_MULTIPLIER,
+    jitter: float = DEFAULT_JITTER,
+) -> WaitResult:
+    """Like `wait_for`, but awaits the coroutine function `check` and
+    sleeps without blocking the event loop.
+
+    Raises:
+        WaitTimeoutError if the condition does not hold before the deadline.
+    """
+    start = time.monotonic()
+    # Seconds skipped by sleeping less than requested, see
+    # `set_time_compression`
+    skipped = 0.0
+    deadline = start + timeout_seconds
+    interval = min(initial_interval_seconds, max_interval_seconds)
+    polls = 0
+
+    while True:
+        value = await check()
+        polls += 1
+        now = time.monotonic() + skipped
+        result = WaitResult(value=value, polls=polls, waited_seconds=now - start)
+        if condition(value):
+            logging.info(
+                f"{description}: done after {polls} polls "
+                f"({result.waited_seconds:.1f}s)"
+            )
+            return result
+        if now >= deadline:
+            raise WaitTimeoutError(description, result)
+
+        delay = max(0, min(interval * random.uniform(1 - jitter, 1 + jitter), deadline - now))
+        logging.debug(f"{description}: poll {polls} not satisfied, next in {delay:.1f}s")
+        real_delay = delay / _time_compression
+        await asyncio.sleep(real_delay)
+        skipped += delay - real_delay
+        interval = min(interval * multiplier, max_interval_seconds)
+
+
+def wait_until_exists(
+    get: Callable[[], Any],
+    kind: str,
+    timeout_seconds: float,
+    max_interval_seconds: float = DEFAULT_MAX_INTERVAL_SECONDS,
+) -> WaitResult:
+    """Waits until `get()` returns a record, failing the current test upon
+    timeout."""
+    try:
+        return wait_for(
+            get,
+            lambda latest: latest is not None,
+            f"{kind} to exist in CloudFront API",
+            timeout_seconds=timeout_seconds,
+            max_interval_seconds=max_interval_seconds,
+        )
+    except WaitTimeoutError as ex:
+        pytest.fail(str(ex))
+
+
+def wait_until_deleted(
+    get: Callable[[], Any],
+    kind: str,
+    timeout_seconds: float,
+    max_interval_seconds: float = DEFAULT_MAX_INTERVAL_SECONDS,
+) -> WaitResult:
+    """Waits until `get()` no longer returns a record, failing the current
+    test upon timeout."""
+    try:
+        return wait_for(
+            get,
+            lambda latest: latest is None,
+            f"{kind} to be deleted in CloudFront API",
+            timeout_seconds=timeout_seconds,
+            max_interval_seconds=max_interval_seconds,
+        )
+    except WaitTimeoutError as ex:
+        pytest.fail(str(ex))
+
+
+def wait_until_changed(
+    get: Callable[[], Any],
+    kind: str,
+    since_etag: str,
+    timeout_seconds: float,
+    max_interval_seconds: float = DEFAULT_MAX_INTERVAL_SECONDS,
+) -> WaitResult:
+    """Waits until `get()` returns a record whose ETag differs from
+    `since_etag`, failing the current test upon timeout."""
+    try:
+        return wait_for(
+            get,
+            lambda latest: latest is not None and latest.get("ETag") != since_etag,
+            f"{kind} to change from version {since_etag} in CloudFront API",
+            timeout_seconds=timeout_seconds,
+            max_interval_seconds=max_interval_seconds,
+        )
+    except WaitTimeoutError as ex:
+        pytest.fail(str(ex))